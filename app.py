@@ -20,27 +20,25 @@ from PyQt5.QtCore import Qt, QThread, QLibraryInfo, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QIcon
 import asyncio
 import importlib
+import inspect
 import time
 from typing import Callable
 import re
 
-from mqtt_manager import MQTTManager
+from logging_setup import load_logging_options, setup_logging
+from mqtt_manager import AsyncMQTTManager, MQTTManager
 
 
 # Garantir que a pasta de logs existe
 LOGS_DIR = os.path.join(os.path.dirname(__file__), "logs")
 os.makedirs(LOGS_DIR, exist_ok=True)
 
-# Configuração de logging detalhado
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s",
-    handlers=[logging.FileHandler(os.path.join(LOGS_DIR, "app_debug.log")), logging.StreamHandler()],
-)
-logger = logging.getLogger(__name__)
-
 CONFIG_DIR = os.path.join(os.path.dirname(__file__), "config")
 CONFIG_PATH = os.path.join(CONFIG_DIR, "config.json")
+
+# Logging assíncrono (fila + arquivo rotativo); nível e limites vêm do config.json
+setup_logging(os.path.join(LOGS_DIR, "app_debug.log"), **load_logging_options(CONFIG_PATH))
+logger = logging.getLogger(__name__)
 logger.debug(f"CONFIG_DIR: {CONFIG_DIR}, CONFIG_PATH: {CONFIG_PATH}")
 
 # Credenciais para desbloquear configurações técnicas
@@ -502,11 +500,15 @@ class ConfigDialog(QDialog):
             )
             return
 
+        # Preserva opções técnicas avançadas que não aparecem no formulário
+        current_tech = load_config().get("tech", {})
+
         # Salvar configuração estruturada
         data = {
             "device": {"cell_number": cell, "factory": factory, "cell_leader": leader},
             "network": {"wifi_ssid": wifi_ssid, "wifi_pass": wifi_pass},
             "tech": {
+                **current_tech,
                 "mqtt_host": mqtt_host,
                 "mqtt_user": mqtt_user,
                 "mqtt_pass": mqtt_pass,
@@ -754,8 +756,9 @@ class MainWindow(QWidget):
             "Botão 'Iniciar Análise' desabilitado até verificação de pré-requisitos"
         )
 
-        # Inicia verificação de pré-requisitos
-        self._check_prerequisites()
+        # Inicia verificação de pré-requisitos depois que a janela for exibida,
+        # para a carga do modelo em background não atrasar a primeira pintura
+        QTimer.singleShot(0, self._check_prerequisites)
 
         # Timer para verificar periodicamente o status
         self._takt_timer = QTimer(self)
@@ -1039,6 +1042,11 @@ class MainWindow(QWidget):
         
         layout.addLayout(init_status_layout)
 
+        # Tempo por estágio do loop de detecção (evento periódico "metrics")
+        self.metrics_label = QLabel("")
+        self.metrics_label.setStyleSheet("padding: 2px 5px; font-size: 9pt; color: #7f8c8d;")
+        layout.addWidget(self.metrics_label)
+
         self.setLayout(layout)
         self.setMinimumWidth(600)
         self.setMinimumHeight(500)
@@ -1155,8 +1163,8 @@ class MainWindow(QWidget):
                 if mqtt_manager and mqtt_manager._connected:
                     logger.info(f"Enviando reset do takt via MQTT para {device_id}: {message}")
                     
-                    # Usa publish_command do MQTTManager
-                    success = mqtt_manager.publish_command(device_id, message)
+                    # Thread da UI: com o AsyncMQTTManager o publish roda no loop do worker
+                    success = mqtt_manager.publish_command_threadsafe(device_id, message)
                     
                     if success:
                         logger.info("Mensagem MQTT de reset enviada com sucesso")
@@ -1569,6 +1577,23 @@ class MainWindow(QWidget):
             )
             return
 
+        elif event == "metrics":
+            stages = data.get("stages", {})
+            labels = [
+                ("capture", "Captura"),
+                ("inference", "YOLO"),
+                ("ocr", "OCR"),
+                ("frame", "Frame"),
+            ]
+            parts = [
+                f"{label} {stages[stage]['p95_ms']:.0f} ms"
+                for stage, label in labels
+                if "p95_ms" in stages.get(stage, {})
+            ]
+            self.metrics_label.setText(
+                f"⏱️ p95: {' · '.join(parts)} | {data.get('fps', 0.0):.1f} FPS"
+            )
+
         elif event == "takt_screen_detected":
             # logger.info("Tela de takt detectada")
             self.takt_screen_working = True
@@ -1616,12 +1641,15 @@ class MainWindow(QWidget):
             device_id = data.get("device_id", "")
             message = data.get("message", "")
             takt_detected = data.get("takt_detected", False)
+            spooled = data.get("spooled", False)
             
             logger.warning(f"{message}")
             
             if takt_detected:
                 self.status_label.setText(
-                    f"Takt detectado mas ESP32 desconectado!"
+                    "Takt guardado - ESP32 desconectado"
+                    if spooled
+                    else "Takt detectado mas ESP32 desconectado!"
                 )
                 self.status_label.setStyleSheet(
                     "font-size: 14pt; font-weight: bold; color: #f39c12; padding: 15px;"
@@ -1648,7 +1676,9 @@ class MainWindow(QWidget):
                 if should_show_warning:
                     self._last_device_warning_time = current_time
                     # Exibe notificação visual não-bloqueante
-                    QTimer.singleShot(0, lambda: self._show_device_disconnected_warning(device_id))
+                    QTimer.singleShot(
+                        0, lambda: self._show_device_disconnected_warning(device_id, spooled)
+                    )
 
     def _reset_takt_counter(self):
         """Reseta o contador de takt tanto na UI quanto na variável interna"""
@@ -1656,7 +1686,7 @@ class MainWindow(QWidget):
         self.last_takt_time_count = 0
         self.status_takt.setText("0")
 
-    def _show_device_disconnected_warning(self, device_id: str):
+    def _show_device_disconnected_warning(self, device_id: str, spooled: bool = False):
         """Exibe aviso de dispositivo desconectado sem bloquear a UI"""
         msg = QMessageBox(self)
         msg.setIcon(QMessageBox.Warning)
@@ -1664,9 +1694,14 @@ class MainWindow(QWidget):
         msg.setText(f"Dispositivo ESP32 não está conectado!")
         msg.setInformativeText(
             f"Dispositivo: {device_id}\n\n"
-            f"Um takt foi detectado, mas a mensagem NÃO foi enviada "
-            f"porque o ESP32 não está conectado ao broker MQTT.\n\n"
-            f"Verifique:\n"
+            + (
+                "Um takt foi detectado e ficou guardado no spool; será enviado "
+                "automaticamente quando o ESP32 voltar a se conectar ao broker MQTT.\n\n"
+                if spooled
+                else "Um takt foi detectado, mas a mensagem NÃO foi enviada "
+                "porque o ESP32 não está conectado ao broker MQTT.\n\n"
+            )
+            + f"Verifique:\n"
             f"• ESP32 está ligado?\n"
             f"• Está conectado ao WiFi?\n"
             f"• Consegue acessar o broker MQTT?\n"
@@ -1772,12 +1807,17 @@ class AsyncWorker(QThread):
                     cell_num = re.sub(r"\D", "", cell_number) or "0"
                     device_id = f"cost-{factory_num}-{cell_num}"
 
-                    mqtt_manager = MQTTManager(
+                    # "asyncio": cliente MQTT no mesmo event loop do rastreador;
+                    # "thread": paho com thread própria (loop_start)
+                    mqtt_client = tech_config.get("mqtt_client", "thread")
+                    manager_cls = AsyncMQTTManager if mqtt_client == "asyncio" else MQTTManager
+                    mqtt_manager = manager_cls(
                         broker=mqtt_host,
                         port=1883,
                         username=mqtt_user,
                         password=mqtt_pass,
                         timeout_seconds=60,
+                        wildcard_subscriptions=tech_config.get("mqtt_wildcard_subscriptions"),
                     )
                     mqtt_manager.add_device(device_id)
 
@@ -1785,11 +1825,14 @@ class AsyncWorker(QThread):
                         mqtt_manager.on_status_change(self._device_status_callback)
                     self._mqtt_manager = mqtt_manager
 
-                    if mqtt_manager.connect(timeout=10):
+                    connected = mqtt_manager.connect(timeout=10)
+                    if inspect.isawaitable(connected):
+                        connected = await connected
+                    if connected:
                         on_event("connected", {"url": f"{mqtt_host}:{1883}"})
-                        logger.info(f"Conexão MQTT estabelecida: {mqtt_host}")
+                        logger.info(f"Conexão MQTT estabelecida: {mqtt_host} ({mqtt_client})")
 
-                        time.sleep(2)  # aguarda mensagem LWT
+                        await asyncio.sleep(2)  # aguarda mensagem LWT
                         if mqtt_manager.is_device_connected(device_id):
                             logger.info(f"Dispositivo {device_id} está online")
                         else:
@@ -1902,14 +1945,21 @@ class InitializationWorker(QThread):
                     raise FileNotFoundError(f"Modelo não encontrado em: {model_path}")
 
                 logger.debug("Arquivo do modelo encontrado, tentando carregar...")
-                # Tenta carregar o modelo
-                from ultralytics import YOLO
+                # Carrega e aquece o detector compartilhado; main.main() e os
+                # ciclos Parar/Iniciar reutilizam a mesma instância
+                from model_registry import detector_options, get_detector
 
-                model = YOLO(model_path)
+                get_detector(model_path, **detector_options(tech_config))
 
                 # Modelo carregado com sucesso
                 self.status_update.emit({"event": "model_loaded", "path": model_path})
-                del model  # Libera memória
+
+                # Pré-carrega o módulo de análise (cv2, OCR, pipeline) para o
+                # "Iniciar Análise" não pagar o custo dos imports
+                try:
+                    importlib.import_module("main")
+                except Exception as e:
+                    logger.warning(f"Falha ao pré-carregar módulo de análise: {e}")
 
             except Exception as e:
                 logger.error(f"Erro ao verificar/carregar modelo: {e}", exc_info=True)
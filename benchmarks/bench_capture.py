@@ -0,0 +1,63 @@
+"""
+Benchmark da captura de tela: mss (buffers reaproveitados) x PIL.ImageGrab.
+
+Uso:
+    python benchmarks/bench_capture.py [--frames 100] [--region 0 0 400 200]
+
+Mede FPS da captura e bytes alocados por frame para a tela inteira e,
+opcionalmente, para uma região (x1 y1 x2 y2), como no modo de rastreamento.
+"""
+
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from capture import CAPTURE_BACKENDS, CapturedFrame, ScreenCapture  # noqa: E402
+
+
+def run(backend, frames, region):
+    capture = ScreenCapture(tracking=region is not None, backend=backend)
+    if capture.backend_name != backend:
+        raise RuntimeError(f"caiu para {capture.backend_name}")
+    first = capture.grab()
+    if region is not None:
+        # Força a região pedida como se o YOLO tivesse encontrado o timer nela
+        x1, y1, x2, y2 = region
+        frame = CapturedFrame(first.image, (0, 0), first.screen_size, full=True)
+        capture.margin_ratio = 0
+        capture.min_margin = 0
+        capture.update(frame, [[x1, y1, x2, y2, 1.0]])
+        capture.full_scan_interval = float("inf")
+
+    for _ in range(frames):
+        capture.grab()
+    return capture.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da captura de tela")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--region", type=int, nargs=4, metavar=("X1", "Y1", "X2", "Y2"))
+    args = parser.parse_args()
+
+    print(f"{'backend':<10}{'alvo':<10}{'FPS':>10}{'KiB/frame':>12}")
+    for backend in CAPTURE_BACKENDS:
+        targets = [("tela", None)] + ([("região", args.region)] if args.region else [])
+        for label, region in targets:
+            try:
+                stats = run(backend, args.frames, region)
+            except Exception as e:
+                print(f"{backend:<10}{label:<10} indisponível: {e}")
+                continue
+            print(
+                f"{backend:<10}{label:<10}{stats['fps']:>10.1f}"
+                f"{stats['bytes_per_frame'] / 1024:>12.0f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Benchmark do OCR: templates de dígitos x Tesseract em ROIs gravadas.
+
+Uso:
+    python benchmarks/bench_ocr.py --rois gravacoes/rois [--labels labels.json]
+
+As ROIs são recortes PNG da caixa do timer (como capturados da tela). Cada
+uma passa por ``extract_roi`` + ``preprocess_for_ocr`` e depois por cada
+reconhecedor. ``labels.json`` (opcional) mapeia nome do arquivo → texto
+esperado; sem ele, a saída do pytesseract é usada como referência.
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import cv2  # noqa: E402
+
+from digit_ocr import DigitTemplateRecognizer, TemplateFastPathEngine  # noqa: E402
+from main import extract_roi, preprocess_for_ocr  # noqa: E402
+from ocr import PytesseractEngine, TesserocrEngine  # noqa: E402
+
+
+def load_rois(rois_dir):
+    rois = []
+    for path in sorted(glob.glob(os.path.join(rois_dir, "*.png"))):
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        h, w = image.shape[:2]
+        processed = preprocess_for_ocr(extract_roi(image, (0, 0, w, h), pad=0))
+        rois.append((os.path.basename(path), processed))
+    return rois
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(name, recognize, rois, references, repeat):
+    timings = []
+    correct = 0
+    decision_correct = 0
+    for filename, roi in rois:
+        text = ""
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text = recognize(roi)
+            timings.append((time.perf_counter() - start) * 1000)
+        text = text.strip().replace("\n", " ").strip()
+        expected = references.get(filename, "")
+        correct += text == expected
+        decision_correct += ("00:00:00" in text) == ("00:00:00" in expected)
+
+    total = len(rois) or 1
+    return {
+        "engine": name,
+        "rois": len(rois),
+        "mean_ms": statistics.mean(timings) if timings else 0.0,
+        "p50_ms": percentile(timings, 50) if timings else 0.0,
+        "p95_ms": percentile(timings, 95) if timings else 0.0,
+        "text_accuracy": correct / total,
+        "decision_accuracy": decision_correct / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR templates x Tesseract")
+    parser.add_argument("--rois", required=True, help="Diretório com ROIs PNG")
+    parser.add_argument("--labels", help="JSON com texto esperado por arquivo")
+    parser.add_argument("--templates-dir", help="Templates de dígitos gravados")
+    parser.add_argument("--min-confidence", type=float, default=0.75)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Salva os resultados em JSON")
+    args = parser.parse_args()
+
+    rois = load_rois(args.rois)
+    if not rois:
+        print(f"Nenhuma ROI encontrada em {args.rois}")
+        return 1
+
+    pytesseract_engine = PytesseractEngine()
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            references = json.load(f)
+    else:
+        references = {
+            filename: pytesseract_engine.recognize(roi).strip().replace("\n", " ").strip()
+            for filename, roi in rois
+        }
+
+    recognizer = DigitTemplateRecognizer(args.templates_dir)
+    fast_path = TemplateFastPathEngine(
+        pytesseract_engine,
+        min_confidence=args.min_confidence,
+        templates_dir=args.templates_dir,
+    )
+
+    engines = [
+        ("pytesseract", pytesseract_engine.recognize),
+        ("template", lambda roi: recognizer.recognize(roi)[0]),
+        (fast_path.name, fast_path.recognize),
+    ]
+    try:
+        tesserocr_engine = TesserocrEngine()
+        engines.append(("tesserocr", tesserocr_engine.recognize))
+    except Exception as e:
+        print(f"tesserocr indisponível, pulando: {e}")
+
+    results = [run(name, fn, rois, references, args.repeat) for name, fn in engines]
+    results.append(
+        {
+            "engine": "fast_path_stats",
+            "fast_hits": fast_path.fast_hits,
+            "fallbacks": fast_path.fallbacks,
+        }
+    )
+
+    print(f"{'engine':<28}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'texto':>8}{'decisão':>9}")
+    for r in results[:-1]:
+        print(
+            f"{r['engine']:<28}{r['mean_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+            f"{r['text_accuracy']:>8.0%}{r['decision_accuracy']:>9.0%}"
+        )
+    print(f"Fast path: {fast_path.fast_hits} acertos diretos, {fast_path.fallbacks} fallbacks")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
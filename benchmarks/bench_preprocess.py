@@ -0,0 +1,136 @@
+"""
+Benchmark do pré-processamento da ROI: precisão do OCR x tempo por pipeline.
+
+Uso:
+    python benchmarks/bench_preprocess.py --rois gravacoes/rois [--labels labels.json]
+
+As ROIs são recortes PNG da caixa do timer (como capturados da tela, ex.:
+exportados de um replay). Cada pipeline de ``preprocessing.py`` escala e
+binariza a ROI, e o resultado passa pelo engine de OCR do config.
+``labels.json`` (opcional) mapeia nome do arquivo → texto esperado; sem ele,
+a saída do pipeline clássico é a referência.
+
+Para comparar o efeito ponta a ponta (takts perdidos/extras), rode o replay
+com cada pipeline: ``python benchmarks/replay.py --source ... --preprocess fast``.
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import cv2  # noqa: E402
+
+from preprocessing import ROI_PREPROCESSORS, create_roi_preprocessor  # noqa: E402
+
+
+def load_rois(rois_dir):
+    rois = []
+    for path in sorted(glob.glob(os.path.join(rois_dir, "*.png"))):
+        image = cv2.imread(path)
+        if image is not None:
+            rois.append((os.path.basename(path), image))
+    return rois
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(preprocessor, ocr_engine, rois, repeat):
+    """Tempo de escala+binarização, tempo do OCR e texto reconhecido por ROI"""
+    preprocess_ms, ocr_ms, texts = [], [], {}
+    for filename, roi in rois:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            binary = preprocessor.binarize(preprocessor.scale(roi))
+            preprocess_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        text = ocr_engine.recognize(binary)
+        ocr_ms.append((time.perf_counter() - start) * 1000)
+        texts[filename] = text.strip().replace("\n", " ").strip()
+    return preprocess_ms, ocr_ms, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pré-processamento da ROI")
+    parser.add_argument("--rois", required=True, help="Diretório com ROIs PNG")
+    parser.add_argument("--labels", help="JSON com texto esperado por arquivo")
+    parser.add_argument(
+        "--pipelines", nargs="+", default=list(ROI_PREPROCESSORS), choices=list(ROI_PREPROCESSORS)
+    )
+    parser.add_argument("--target-height", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Salva os resultados em JSON")
+    args = parser.parse_args()
+
+    rois = load_rois(args.rois)
+    if not rois:
+        print(f"Nenhuma ROI encontrada em {args.rois}")
+        return 1
+
+    import main as tracker
+    from ocr import create_ocr_engine
+
+    ocr_engine = create_ocr_engine(
+        tracker.OCR_BACKEND,
+        tracker.OCR_FAST_PATH,
+        tracker.OCR_FAST_PATH_CONFIDENCE,
+        tracker.OCR_TEMPLATES_DIR,
+    )
+
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            references = json.load(f)
+    else:
+        # Sem labels, o pipeline clássico (comportamento original) é a referência
+        references = run(create_roi_preprocessor("classic"), ocr_engine, rois, 1)[2]
+
+    results = []
+    for name in args.pipelines:
+        preprocessor = create_roi_preprocessor(name, args.target_height)
+        preprocess_ms, ocr_ms, texts = run(preprocessor, ocr_engine, rois, args.repeat)
+        total = len(rois)
+        results.append(
+            {
+                "pipeline": name,
+                "rois": total,
+                "preprocess_p50_ms": percentile(preprocess_ms, 50),
+                "preprocess_p95_ms": percentile(preprocess_ms, 95),
+                "ocr_mean_ms": statistics.mean(ocr_ms),
+                "text_accuracy": sum(
+                    texts[f] == references.get(f, "") for f in texts
+                ) / total,
+                "decision_accuracy": sum(
+                    ("00:00:00" in texts[f]) == ("00:00:00" in references.get(f, ""))
+                    for f in texts
+                ) / total,
+            }
+        )
+
+    print(
+        f"{'pipeline':<12}{'prep p50':>10}{'prep p95':>10}{'OCR ms':>10}"
+        f"{'texto':>8}{'decisão':>9}"
+    )
+    for r in results:
+        print(
+            f"{r['pipeline']:<12}{r['preprocess_p50_ms']:>10.2f}{r['preprocess_p95_ms']:>10.2f}"
+            f"{r['ocr_mean_ms']:>10.2f}{r['text_accuracy']:>8.0%}{r['decision_accuracy']:>9.0%}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
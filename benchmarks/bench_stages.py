@@ -0,0 +1,387 @@
+"""
+Benchmark dos estágios do loop por frame, em 1080p/1440p/4K.
+
+Uso:
+    python benchmarks/bench_stages.py --output resultados/HEAD.json
+    python benchmarks/bench_stages.py --baseline resultados/main.json
+
+Mede ``extract_roi``, ``preprocess_for_ocr``, ``extract_takt_message``
+(engine de OCR do config), cada pipeline de pré-processamento da ROI
+(``preprocess_<nome>``: escala + binarização), a predição do YOLO (backend
+do config), um lote de ``--stations`` frames num único predict
+(``yolo_predict_batch``, o ciclo do modo multi-estação) e a captura de
+tela. Para cada estágio registra latência p50/p95/p99, tempo de CPU por
+chamada (todas as threads do processo) e o pico de memória alocada numa
+chamada (tracemalloc, medido numa passada separada para não distorcer os
+tempos).
+
+Sem ``--frames-dir``, os frames são sintéticos (timer HH:MM:SS numa tela de
+fundo variado); com ele, cada screenshot é redimensionado para cada
+resolução e a caixa do timer vem do ``.txt`` YOLO ao lado do arquivo.
+
+Com ``--baseline``, compara a mediana (p50, ``--gate-metric``) de cada
+estágio com o JSON de referência e sai com código 1 se algum piorar mais que
+``--max-regression`` por cento e mais que ``--min-delta-ms`` em valor
+absoluto: esse é o gate para mudanças de performance no ``main.py``.
+
+As resoluções são medidas em ``--rounds`` rodadas intercaladas e, por
+estágio, fica a rodada de menor ``--gate-metric``. Compare medições da mesma
+máquina, com o mesmo ``--resolutions``; em máquinas compartilhadas, use
+``--rounds 5 --max-regression 50``.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+import main as tracker  # noqa: E402
+from preprocessing import ROI_PREPROCESSORS, create_roi_preprocessor  # noqa: E402
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+}
+
+
+def synthetic_frame(width, height, text="00:12:34", seed=0):
+    """Tela sintética com o timer numa janela; retorna (frame, caixa xyxy)"""
+    rng = np.random.default_rng(seed)
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[:] = np.linspace(40, 90, width, dtype=np.uint8)[None, :, None]
+    for _ in range(40):
+        x, y = int(rng.integers(0, width - 50)), int(rng.integers(0, height - 50))
+        w, h = int(rng.integers(50, width // 4)), int(rng.integers(30, height // 6))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(frame, (x, y), (x + w, y + h), color, -1)
+
+    scale = height / 1080
+    font_scale = 2.0 * scale
+    thickness = max(2, int(4 * scale))
+    (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+    x1, y1 = width // 2 - tw // 2, height // 3
+    pad = int(20 * scale)
+    box = [x1 - pad, y1 - pad, x1 + tw + pad, y1 + th + pad]
+    cv2.rectangle(frame, (box[0], box[1]), (box[2], box[3]), (255, 255, 255), -1)
+    cv2.putText(
+        frame, text, (x1, y1 + th), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 0, 0), thickness
+    )
+    return frame, box
+
+
+def recorded_frames(frames_dir, width, height):
+    """Screenshots redimensionados para a resolução, com a caixa do label YOLO"""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(frames_dir, "*.png"))):
+        label = os.path.splitext(path)[0] + ".txt"
+        image = cv2.imread(path)
+        if image is None or not os.path.exists(label):
+            continue
+        with open(label, "r", encoding="utf-8") as f:
+            parts = f.readline().split()
+        if len(parts) < 5:
+            continue
+        cx, cy, bw, bh = (float(v) for v in parts[1:5])
+        frame = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        box = [
+            int((cx - bw / 2) * width),
+            int((cy - bh / 2) * height),
+            int((cx + bw / 2) * width),
+            int((cy + bh / 2) * height),
+        ]
+        frames.append((frame, box))
+    return frames
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(fn, inputs, iterations, warmup):
+    """Mede ``fn(*input)`` alternando os inputs; retorna o resumo do estágio"""
+    for i in range(warmup):
+        fn(*inputs[i % len(inputs)])
+
+    wall, cpu = [], []
+    for i in range(iterations):
+        args = inputs[i % len(inputs)]
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        fn(*args)
+        wall.append(time.perf_counter() - start)
+        cpu.append(time.process_time() - cpu_start)
+
+    # Passada separada para alocações (tracemalloc deixa as chamadas mais lentas)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for args in inputs[: min(len(inputs), 5)]:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            fn(*args)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+
+    ordered = sorted(wall)
+    return {
+        "iterations": iterations,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p95_ms": percentile(ordered, 95) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "mean_ms": sum(wall) / len(wall) * 1000,
+        "cpu_ms": sum(cpu) / len(cpu) * 1000,
+        "peak_alloc_kib": max(peaks) / 1024 if peaks else 0.0,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def bench_resolution(frames, detector, ocr_engine, args):
+    inputs = [(frame, box) for frame, box in frames]
+    rois = [(tracker.extract_roi(frame, box),) for frame, box in frames]
+    processed = [(tracker.preprocess_for_ocr(roi),) for (roi,) in rois]
+
+    results = {
+        "extract_roi": measure(tracker.extract_roi, inputs, args.iterations, args.warmup),
+        "preprocess_for_ocr": measure(
+            tracker.preprocess_for_ocr, rois, args.iterations, args.warmup
+        ),
+    }
+    # Escala + binarização de cada pipeline sobre o mesmo recorte
+    crops = [(tracker.extract_roi(frame, box, scale=1),) for frame, box in frames]
+    for name in ROI_PREPROCESSORS:
+        preprocessor = create_roi_preprocessor(name, tracker.OCR_TARGET_HEIGHT)
+        results[f"preprocess_{name}"] = measure(
+            lambda crop: preprocessor.binarize(preprocessor.scale(crop)),
+            crops,
+            args.iterations,
+            args.warmup,
+        )
+    if ocr_engine is not None:
+        results["extract_takt_message"] = measure(
+            lambda image: tracker.extract_takt_message(image, ocr_engine),
+            processed,
+            args.ocr_iterations,
+            args.warmup,
+        )
+    if detector is not None:
+        results["yolo_predict"] = measure(
+            lambda frame: detector.predict(frame, imgsz=tracker.INFERENCE_IMGSZ),
+            [(frame,) for frame, _ in frames],
+            args.yolo_iterations,
+            args.warmup,
+        )
+        if args.stations > 1:
+            # Um ciclo multi-estação: ``--stations`` frames num único predict
+            results["yolo_predict_batch"] = measure(
+                lambda frame: detector.predict_batch(
+                    [frame] * args.stations, imgsz=tracker.INFERENCE_IMGSZ
+                ),
+                [(frame,) for frame, _ in frames],
+                args.yolo_iterations,
+                args.warmup,
+            )
+    return results
+
+
+def compare(results, baseline, max_regression, metric="p50", min_delta_ms=0.1):
+    """
+    Lista os estágios cujo ``metric`` piorou mais que ``max_regression`` % e
+    mais que ``min_delta_ms`` (estágios de microssegundos oscilam muito em %)
+    """
+    key = f"{metric}_ms"
+    regressions = []
+    for resolution, stages in results["results"].items():
+        for stage, current in stages.items():
+            previous = baseline.get("results", {}).get(resolution, {}).get(stage)
+            if not previous or not previous.get(key):
+                continue
+            delta = (current[key] - previous[key]) / previous[key] * 100
+            regressed = delta > max_regression and current[key] - previous[key] > min_delta_ms
+            marker = "❌" if regressed else "  "
+            print(
+                f"{marker} {resolution:<7}{stage:<22}{previous[key]:>9.2f} → "
+                f"{current[key]:>9.2f} ms ({delta:+.1f}%)"
+            )
+            if regressed:
+                regressions.append((resolution, stage, delta))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos estágios por frame")
+    parser.add_argument("--frames-dir", help="Screenshots com labels YOLO (.txt)")
+    parser.add_argument(
+        "--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS)
+    )
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--ocr-iterations", type=int, default=100)
+    parser.add_argument("--yolo-iterations", type=int, default=50)
+    parser.add_argument("--capture-iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument(
+        "--rounds",
+        type=int,
+        default=3,
+        help="Medições de cada resolução; vale a de menor --gate-metric por estágio",
+    )
+    parser.add_argument(
+        "--stations", type=int, default=4, help="Frames por lote em yolo_predict_batch (1 = não mede)"
+    )
+    parser.add_argument("--skip-yolo", action="store_true")
+    parser.add_argument("--skip-ocr", action="store_true")
+    parser.add_argument("--skip-capture", action="store_true")
+    parser.add_argument("--output", help="Salva os resultados em JSON")
+    parser.add_argument("--baseline", help="JSON de referência para o gate de regressão")
+    parser.add_argument("--gate-metric", choices=["p50", "p95"], default="p50")
+    parser.add_argument("--max-regression", type=float, default=25.0)
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.1,
+        help="Piora absoluta mínima para contar como regressão",
+    )
+    args = parser.parse_args()
+
+    detector = None
+    if not args.skip_yolo:
+        try:
+            from detector import create_detector
+
+            detector = create_detector(tracker.MODEL_PATH, **tracker.DETECTOR_OPTIONS)
+        except Exception as e:
+            print(f"YOLO indisponível, pulando: {e}")
+
+    ocr_engine = None
+    if not args.skip_ocr:
+        try:
+            from ocr import create_ocr_engine
+
+            ocr_engine = create_ocr_engine(
+                tracker.OCR_BACKEND,
+                tracker.OCR_FAST_PATH,
+                tracker.OCR_FAST_PATH_CONFIDENCE,
+                tracker.OCR_TEMPLATES_DIR,
+            )
+        except Exception as e:
+            print(f"OCR indisponível, pulando: {e}")
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "inference_backend": detector.name if detector else None,
+            "ocr_backend": ocr_engine.name if ocr_engine else None,
+        },
+        "results": {},
+    }
+
+    frames_by_resolution = {}
+    for resolution in args.resolutions:
+        width, height = RESOLUTIONS[resolution]
+        if args.frames_dir:
+            frames = recorded_frames(args.frames_dir, width, height)
+        else:
+            frames = [
+                synthetic_frame(width, height, text, seed)
+                for seed, text in enumerate(["00:12:34", "00:00:07", "00:00:00"])
+            ]
+        if not frames:
+            print(f"Nenhum frame para {resolution}")
+            continue
+        frames_by_resolution[resolution] = frames
+
+    # Rodadas intercaladas entre as resoluções, espalhadas no tempo: por
+    # estágio fica a rodada menos perturbada por outras cargas da máquina
+    gate_key = f"{args.gate_metric}_ms"
+    for round_index in range(args.rounds):
+        for resolution, frames in frames_by_resolution.items():
+            width, height = RESOLUTIONS[resolution]
+            print(
+                f"== {resolution} ({width}x{height}, {len(frames)} frames) "
+                f"rodada {round_index + 1}/{args.rounds} =="
+            )
+            stages = results["results"].setdefault(resolution, {})
+            for stage, summary in bench_resolution(frames, detector, ocr_engine, args).items():
+                if stage not in stages or summary[gate_key] < stages[stage][gate_key]:
+                    stages[stage] = summary
+
+    if not args.skip_capture:
+        try:
+            from capture import ScreenCapture
+
+            capture = ScreenCapture(tracking=False, backend=tracker.CAPTURE_BACKEND)
+            screen = capture.grab().image
+            label = f"screen_{screen.shape[1]}x{screen.shape[0]}"
+            results["results"][label] = {
+                f"capture_{capture.backend_name}": measure(
+                    capture.grab, [()], args.capture_iterations, args.warmup
+                )
+            }
+        except Exception as e:
+            print(f"Captura de tela indisponível, pulando: {e}")
+
+    print(
+        f"{'resolução':<18}{'estágio':<24}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'CPU ms':>9}{'pico KiB':>10}"
+    )
+    for resolution, stages in results["results"].items():
+        for stage, r in stages.items():
+            print(
+                f"{resolution:<18}{stage:<24}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+                f"{r['p99_ms']:>9.2f}{r['cpu_ms']:>9.2f}{r['peak_alloc_kib']:>10.0f}"
+            )
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("")
+        print(f"Comparação com {args.baseline} (revisão {baseline.get('meta', {}).get('revision')}):")
+        regressions = compare(
+            results, baseline, args.max_regression, args.gate_metric, args.min_delta_ms
+        )
+        if regressions:
+            print(
+                f"❌ {len(regressions)} estágio(s) acima de {args.max_regression:.0f}% "
+                f"de regressão no {args.gate_metric}"
+            )
+            return 1
+        print("✅ Sem regressões acima do limite")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Replay offline: roda ``main.main()`` sobre capturas gravadas.
+
+Uso:
+    python benchmarks/replay.py --source gravacoes/turno.mp4 [--speed 1]
+    python benchmarks/replay.py --source gravacoes/telas --fps 10 --speed 0
+
+A fonte é uma pasta de PNGs (ordem alfabética, ``--fps`` frames por
+segundo) ou um vídeo. ``--speed`` acelera a linha do tempo (2 = duas vezes
+mais rápido); ``--speed 0`` entrega um frame novo a cada captura, o mais
+rápido possível. O MQTT é substituído por um stub que grava os
+``publish_command``. ``--preprocess`` troca o pré-processamento da ROI,
+para comparar os pipelines de ``preprocessing.py`` nas mesmas gravações.
+
+``--labels`` (JSON ``{"takt_frames": [índices]}``) informa os frames em que
+o timer chega a ``00:00:00``, para medir eventos perdidos/extras e a latência
+até a publicação. Com ``--expect-takts`` o script sai com código 1 se o
+número de takts publicados for diferente (uso como teste de regressão).
+
+Obs.: o debounce de 20 s do loop usa o relógio real; em replays acelerados,
+takts mais próximos que ``20 * speed`` segundos de vídeo são agrupados.
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from capture import ScreenCapture  # noqa: E402
+
+
+class ReplayBackend:
+    """Backend de captura que entrega frames de uma pasta de PNGs ou vídeo"""
+
+    name = "replay"
+
+    def __init__(self, source, fps=10.0, speed=1.0):
+        self.speed = speed
+        self._paths = None
+        self._video = None
+        if os.path.isdir(source):
+            self._paths = sorted(glob.glob(os.path.join(source, "*.png")))
+            self.fps = fps
+            self.frame_count = len(self._paths)
+        else:
+            self._video = cv2.VideoCapture(source)
+            if not self._video.isOpened():
+                raise FileNotFoundError(f"Não foi possível abrir o vídeo: {source}")
+            self.fps = self._video.get(cv2.CAP_PROP_FPS) or fps
+            self.frame_count = int(self._video.get(cv2.CAP_PROP_FRAME_COUNT))
+        if self.frame_count == 0:
+            raise FileNotFoundError(f"Nenhum frame em {source}")
+
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._next_step = 0
+        self._loaded_index = -1
+        self._frame = None
+        self._first_grab = {}
+        self.last_index = 0
+        self.finished = threading.Event()
+
+    def start(self):
+        if self._started_at is None:
+            self._started_at = time.monotonic()
+        return self._started_at
+
+    def frame_time(self, index):
+        """Instante (monotônico) em que o frame ``index`` aparece na tela simulada"""
+        if self.speed <= 0:
+            # Sem linha do tempo: o frame "aparece" na primeira captura dele
+            return self._first_grab.get(index)
+        return self._started_at + index / self.fps / self.speed
+
+    def _current_index(self):
+        if self.speed <= 0:
+            index, self._next_step = self._next_step, self._next_step + 1
+        else:
+            elapsed = time.monotonic() - self._started_at
+            index = int(elapsed * self.speed * self.fps)
+        if index >= self.frame_count:
+            self.finished.set()
+            index = self.frame_count - 1
+        return index
+
+    def _load(self, index):
+        """Decodifica o frame ``index``; retorna os bytes alocados"""
+        if index == self._loaded_index:
+            return 0
+        if self._paths is not None:
+            self._frame = cv2.imread(self._paths[index])
+        else:
+            # Vídeo só avança: pula os frames intermediários sem decodificar
+            for _ in range(index - self._loaded_index - 1):
+                self._video.grab()
+            ok, frame = self._video.read()
+            if ok:
+                self._frame = frame
+        self._loaded_index = index
+        return self._frame.nbytes
+
+    def grab(self, bbox, pool):
+        with self._lock:
+            self.start()
+            index = self._current_index()
+            self._first_grab.setdefault(index, time.monotonic())
+            allocated = self._load(index)
+            frame = self._frame
+            self.last_index = index
+
+        if bbox:
+            x1, y1, x2, y2 = bbox
+            frame = frame[y1:y2, x1:x2]
+        image = pool.get(frame.shape)
+        np.copyto(image, frame)
+        return image, allocated
+
+
+class ReplayCapture(ScreenCapture):
+    """ScreenCapture alimentado pelo replay, registrando as detecções por frame"""
+
+    def __init__(self, backend, **kwargs):
+        super().__init__(backend=backend, **kwargs)
+        self.replay = backend
+        self.detections = {}
+
+    def grab(self):
+        frame = super().grab()
+        frame.index = self.replay.last_index
+        return frame
+
+    def update(self, frame, boxes):
+        self.detections[frame.index] = len(boxes)
+        super().update(frame, boxes)
+
+
+class RecordingMQTT:
+    """Stub do MQTTManager que grava os comandos publicados"""
+
+    def __init__(self, device_id):
+        self.device_id = device_id
+        self.published = []
+
+    @property
+    def device_status(self):
+        return {self.device_id: True}
+
+    def publish_command(self, device_id, payload, qos=1):
+        self.published.append(
+            {"at": time.monotonic(), "device_id": device_id, "payload": dict(payload)}
+        )
+        return True
+
+
+def summarize(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return {
+        "mean_ms": statistics.mean(values) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def run_replay(args):
+    import main as tracker
+
+    if args.preprocess:
+        from preprocessing import create_roi_preprocessor
+
+        tracker.ROI_PREPROCESSOR = create_roi_preprocessor(
+            args.preprocess, tracker.OCR_TARGET_HEIGHT
+        )
+    # Publica direto: o replay mede detecção → publish, sem o spool em disco
+    tracker.SPOOL_ENABLED = False
+    device_id = args.device_id or tracker.DEVICE_ID
+    backend = ReplayBackend(args.source, fps=args.fps, speed=args.speed)
+    capture = ReplayCapture(
+        backend,
+        tracking=tracker.CAPTURE_MODE == "tracking",
+        full_scan_interval=tracker.FULL_SCAN_INTERVAL,
+    )
+    mqtt = RecordingMQTT(device_id)
+    events = []
+
+    def on_event(name, payload):
+        events.append({"at": time.monotonic(), "event": name, "payload": payload})
+
+    task = asyncio.ensure_future(
+        tracker.main(on_event, mqtt, device_id, screen_capture=capture)
+    )
+    # O relógio do replay começa quando o modelo está pronto, não durante a carga
+    while not any(e["event"] == "model_loaded" for e in events):
+        if task.done():
+            task.result()
+            raise RuntimeError("main.main() terminou antes de carregar o modelo")
+        await asyncio.sleep(0.05)
+    started = backend.start()
+
+    while not backend.finished.is_set() and not task.done():
+        await asyncio.sleep(0.1)
+    # Dá tempo para o último frame passar pelo OCR
+    await asyncio.sleep(args.grace)
+    elapsed = time.monotonic() - started
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    takts = [
+        {"at_s": message["at"] - started, "payload": message["payload"]}
+        for message in mqtt.published
+    ]
+
+    capture_latencies = [
+        e["at"] - e["payload"]["captured_at"]
+        for e in events
+        if e["event"] == "takt_detected" and "captured_at" in e["payload"]
+    ]
+    stats = capture.stats()
+    report = {
+        "source": args.source,
+        "speed": args.speed,
+        "preprocess": tracker.ROI_PREPROCESSOR.name,
+        "source_frames": backend.frame_count,
+        "frames_grabbed": stats["frames"],
+        "frames_analyzed": len(capture.detections),
+        "frames_with_detections": sum(1 for n in capture.detections.values() if n),
+        "elapsed_s": elapsed,
+        "fps": stats["frames"] / elapsed if elapsed else 0.0,
+        "takt_events": len(takts),
+        "takts": takts,
+        "capture_to_event_latency": summarize(capture_latencies),
+    }
+
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            expected_frames = json.load(f).get("takt_frames", [])
+        # Cada takt esperado casa com a primeira publicação depois do frame
+        latencies = []
+        remaining = [m["at"] for m in mqtt.published]
+        for index in expected_frames:
+            shown_at = backend.frame_time(index)
+            if shown_at is None:
+                continue
+            match = next((at for at in remaining if at >= shown_at), None)
+            if match is not None:
+                remaining.remove(match)
+                latencies.append(match - shown_at)
+        report["expected_takts"] = len(expected_frames)
+        report["missed_takts"] = len(expected_frames) - len(latencies)
+        report["extra_takts"] = len(remaining)
+        report["completion_to_publish_latency"] = summarize(latencies)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay offline do loop de detecção")
+    parser.add_argument("--source", required=True, help="Pasta de PNGs ou arquivo de vídeo")
+    parser.add_argument("--fps", type=float, default=10.0, help="FPS da pasta de PNGs")
+    parser.add_argument("--speed", type=float, default=1.0, help="0 = o mais rápido possível")
+    parser.add_argument("--labels", help="JSON com os frames de conclusão do takt")
+    parser.add_argument(
+        "--preprocess", help="Pré-processamento da ROI (padrão: config), ex.: fast, adaptive"
+    )
+    parser.add_argument("--device-id", help="ID do dispositivo (padrão: config)")
+    parser.add_argument("--grace", type=float, default=2.0, help="Espera após o último frame")
+    parser.add_argument("--expect-takts", type=int, help="Falha se o número de takts diferir")
+    parser.add_argument("--output", help="Salva o relatório em JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_replay(args))
+
+    print(
+        f"Frames: {report['frames_grabbed']} capturados, {report['frames_analyzed']} analisados, "
+        f"{report['frames_with_detections']} com detecção - {report['fps']:.1f} FPS"
+    )
+    print(f"Takts publicados: {report['takt_events']}")
+    latency = report["capture_to_event_latency"]
+    if latency:
+        print(
+            f"Latência captura→evento: média {latency['mean_ms']:.0f}ms, "
+            f"p95 {latency['p95_ms']:.0f}ms"
+        )
+    if "expected_takts" in report:
+        print(
+            f"Esperados: {report['expected_takts']} - perdidos: {report['missed_takts']}, "
+            f"extras: {report['extra_takts']}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.expect_takts is not None and report["takt_events"] != args.expect_takts:
+        print(f"❌ Esperava {args.expect_takts} takts, publicados {report['takt_events']}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
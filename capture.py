@@ -0,0 +1,381 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class CapturedFrame:
+    """Frame capturado, com a posição da região capturada na tela"""
+
+    def __init__(
+        self,
+        image,
+        offset: Tuple[int, int] = (0, 0),
+        screen_size: Optional[Tuple[int, int]] = None,
+        full: bool = True,
+    ):
+        self.image = image
+        self.offset = offset
+        self.screen_size = screen_size
+        self.full = full
+
+
+class FrameBufferPool:
+    """
+    Anel de buffers BGR reaproveitados entre capturas.
+
+    ``slots`` precisa cobrir os frames em uso ao mesmo tempo: o do OCR, o
+    adiantado pelo pipeline e o que está sendo capturado; cada slot só é
+    alocado no primeiro uso. Guarda anéis para até ``max_shapes`` tamanhos. O anel de maior área (tela inteira, que
+    contém qualquer região) nunca é descartado; os das regiões rastreadas
+    saem pelo uso menos recente.
+    """
+
+    def __init__(self, slots: int = 3, max_shapes: int = 2):
+        self.slots = slots
+        self.max_shapes = max(2, max_shapes)
+        self._rings: "OrderedDict[Tuple[int, ...], List[Optional[np.ndarray]]]" = OrderedDict()
+        self._index: Dict[Tuple[int, ...], int] = {}
+        self.allocated_bytes = 0
+
+    def _evict(self):
+        # Tela inteira fica fixa: só anéis de região saem, do menos usado
+        pinned = max(self._rings, key=math.prod)
+        victim = next(shape for shape in self._rings if shape != pinned)
+        del self._rings[victim]
+        del self._index[victim]
+
+    def get(self, shape: Tuple[int, ...]) -> np.ndarray:
+        ring = self._rings.get(shape)
+        if ring is None:
+            if len(self._rings) >= self.max_shapes:
+                self._evict()
+            ring = [None] * self.slots
+            self._rings[shape] = ring
+            self._index[shape] = 0
+        else:
+            self._rings.move_to_end(shape)
+
+        index = self._index[shape]
+        self._index[shape] = (index + 1) % self.slots
+        buffer = ring[index]
+        if buffer is None:
+            buffer = ring[index] = np.empty(shape, dtype=np.uint8)
+            self.allocated_bytes += buffer.nbytes
+        return buffer
+
+
+class PILCaptureBackend:
+    """Captura via PIL.ImageGrab (fallback portátil)"""
+
+    name = "pil"
+
+    def __init__(self):
+        from PIL import ImageGrab
+
+        self._image_grab = ImageGrab
+
+    def grab(self, bbox, pool: FrameBufferPool) -> Tuple[np.ndarray, int]:
+        """Retorna (imagem BGR, bytes alocados fora do pool)"""
+        screen = self._image_grab.grab(bbox=bbox) if bbox else self._image_grab.grab()
+        rgb = np.array(screen)
+        image = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=pool.get(rgb.shape))
+        # Imagem PIL (4 bytes/pixel internamente) + cópia para o array NumPy
+        return image, screen.width * screen.height * 4 + rgb.nbytes
+
+
+class MSSCaptureBackend:
+    """
+    Captura via mss (XGetImage/XShm no Linux).
+
+    O BGRA do mss é lido como view NumPy sem cópia e convertido direto para
+    o buffer BGR do pool. Cada thread usa a sua instância do mss.
+    """
+
+    name = "mss"
+
+    def __init__(self):
+        import mss
+
+        self._mss = mss
+        self._local = threading.local()
+        # Falha cedo se não houver display acessível
+        self._instance()
+
+    def _instance(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._mss.mss()
+            self._local.sct = sct
+        return sct
+
+    def grab(self, bbox, pool: FrameBufferPool) -> Tuple[np.ndarray, int]:
+        """Retorna (imagem BGR, bytes alocados fora do pool)"""
+        sct = self._instance()
+        screen = sct.monitors[0]
+        if bbox:
+            x1, y1, x2, y2 = bbox
+            monitor = {
+                "left": screen["left"] + x1,
+                "top": screen["top"] + y1,
+                "width": x2 - x1,
+                "height": y2 - y1,
+            }
+        else:
+            monitor = screen
+
+        shot = sct.grab(monitor)
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        image = cv2.cvtColor(
+            bgra, cv2.COLOR_BGRA2BGR, dst=pool.get((shot.height, shot.width, 3))
+        )
+        # Só o buffer BGRA do próprio mss
+        return image, bgra.nbytes
+
+
+CAPTURE_BACKENDS = {
+    "mss": MSSCaptureBackend,
+    "pil": PILCaptureBackend,
+}
+
+
+def create_capture_backend(backend: str = "auto"):
+    """
+    Cria o backend de captura configurado.
+
+    "auto" tenta o mss e cai para o PIL se a biblioteca não estiver instalada
+    ou não conseguir abrir o display.
+    """
+    candidates = ["mss", "pil"] if backend == "auto" else [backend]
+    if candidates[-1] != "pil":
+        candidates.append("pil")
+
+    for name in candidates:
+        backend_cls = CAPTURE_BACKENDS.get(name)
+        if backend_cls is None:
+            logger.warning(f"Backend de captura desconhecido: {name}")
+            continue
+        try:
+            capture_backend = backend_cls()
+            logger.info(f"Backend de captura: {capture_backend.name}")
+            return capture_backend
+        except Exception as e:
+            logger.warning(f"Backend de captura '{name}' indisponível: {e}")
+
+    raise RuntimeError("Nenhum backend de captura disponível")
+
+
+class ScreenCapture:
+    """
+    Captura de tela com modo de rastreamento da caixa do takt.
+
+    No modo rastreamento, depois que o YOLO localiza o timer, só a região das
+    caixas (mais uma margem) é capturada, até a detecção ser perdida. Uma
+    varredura da tela inteira ainda é feita a cada ``full_scan_interval``
+    segundos para acompanhar mudanças de layout.
+
+    A região é mantida enquanto as caixas detectadas couberem nela, a mais de
+    ``edge_margin`` pixels da borda: o jitter de ±1 px do YOLO não muda o
+    offset nem o tamanho do recorte (e o gate de mudança continua acertando
+    o cache). Ela só é recalculada quando uma caixa encosta na borda ou sai,
+    ou quando a região necessária cai abaixo de ``shrink_ratio`` da área atual.
+    Largura e altura da região são arredondadas para múltiplos de
+    ``size_step``, para poucos tamanhos de buffer no pool.
+
+    A captura usa o backend ``backend`` ("auto" = mss com fallback para PIL)
+    e escreve num anel de buffers pré-alocados.
+
+    ``bounds`` (x1, y1, x2, y2) limita a captura a uma área da tela (ex.: a
+    janela de takt de uma estação num monitor com várias células); frames,
+    região rastreada e caixas ficam em coordenadas relativas a essa área.
+    """
+
+    def __init__(
+        self,
+        tracking: bool = True,
+        margin_ratio: float = 1.0,
+        min_margin: int = 32,
+        full_scan_interval: float = 5.0,
+        min_imgsz: int = 64,
+        backend: str = "auto",
+        buffer_slots: int = 3,
+        bounds: Optional[Tuple[int, int, int, int]] = None,
+        edge_margin: int = 8,
+        shrink_ratio: float = 0.5,
+        size_step: int = 64,
+    ):
+        self.tracking = tracking
+        self.edge_margin = edge_margin
+        self.shrink_ratio = shrink_ratio
+        self.size_step = size_step
+        self.bounds = tuple(bounds) if bounds else None
+        self.margin_ratio = margin_ratio
+        self.min_margin = min_margin
+        self.full_scan_interval = full_scan_interval
+        self.min_imgsz = min_imgsz
+
+        self._region: Optional[Tuple[int, int, int, int]] = None
+        self._screen_size: Optional[Tuple[int, int]] = None
+        self._last_full_scan: Optional[float] = None
+
+        # Aceita também um objeto backend pronto (ex.: replay de gravações)
+        self._backend = (
+            create_capture_backend(backend) if isinstance(backend, str) else backend
+        )
+        self._pool = FrameBufferPool(slots=buffer_slots)
+
+        # Contadores para diagnóstico
+        self.full_grabs = 0
+        self.region_grabs = 0
+        self._grab_seconds = 0.0
+        self._transient_bytes = 0
+
+    @property
+    def backend_name(self) -> str:
+        return self._backend.name
+
+    def stats(self) -> dict:
+        """FPS de captura (só o tempo de grab) e bytes alocados por frame"""
+        frames = self.full_grabs + self.region_grabs
+        if frames == 0:
+            return {"frames": 0, "fps": 0.0, "bytes_per_frame": 0.0}
+        return {
+            "frames": frames,
+            "fps": frames / self._grab_seconds if self._grab_seconds else 0.0,
+            "bytes_per_frame": (self._transient_bytes + self._pool.allocated_bytes) / frames,
+        }
+
+    def _grab(self, bbox) -> np.ndarray:
+        if self.bounds is not None:
+            # Coordenadas relativas à área da estação → tela
+            bx, by = self.bounds[:2]
+            bbox = self.bounds if bbox is None else (
+                bbox[0] + bx, bbox[1] + by, bbox[2] + bx, bbox[3] + by
+            )
+        start = time.perf_counter()
+        image, transient_bytes = self._backend.grab(bbox, self._pool)
+        self._grab_seconds += time.perf_counter() - start
+        self._transient_bytes += transient_bytes
+        return image
+
+    def _needs_full_scan(self) -> bool:
+        if not self.tracking or self._region is None or self._screen_size is None:
+            return True
+        if self._last_full_scan is None:
+            return True
+        return (time.monotonic() - self._last_full_scan) > self.full_scan_interval
+
+    def grab(self) -> CapturedFrame:
+        """
+        Captura a tela inteira ou apenas a região rastreada, em BGR.
+
+        A imagem fica num buffer do pool e é sobrescrita ``buffer_slots``
+        capturas depois; quem precisar guardá-la por mais tempo deve copiar.
+        """
+        if self._needs_full_scan():
+            image = self._grab(None)
+            self._screen_size = (image.shape[1], image.shape[0])
+            self._last_full_scan = time.monotonic()
+            self.full_grabs += 1
+            return CapturedFrame(image, (0, 0), self._screen_size, full=True)
+
+        x1, y1, x2, y2 = self._region
+        image = self._grab((x1, y1, x2, y2))
+        self.region_grabs += 1
+        return CapturedFrame(image, (x1, y1), self._screen_size, full=False)
+
+    def update(self, frame: CapturedFrame, boxes: List):
+        """Atualiza a região rastreada a partir das caixas detectadas no frame"""
+        if not self.tracking:
+            return
+
+        if len(boxes) == 0:
+            if self._region is not None:
+                logger.debug("Detecção perdida - voltando para captura da tela inteira")
+            self._region = None
+            return
+
+        ox, oy = frame.offset
+        screen_w, screen_h = self._screen_size
+        screen_boxes = []
+        rx1, ry1, rx2, ry2 = screen_w, screen_h, 0, 0
+        for box in boxes:
+            bx1, by1, bx2, by2 = map(int, box[:4])
+            screen_boxes.append((ox + bx1, oy + by1, ox + bx2, oy + by2))
+            mx = max(self.min_margin, int((bx2 - bx1) * self.margin_ratio))
+            my = max(self.min_margin, int((by2 - by1) * self.margin_ratio))
+            rx1 = min(rx1, ox + bx1 - mx)
+            ry1 = min(ry1, oy + by1 - my)
+            rx2 = max(rx2, ox + bx2 + mx)
+            ry2 = max(ry2, oy + by2 + my)
+
+        region = (
+            max(rx1, 0),
+            max(ry1, 0),
+            min(rx2, screen_w),
+            min(ry2, screen_h),
+        )
+        if region[2] <= region[0] or region[3] <= region[1]:
+            self._region = None
+            return
+
+        region = self._snap_size(region)
+        if self._keeps_region(screen_boxes, region):
+            return
+        if self._region is None:
+            logger.debug(f"Rastreando região do takt: {region}")
+        self._region = region
+
+    def _snap_size(self, region: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        """Arredonda largura e altura para cima, em múltiplos de ``size_step``"""
+        x1, y1, x2, y2 = region
+        screen_w, screen_h = self._screen_size
+        step = self.size_step
+        w = min(screen_w, -(-(x2 - x1) // step) * step)
+        h = min(screen_h, -(-(y2 - y1) // step) * step)
+        # Cresce para a direita/baixo; na borda da tela, recua a origem
+        x1 = max(0, min(x1, screen_w - w))
+        y1 = max(0, min(y1, screen_h - h))
+        return x1, y1, x1 + w, y1 + h
+
+    def _keeps_region(self, screen_boxes: List, needed: Tuple[int, int, int, int]) -> bool:
+        """Histerese: a região atual ainda serve para as caixas detectadas?"""
+        if self._region is None:
+            return False
+        x1, y1, x2, y2 = self._region
+        e = self.edge_margin
+        for bx1, by1, bx2, by2 in screen_boxes:
+            # Caixa perto da borda da tela não tem como se afastar dela
+            if (
+                (bx1 < x1 + e and x1 > 0)
+                or (by1 < y1 + e and y1 > 0)
+                or (bx2 > x2 - e and x2 < self._screen_size[0])
+                or (by2 > y2 - e and y2 < self._screen_size[1])
+            ):
+                return False
+        area = (x2 - x1) * (y2 - y1)
+        needed_area = (needed[2] - needed[0]) * (needed[3] - needed[1])
+        return needed_area >= self.shrink_ratio * area
+
+    def detection_imgsz(self, frame: CapturedFrame, base_imgsz: int = 640) -> int:
+        """
+        Tamanho de entrada do YOLO para o frame.
+
+        Recortes usam a mesma escala que a tela inteira teria em ``base_imgsz``,
+        para o modelo ver o timer no mesmo tamanho em que foi treinado.
+        """
+        if frame.full or not frame.screen_size:
+            return base_imgsz
+
+        h, w = frame.image.shape[:2]
+        scale = base_imgsz / max(frame.screen_size)
+        size = int(math.ceil(max(h, w) * scale / 32) * 32)
+        return max(self.min_imgsz, min(base_imgsz, size))
@@ -0,0 +1,221 @@
+import logging
+import re
+import time
+from typing import List, Optional, Tuple
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+COUNTDOWN_RE = re.compile(r"(\d{1,2}):(\d{2}):(\d{2})")
+
+# Resultados de CountdownTracker.observe()
+ACCEPTED = "accepted"
+# Incompatível com o countdown previsto: provável erro de OCR
+REJECTED = "rejected"
+# Sem valor ou abaixo de min_confidence: não move o modelo, mas também não é veto
+LOW_CONFIDENCE = "low_confidence"
+
+
+def parse_countdown(text: str) -> Optional[int]:
+    """Converte o primeiro HH:MM:SS do texto em segundos restantes"""
+    match = COUNTDOWN_RE.search(text or "")
+    if not match:
+        return None
+    hours, minutes, seconds = (int(group) for group in match.groups())
+    if minutes >= 60 or seconds >= 60:
+        return None
+    return hours * 3600 + minutes * 60 + seconds
+
+
+class CountdownTracker:
+    """
+    Modelo contínuo do countdown do takt a partir das leituras de OCR.
+
+    Cada leitura ``r`` diz que o tempo restante real está em
+    ``[r - tolerance, r + tolerance]``. O modelo extrapola o intervalo aceito
+    até o instante da nova leitura e faz a interseção, estreitando a previsão
+    do instante em que o timer chega a zero. Leituras fora do intervalo
+    previsto são rejeitadas (erro de OCR), a não ser que ``confirmations``
+    leituras seguidas concordem entre si - nesse caso o countdown foi
+    reiniciado e o modelo é ancorado de novo. Leituras com confiança abaixo
+    de ``min_confidence`` são ignoradas pelo modelo, sem contar como rejeição.
+    """
+
+    def __init__(
+        self,
+        tolerance: float = 1.0,
+        min_confidence: float = 0.5,
+        confirmations: int = 2,
+        stale_after: float = 3.0,
+    ):
+        self.tolerance = tolerance
+        self.min_confidence = min_confidence
+        self.confirmations = confirmations
+        self.stale_after = stale_after
+
+        # Intervalo [lo, hi] do tempo restante no instante _ref
+        self._lo: Optional[float] = None
+        self._hi: Optional[float] = None
+        self._ref: Optional[float] = None
+        self._pending: List[Tuple[float, float]] = []
+
+        # Contadores para diagnóstico
+        self.accepted = 0
+        self.rejected = 0
+        self.low_confidence = 0
+
+    @property
+    def locked(self) -> bool:
+        return self._ref is not None
+
+    @property
+    def confirming(self) -> bool:
+        """Há leituras divergentes aguardando confirmação"""
+        return bool(self._pending)
+
+    def reset(self):
+        self._lo = self._hi = self._ref = None
+        self._pending = []
+
+    def predicted(self, now: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """Intervalo previsto do tempo restante em ``now``"""
+        if not self.locked:
+            return None
+        now = now if now is not None else time.monotonic()
+        elapsed = now - self._ref
+        return self._lo - elapsed, self._hi - elapsed
+
+    def completion_at(self) -> Optional[Tuple[float, float]]:
+        """Instante previsto (monotônico) da conclusão e sua incerteza"""
+        if not self.locked:
+            return None
+        return self._ref + (self._lo + self._hi) / 2, (self._hi - self._lo) / 2
+
+    def _anchor(self, remaining: float, now: float):
+        self._lo = max(0.0, remaining - self.tolerance)
+        self._hi = remaining + self.tolerance
+        self._ref = now
+        self._pending = []
+
+    def observe(
+        self,
+        remaining: Optional[float],
+        confidence: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> str:
+        """Incorpora uma leitura; retorna ACCEPTED, REJECTED ou LOW_CONFIDENCE"""
+        if remaining is None or (confidence is not None and confidence < self.min_confidence):
+            self.low_confidence += 1
+            return LOW_CONFIDENCE
+
+        now = now if now is not None else time.monotonic()
+        predicted = self.predicted(now)
+        if predicted is not None and predicted[1] < -self.stale_after:
+            # A conclusão prevista já passou há tempo: o modelo está velho
+            logger.debug("Modelo do countdown expirado - reancorando")
+            self.reset()
+            predicted = None
+
+        if predicted is None:
+            self._anchor(remaining, now)
+            self.accepted += 1
+            return ACCEPTED
+
+        lo = max(predicted[0], remaining - self.tolerance)
+        hi = min(predicted[1], remaining + self.tolerance)
+        if lo <= hi:
+            self._lo, self._hi, self._ref = lo, hi, now
+            self._pending = []
+            self.accepted += 1
+            return ACCEPTED
+
+        # Divergente: só aceita se as últimas leituras divergentes concordam entre si
+        self._pending = [
+            (value, at)
+            for value, at in self._pending
+            if abs((value - (now - at)) - remaining) <= 2 * self.tolerance
+        ]
+        self._pending.append((remaining, now))
+        if len(self._pending) >= self.confirmations:
+            logger.info(
+                f"Countdown reiniciado: {remaining}s (previsto {predicted[0]:.0f}-{predicted[1]:.0f}s)"
+            )
+            self._anchor(remaining, now)
+            self.accepted += 1
+            return ACCEPTED
+
+        self.rejected += 1
+        logger.debug(
+            f"Leitura do countdown rejeitada: {remaining}s "
+            f"(previsto {predicted[0]:.1f}-{predicted[1]:.1f}s)"
+        )
+        return REJECTED
+
+
+class CaptureScheduler:
+    """
+    Ritmo de captura guiado pelo countdown do takt.
+
+    Usa o ``CountdownTracker`` para prever o instante de ``00:00:00`` e
+    dorme até uma rajada de capturas na taxa máxima em volta dele (de
+    ``burst_lead`` segundos antes até ``burst_tail`` depois, mais a incerteza
+    do modelo). Fora da rajada, a espera é limitada a ``max_interval`` para a
+    tela continuar sendo confirmada. Sem modelo, usa ``default_interval``.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 0.1,
+        max_interval: float = 5.0,
+        burst_lead: float = 2.0,
+        burst_tail: float = 2.0,
+        default_interval: float = 0.5,
+        tracker: Optional[CountdownTracker] = None,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.burst_lead = burst_lead
+        self.burst_tail = burst_tail
+        self.default_interval = default_interval
+        self.tracker = tracker or CountdownTracker()
+        self.last_delay = min_interval
+
+    def observe(
+        self,
+        remaining: Optional[float],
+        confidence: Optional[float] = None,
+        now: Optional[float] = None,
+    ) -> str:
+        """Registra a leitura do countdown (ver ``CountdownTracker.observe``)"""
+        return self.tracker.observe(remaining, confidence, now)
+
+    def reset(self):
+        """Esquece o modelo atual (ex.: takt concluído, countdown reinicia)"""
+        self.tracker.reset()
+
+    def next_delay(self, now: Optional[float] = None) -> float:
+        """Quanto esperar até a próxima captura"""
+        now = now if now is not None else time.monotonic()
+        completion = self.tracker.completion_at()
+
+        if self.tracker.confirming:
+            # Leitura divergente: confirma logo com o próximo frame
+            delay = self.min_interval
+        elif completion is None:
+            delay = self.default_interval
+        else:
+            completion_at, uncertainty = completion
+            burst_start = completion_at - self.burst_lead - uncertainty
+            burst_end = completion_at + self.burst_tail + uncertainty
+            if now < burst_start:
+                delay = min(self.max_interval, burst_start - now)
+            elif now <= burst_end:
+                delay = self.min_interval
+            else:
+                # Rajada terminou sem ver 00:00:00: volta ao ritmo padrão
+                logger.debug("Conclusão prevista não observada - descartando modelo")
+                self.tracker.reset()
+                delay = self.default_interval
+
+        self.last_delay = max(self.min_interval, delay)
+        return self.last_delay
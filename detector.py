@@ -0,0 +1,375 @@
+import glob
+import logging
+import math
+import os
+from typing import List, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONF = 0.15
+DEFAULT_IOU = 0.7
+
+
+def _sort_boxes(boxes: List) -> List:
+    """Ordena caixas [x1, y1, x2, y2, conf] pela confiança (maior primeiro)"""
+    return sorted(boxes, key=lambda box: box[4], reverse=True)
+
+
+def _batch_sizes(frames: Sequence, imgsz: Union[int, Sequence[int]]) -> List[int]:
+    """Um tamanho de entrada por frame (``imgsz`` único ou lista)"""
+    if isinstance(imgsz, int):
+        return [imgsz] * len(frames)
+    return list(imgsz)
+
+
+def letterbox(frame, imgsz: int):
+    """
+    Redimensiona o frame BGR para a entrada do YOLO exportado.
+
+    Retorna (tensor NCHW float32 RGB, escala, padding esquerdo, padding superior).
+    """
+    h, w = frame.shape[:2]
+    ratio = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    # Padding mínimo até múltiplo de 32 (mesmo comportamento "rect" do ultralytics)
+    pad_w = int(math.ceil(new_w / 32) * 32) - new_w
+    pad_h = int(math.ceil(new_h / 32) * 32) - new_h
+    left, top = pad_w // 2, pad_h // 2
+
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    padded = cv2.copyMakeBorder(
+        resized,
+        top,
+        pad_h - top,
+        left,
+        pad_w - left,
+        cv2.BORDER_CONSTANT,
+        value=(114, 114, 114),
+    )
+    tensor = cv2.dnn.blobFromImage(padded, 1 / 255.0, swapRB=True)
+    return tensor, ratio, left, top
+
+
+class TorchDetector:
+    """Detector YOLO via ultralytics/PyTorch (backend original)"""
+
+    name = "torch"
+
+    def __init__(self, model_path: str, conf: float = DEFAULT_CONF):
+        from ultralytics import YOLO
+
+        self.model_path = model_path
+        self.conf = conf
+        self._model = YOLO(model_path)
+
+    def predict(self, frame, imgsz: int = 640) -> List:
+        """Retorna as caixas [x1, y1, x2, y2, conf], ordenadas pela confiança"""
+        results = self._model.predict(
+            source=frame,
+            stream=False,
+            conf=self.conf,
+            verbose=False,
+            imgsz=imgsz,
+        )
+        boxes = [
+            xyxy + [conf]
+            for result in results
+            for xyxy, conf in zip(result.boxes.xyxy.tolist(), result.boxes.conf.tolist())
+        ]
+        return _sort_boxes(boxes)
+
+    def predict_batch(self, frames: Sequence, imgsz: Union[int, Sequence[int]] = 640) -> List[List]:
+        """
+        Caixas de vários frames numa única chamada ao modelo.
+
+        O ultralytics aplica um só ``imgsz`` ao lote: com tamanhos diferentes,
+        cada frame é reduzido à escala do seu ``imgsz`` e colado no canto de
+        um canvas comum (completado com cinza), e o lote roda no maior tamanho.
+        As caixas voltam para a escala original de cada frame.
+        """
+        sizes = _batch_sizes(frames, imgsz)
+        if not frames:
+            return []
+        if len(set(sizes)) == 1:
+            sources, ratios, batch_imgsz = list(frames), [1.0] * len(frames), sizes[0]
+        else:
+            batch_imgsz = max(sizes)
+            scaled, ratios = [], []
+            for frame, size in zip(frames, sizes):
+                h, w = frame.shape[:2]
+                ratio = size / max(h, w)
+                if ratio != 1.0:
+                    frame = cv2.resize(
+                        frame,
+                        (max(1, int(round(w * ratio))), max(1, int(round(h * ratio)))),
+                        interpolation=cv2.INTER_LINEAR,
+                    )
+                scaled.append(frame)
+                ratios.append(ratio)
+            height = max(image.shape[0] for image in scaled)
+            width = max(image.shape[1] for image in scaled)
+            sources = []
+            for image in scaled:
+                canvas = np.full((height, width, 3), 114, dtype=np.uint8)
+                canvas[: image.shape[0], : image.shape[1]] = image
+                sources.append(canvas)
+
+        results = self._model.predict(
+            source=sources,
+            stream=False,
+            conf=self.conf,
+            verbose=False,
+            imgsz=batch_imgsz,
+        )
+        batch: List[List] = []
+        for frame, ratio, result in zip(frames, ratios, results):
+            h, w = frame.shape[:2]
+            boxes = []
+            for (x1, y1, x2, y2), conf in zip(result.boxes.xyxy.tolist(), result.boxes.conf.tolist()):
+                if x1 / ratio >= w or y1 / ratio >= h:
+                    # Caixa no preenchimento do canvas, fora do frame
+                    continue
+                boxes.append(
+                    [
+                        min(x1 / ratio, w),
+                        min(y1 / ratio, h),
+                        min(x2 / ratio, w),
+                        min(y2 / ratio, h),
+                        conf,
+                    ]
+                )
+            batch.append(_sort_boxes(boxes))
+        return batch
+
+    def warmup(self):
+        dummy_frame = np.zeros((640, 480, 3), dtype=np.uint8)
+        self.predict(dummy_frame)
+
+
+class _ExportedDetector:
+    """
+    Base para modelos YOLO exportados (ONNX/OpenVINO) rodando sem PyTorch.
+
+    Faz o letterbox, a decodificação da saída (1, 4 + classes, N) e o NMS
+    com NumPy/OpenCV.
+    """
+
+    name = "exported"
+
+    def __init__(self, conf: float = DEFAULT_CONF, iou: float = DEFAULT_IOU):
+        self.conf = conf
+        self.iou = iou
+        # Desligado se o modelo não aceitar lote (ex.: variante com batch fixo em 1)
+        self._batching = True
+
+    def _infer(self, tensor: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict(self, frame, imgsz: int = 640) -> List:
+        """Retorna as caixas [x1, y1, x2, y2, conf], ordenadas pela confiança"""
+        tensor, ratio, left, top = letterbox(frame, imgsz)
+        return self._decode(self._infer(tensor)[0], ratio, left, top, frame.shape)
+
+    def predict_batch(self, frames: Sequence, imgsz: Union[int, Sequence[int]] = 640) -> List[List]:
+        """
+        Caixas de vários frames numa única inferência.
+
+        Cada frame é redimensionado com o seu ``imgsz`` e completado à direita e
+        embaixo até o maior tamanho do lote, então as coordenadas de cada um
+        continuam válidas na decodificação.
+        """
+        sizes = _batch_sizes(frames, imgsz)
+        if len(frames) < 2 or not self._batching:
+            return [self.predict(frame, size) for frame, size in zip(frames, sizes)]
+
+        letterboxed = [letterbox(frame, size) for frame, size in zip(frames, sizes)]
+        height = max(tensor.shape[2] for tensor, _, _, _ in letterboxed)
+        width = max(tensor.shape[3] for tensor, _, _, _ in letterboxed)
+        batch = np.full((len(frames), 3, height, width), 114 / 255.0, dtype=np.float32)
+        for index, (tensor, _, _, _) in enumerate(letterboxed):
+            batch[index, :, : tensor.shape[2], : tensor.shape[3]] = tensor[0]
+
+        try:
+            output = self._infer(batch)
+        except Exception as e:
+            logger.warning(f"Modelo {self.name} sem suporte a lote, inferindo um frame por vez: {e}")
+            self._batching = False
+            return [self.predict(frame, size) for frame, size in zip(frames, sizes)]
+
+        return [
+            self._decode(output[index], ratio, left, top, frame.shape)
+            for index, (frame, (_, ratio, left, top)) in enumerate(zip(frames, letterboxed))
+        ]
+
+    def _decode(self, output: np.ndarray, ratio: float, left: int, top: int, shape) -> List:
+        """Saída (4 + classes, N) de um frame → caixas na escala original"""
+        predictions = output.T  # (N, 4 + classes)
+        scores = predictions[:, 4:].max(axis=1)
+        mask = scores >= self.conf
+        if not mask.any():
+            return []
+
+        predictions, scores = predictions[mask], scores[mask]
+        cx, cy, bw, bh = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+        x1 = (cx - bw / 2 - left) / ratio
+        y1 = (cy - bh / 2 - top) / ratio
+        widths, heights = bw / ratio, bh / ratio
+
+        rects = np.stack([x1, y1, widths, heights], axis=1)
+        keep = cv2.dnn.NMSBoxes(rects.tolist(), scores.tolist(), self.conf, self.iou)
+
+        h, w = shape[:2]
+        boxes = []
+        for index in np.array(keep).flatten():
+            bx, by, bw_, bh_ = rects[index]
+            boxes.append(
+                [
+                    float(max(bx, 0)),
+                    float(max(by, 0)),
+                    float(min(bx + bw_, w)),
+                    float(min(by + bh_, h)),
+                    float(scores[index]),
+                ]
+            )
+        return _sort_boxes(boxes)
+
+    def warmup(self):
+        dummy_frame = np.zeros((640, 480, 3), dtype=np.uint8)
+        self.predict(dummy_frame)
+
+
+class OnnxDetector(_ExportedDetector):
+    """Detector YOLO exportado para ONNX, rodando no ONNX Runtime (CPU)"""
+
+    name = "onnx"
+
+    def __init__(self, onnx_path: str, threads: Optional[int] = None, **kwargs):
+        super().__init__(**kwargs)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            onnx_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_name = self._session.get_inputs()[0].name
+        self.model_path = onnx_path
+
+    def _infer(self, tensor: np.ndarray) -> np.ndarray:
+        return self._session.run(None, {self._input_name: tensor})[0]
+
+
+class OpenVINODetector(_ExportedDetector):
+    """Detector YOLO exportado para OpenVINO IR (CPU)"""
+
+    name = "openvino"
+
+    def __init__(self, model_dir: str, threads: Optional[int] = None, **kwargs):
+        super().__init__(**kwargs)
+        import openvino as ov
+
+        xml_files = glob.glob(os.path.join(model_dir, "*.xml"))
+        if not xml_files:
+            raise FileNotFoundError(f"Modelo OpenVINO (.xml) não encontrado em {model_dir}")
+
+        config = {"INFERENCE_NUM_THREADS": threads} if threads else {}
+        core = ov.Core()
+        self._compiled = core.compile_model(xml_files[0], "CPU", config)
+        self._output = self._compiled.output(0)
+        self.model_path = xml_files[0]
+
+    def _infer(self, tensor: np.ndarray) -> np.ndarray:
+        return self._compiled([tensor])[self._output]
+
+
+def exported_model_path(model_path: str, fmt: str) -> str:
+    """Caminho do modelo exportado, ao lado do .pt"""
+    base = os.path.splitext(model_path)[0]
+    if fmt == "onnx":
+        return f"{base}.onnx"
+    return f"{base}_openvino_model"
+
+
+def export_model(model_path: str, fmt: str) -> str:
+    """
+    Exporta o .pt para ONNX/OpenVINO uma única vez.
+
+    A exportação fica em cache ao lado do modelo e só é refeita se o .pt for
+    mais novo que ela.
+    """
+    target = exported_model_path(model_path, fmt)
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(model_path):
+        logger.info(f"Usando modelo exportado em cache: {target}")
+        return target
+
+    logger.info(f"Exportando {model_path} para {fmt} (apenas na primeira execução)...")
+    from ultralytics import YOLO
+
+    exported = YOLO(model_path).export(format=fmt, dynamic=True, imgsz=640)
+    logger.info(f"Modelo exportado: {exported}")
+    return str(exported)
+
+
+DETECTOR_BACKENDS = {
+    "onnx": OnnxDetector,
+    "openvino": OpenVINODetector,
+}
+
+
+def _variant_detector_cls(variant_path: str):
+    if os.path.isdir(variant_path):
+        return OpenVINODetector
+    return OnnxDetector
+
+
+def create_detector(
+    model_path: str,
+    backend: str = "torch",
+    threads: Optional[int] = None,
+    conf: float = DEFAULT_CONF,
+    variant_path: Optional[str] = None,
+):
+    """
+    Cria o detector do backend configurado.
+
+    ``variant_path`` aponta para uma variante gerada por
+    ``scripts/model_variants.py`` (.onnx ou pasta OpenVINO) e é usada no lugar
+    da exportação padrão. Backends exportados (onnx/openvino) caem para o
+    PyTorch se o runtime não estiver instalado ou a exportação falhar.
+    """
+    if variant_path:
+        try:
+            detector = _variant_detector_cls(variant_path)(
+                variant_path, threads=threads, conf=conf
+            )
+            logger.info(f"Backend de inferência: {detector.name} (variante {variant_path})")
+            return detector
+        except Exception as e:
+            logger.warning(
+                f"Variante de modelo '{variant_path}' indisponível: {e}", exc_info=True
+            )
+
+    detector_cls = DETECTOR_BACKENDS.get(backend)
+    if detector_cls is not None:
+        try:
+            exported = export_model(model_path, backend)
+            detector = detector_cls(exported, threads=threads, conf=conf)
+            logger.info(f"Backend de inferência: {detector.name} ({exported})")
+            return detector
+        except Exception as e:
+            logger.warning(
+                f"Backend de inferência '{backend}' indisponível, usando PyTorch: {e}",
+                exc_info=True,
+            )
+    elif backend != "torch":
+        logger.warning(f"Backend de inferência desconhecido: {backend}, usando PyTorch")
+
+    detector = TorchDetector(model_path, conf=conf)
+    logger.info("Backend de inferência: torch")
+    return detector
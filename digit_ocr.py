@@ -0,0 +1,204 @@
+import logging
+import os
+import re
+import threading
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+DIGITS = "0123456789"
+TEMPLATE_SIZE = (16, 24)  # (largura, altura)
+COUNTDOWN_PATTERN = re.compile(r"^\d{2}:\d{2}:\d{2}$")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Centraliza e normaliza vetores para correlação por produto interno"""
+    vectors = vectors - vectors.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _glyph_vector(glyph: np.ndarray) -> np.ndarray:
+    """Redimensiona um glifo (bool/uint8) para o tamanho do template"""
+    glyph = glyph.astype(np.uint8) * 255 if glyph.dtype == bool else glyph
+    resized = cv2.resize(glyph, TEMPLATE_SIZE, interpolation=cv2.INTER_AREA)
+    return resized.astype(np.float32).ravel()
+
+
+def _crop_to_content(mask: np.ndarray) -> Optional[np.ndarray]:
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0 or cols.size == 0:
+        return None
+    return mask[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+
+
+def render_digit_templates() -> np.ndarray:
+    """Gera templates dos dígitos 0-9 com a fonte Hershey do OpenCV"""
+    vectors = []
+    for digit in DIGITS:
+        canvas = np.zeros((96, 96), dtype=np.uint8)
+        cv2.putText(
+            canvas, digit, (16, 72), cv2.FONT_HERSHEY_SIMPLEX, 2.4, 255, 6, cv2.LINE_AA
+        )
+        glyph = _crop_to_content(canvas > 127)
+        vectors.append(_glyph_vector(glyph))
+    return np.stack(vectors)
+
+
+def load_digit_templates(templates_dir: str) -> np.ndarray:
+    """
+    Carrega templates gravados a partir de ROIs reais.
+
+    Espera arquivos ``0.png`` ... ``9.png`` com o dígito em branco sobre fundo
+    preto (mesmo formato do glifo segmentado).
+    """
+    vectors = []
+    for digit in DIGITS:
+        path = os.path.join(templates_dir, f"{digit}.png")
+        image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            raise FileNotFoundError(f"Template não encontrado: {path}")
+        glyph = _crop_to_content(image > 127)
+        if glyph is None:
+            raise ValueError(f"Template vazio: {path}")
+        vectors.append(_glyph_vector(glyph))
+    return np.stack(vectors)
+
+
+class DigitTemplateRecognizer:
+    """
+    Reconhecedor rápido do padrão HH:MM:SS por correlação com templates.
+
+    Segmenta a ROI binarizada (saída de ``preprocess_for_ocr``) em caracteres
+    pela projeção das colunas, identifica os dois-pontos pela forma (mais
+    baixos ou com dois blocos separados) e compara todos os dígitos contra os
+    templates de uma vez com um único produto de matrizes.
+    """
+
+    def __init__(self, templates_dir: Optional[str] = None):
+        if templates_dir:
+            templates = load_digit_templates(templates_dir)
+        else:
+            templates = render_digit_templates()
+        self._templates = _normalize(templates)
+
+    def _foreground(self, binary: np.ndarray) -> np.ndarray:
+        """Máscara do texto; o fundo é a cor dominante na borda da ROI"""
+        border = np.concatenate([binary[0], binary[-1], binary[:, 0], binary[:, -1]])
+        mask = binary < 128 if border.mean() > 127 else binary >= 128
+
+        # Remove linhas/colunas quase cheias (bordas da janela do timer)
+        mask = mask.copy()
+        mask[mask.mean(axis=1) > 0.8, :] = False
+        mask[:, mask.mean(axis=0) > 0.9] = False
+        return mask
+
+    def _segment(self, mask: np.ndarray) -> List[np.ndarray]:
+        columns = np.concatenate([[False], mask.any(axis=0), [False]])
+        edges = np.diff(columns.astype(np.int8))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+
+        glyphs = []
+        for start, end in zip(starts, ends):
+            glyph = _crop_to_content(mask[:, start:end])
+            if glyph is not None:
+                glyphs.append(glyph)
+        return glyphs
+
+    def _is_colon(self, glyph: np.ndarray, line_height: int) -> bool:
+        """Dois-pontos: mais baixo que os dígitos ou com uma faixa vazia no meio"""
+        if glyph.shape[0] < 0.75 * line_height:
+            return True
+        return not glyph.any(axis=1).all()
+
+    def recognize(self, binary: np.ndarray) -> Tuple[str, float]:
+        """Retorna (texto, confiança) para a ROI binarizada"""
+        if binary.ndim == 3:
+            binary = cv2.cvtColor(binary, cv2.COLOR_BGR2GRAY)
+
+        glyphs = self._segment(self._foreground(binary))
+        if not glyphs:
+            return "", 0.0
+
+        line_height = max(glyph.shape[0] for glyph in glyphs)
+        # Descarta ruído muito pequeno
+        glyphs = [g for g in glyphs if g.shape[0] >= 0.25 * line_height]
+
+        is_colon = [self._is_colon(glyph, line_height) for glyph in glyphs]
+        digit_glyphs = [g for g, colon in zip(glyphs, is_colon) if not colon]
+        if not digit_glyphs:
+            return "", 0.0
+
+        vectors = _normalize(np.stack([_glyph_vector(g) for g in digit_glyphs]))
+        scores = vectors @ self._templates.T
+        best = scores.argmax(axis=1)
+        confidence = float(scores.max(axis=1).min())
+
+        digits = iter(DIGITS[index] for index in best)
+        text = "".join(":" if colon else next(digits) for colon in is_colon)
+        return text, confidence
+
+
+class TemplateFastPathEngine:
+    """
+    Engine de OCR com caminho rápido por templates.
+
+    Usa o ``DigitTemplateRecognizer`` quando o resultado tem o formato
+    HH:MM:SS com confiança suficiente; caso contrário delega para o engine
+    Tesseract recebido em ``fallback``.
+    """
+
+    name = "template"
+
+    def __init__(
+        self,
+        fallback,
+        min_confidence: float = 0.75,
+        templates_dir: Optional[str] = None,
+    ):
+        self._fallback = fallback
+        self._recognizer = DigitTemplateRecognizer(templates_dir)
+        self.min_confidence = min_confidence
+        self.name = f"template+{fallback.name}"
+
+        self._lock = threading.Lock()
+        self.fast_hits = 0
+        self.fallbacks = 0
+
+    def _fast_path(self, image) -> Optional[Tuple[str, float]]:
+        text, confidence = self._recognizer.recognize(image)
+        if confidence >= self.min_confidence and COUNTDOWN_PATTERN.match(text):
+            with self._lock:
+                self.fast_hits += 1
+            return text, confidence
+
+        with self._lock:
+            self.fallbacks += 1
+        logger.debug(
+            f"Template OCR com baixa confiança ('{text}', {confidence:.2f}) - usando Tesseract"
+        )
+        return None
+
+    def recognize(self, image) -> str:
+        """Reconhece o texto, usando Tesseract só quando a confiança é baixa"""
+        result = self._fast_path(image)
+        if result is not None:
+            return result[0]
+        return self._fallback.recognize(image)
+
+    def recognize_with_confidence(self, image) -> Tuple[str, float]:
+        """Como ``recognize``, retornando também a confiança (0-1)"""
+        result = self._fast_path(image)
+        if result is not None:
+            return result
+        return self._fallback.recognize_with_confidence(image)
+
+    def close(self):
+        self._fallback.close()
@@ -0,0 +1,113 @@
+import logging
+import threading
+from typing import Callable, List, Optional
+
+import cv2
+import numpy as np
+
+from capture import CapturedFrame
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class GateEntry:
+    """Última decisão do pipeline e a assinatura do frame que a gerou"""
+
+    def __init__(self, offset, shape, signature: List, boxes: List, extracted: Optional[dict]):
+        self.offset = offset
+        self.shape = shape
+        self.signature = signature
+        self.boxes = boxes
+        self.extracted = extracted
+
+
+class FrameChangeGate:
+    """
+    Detector de mudança barato, aplicado antes do YOLO.
+
+    Compara miniaturas em escala de cinza das últimas ROIs (ou da tela inteira,
+    quando não houve detecção) pela diferença absoluta média. Se nada mudou
+    acima de ``threshold``, o YOLO e o OCR são pulados e a última decisão é
+    reutilizada. Após ``max_consecutive_skips`` frames pulados seguidos, o
+    pipeline completo roda de novo.
+    """
+
+    def __init__(
+        self,
+        roi_fn: Callable,
+        threshold: float = 1.5,
+        thumb_size=(64, 16),
+        frame_thumb_size=(160, 90),
+        max_consecutive_skips: int = 10,
+    ):
+        self._roi_fn = roi_fn
+        self.threshold = threshold
+        self.thumb_size = thumb_size
+        self.frame_thumb_size = frame_thumb_size
+        self.max_consecutive_skips = max_consecutive_skips
+
+        self._entry: Optional[GateEntry] = None
+        self._consecutive_skips = 0
+        self._lock = threading.Lock()
+
+        self.checks = 0
+        self.skips = 0
+
+    @property
+    def skip_ratio(self) -> float:
+        """Fração dos frames verificados em que YOLO e OCR foram pulados"""
+        return self.skips / self.checks if self.checks else 0.0
+
+    def _thumbnail(self, image, size):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def _signature(self, image, boxes: List) -> List:
+        if len(boxes) == 0:
+            return [self._thumbnail(image, self.frame_thumb_size)]
+
+        signature = []
+        for box in boxes:
+            roi = self._roi_fn(image, box)
+            if roi is None or roi.size == 0:
+                continue
+            signature.append(self._thumbnail(roi, self.thumb_size))
+        return signature
+
+    def check(self, frame: CapturedFrame) -> Optional[GateEntry]:
+        """Retorna a última decisão se o frame não mudou, ou None"""
+        with self._lock:
+            entry = self._entry
+            self.checks += 1
+
+            if entry is None or self._consecutive_skips >= self.max_consecutive_skips:
+                return None
+            if entry.offset != frame.offset or entry.shape != frame.image.shape:
+                return None
+
+            signature = self._signature(frame.image, entry.boxes)
+            if len(signature) != len(entry.signature):
+                return None
+            for current, previous in zip(signature, entry.signature):
+                if np.abs(current - previous).mean() > self.threshold:
+                    return None
+
+            self._consecutive_skips += 1
+            self.skips += 1
+            return entry
+
+    def invalidate(self):
+        """Descarta a última decisão: o próximo frame passa pelo pipeline completo"""
+        with self._lock:
+            self._entry = None
+
+    def update(self, frame: CapturedFrame, boxes: List, extracted: Optional[dict]):
+        """Registra a decisão tomada pelo pipeline completo para o frame"""
+        signature = self._signature(frame.image, boxes)
+        entry = GateEntry(
+            frame.offset, frame.image.shape, signature, list(boxes), extracted
+        )
+        with self._lock:
+            self._entry = entry
+            self._consecutive_skips = 0
@@ -0,0 +1,337 @@
+"""
+Rastreador sem interface (serviço): roda ``main.main()`` com o MQTTManager
+direto, sem importar PyQt5. Pensado para thin clients, containers e systemd
+(uma instância por célula).
+
+Uso:
+    python headless.py [--device-id cost-1-2] [--health-port 8080]
+
+Configuração do ``config/config.json`` (ou do arquivo em ``TAKT_CONFIG_PATH``),
+com sobrescrita por variáveis de ambiente: ``TAKT_DEVICE_ID``,
+``TAKT_MQTT_HOST``, ``TAKT_MQTT_PORT``, ``TAKT_MQTT_USER``, ``TAKT_MQTT_PASS``,
+``TAKT_HEALTH_PORT`` e ``TAKT_HEALTH_HOST``. O ``/health`` escuta só em
+127.0.0.1; expor na rede (ex.: probe de container) é opt-in com
+``health_host: "0.0.0.0"``.
+
+SIGTERM/SIGINT encerram o rastreador de forma limpa (spool fechado, MQTT
+desconectado). Com ``NOTIFY_SOCKET`` (``Type=notify`` no systemd) envia
+READY/STOPPING e, com ``WatchdogSec``, o WATCHDOG enquanto estiver saudável.
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import os
+import re
+import signal
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from logging_setup import load_logging_options, setup_logging
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.getenv("TAKT_CONFIG_PATH") or os.path.join(PROJECT_ROOT, "config", "config.json")
+LOGS_DIR = os.path.join(PROJECT_ROOT, "logs")
+
+logger = logging.getLogger("headless")
+
+
+def read_config(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def device_id_from_config(cfg: dict) -> str:
+    """Mesmo id da interface: ``cost-<fábrica>-<célula>`` (só dígitos)"""
+    device = cfg.get("device", {})
+    factory_num = re.sub(r"\D", "", device.get("factory", "").strip()) or "0"
+    cell_num = re.sub(r"\D", "", device.get("cell_number", "").strip()) or "0"
+    return f"cost-{factory_num}-{cell_num}"
+
+
+def sd_notify(state: str):
+    """Notificação ao systemd (sem dependência de python-systemd)"""
+    address = os.getenv("NOTIFY_SOCKET")
+    if not address:
+        return
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(state.encode(), address)
+    except OSError as e:
+        logger.debug(f"sd_notify falhou: {e}")
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class HealthState:
+    """
+    Saúde do rastreador a partir dos eventos do ``main.main()``.
+
+    O evento ``metrics`` sai do loop de detecção a cada ``metrics_interval``
+    segundos; sem ele por ``stale_after`` segundos o loop é considerado travado.
+    Com várias estações, ``devices`` traz o ESP32 e os takts de cada uma.
+    """
+
+    def __init__(
+        self,
+        connection,
+        device_id: str,
+        stale_after: float,
+        device_ids: Optional[List[str]] = None,
+    ):
+        self.connection = connection
+        self.device_id = device_id
+        self.device_ids = list(device_ids or [device_id])
+        self.stale_after = stale_after
+        self.started_at = time.monotonic()
+        self.last_loop_at: Optional[float] = None
+        self.last_event: Optional[str] = None
+        self.takts = 0
+        self.takts_by_device: Dict[str, int] = {}
+        self.errors = 0
+        self.running = False
+        self._lock = threading.Lock()
+
+    def on_event(self, event_name: str, payload: dict):
+        with self._lock:
+            self.last_event = event_name
+            if event_name in ("metrics", "model_loaded"):
+                self.last_loop_at = time.monotonic()
+            elif event_name == "message_sent":
+                self.takts += 1
+                sent_to = payload.get("id") if isinstance(payload, dict) else None
+                if sent_to:
+                    self.takts_by_device[sent_to] = self.takts_by_device.get(sent_to, 0) + 1
+            elif event_name in ("message_error", "runtime_error"):
+                self.errors += 1
+
+        if event_name in ("message_error", "runtime_error", "connection_error", "model_missing"):
+            logger.warning(f"Evento {event_name}: {payload}")
+        elif event_name not in ("metrics", "takt_screen_detected"):
+            logger.info(f"Evento {event_name}: {payload}")
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            loop_age = None if self.last_loop_at is None else now - self.last_loop_at
+            broker = self.connection.is_connected()
+            device_status = self.connection.device_status
+            devices = {
+                device: {
+                    "connected": device_status.get(device, False),
+                    "takts_sent": self.takts_by_device.get(device, 0),
+                }
+                for device in self.device_ids
+            }
+            healthy = (
+                self.running
+                and broker
+                and loop_age is not None
+                and loop_age <= self.stale_after
+            )
+            return {
+                "status": "ok" if healthy else "unhealthy",
+                "device_id": self.device_id,
+                "broker_connected": broker,
+                "device_connected": all(entry["connected"] for entry in devices.values()),
+                "devices": devices,
+                "loop_age_s": None if loop_age is None else round(loop_age, 1),
+                "uptime_s": round(now - self.started_at, 1),
+                "takts_sent": self.takts,
+                "errors": self.errors,
+                "last_event": self.last_event,
+                "rss_bytes": _rss_bytes(),
+            }
+
+    def healthy(self) -> bool:
+        return self.snapshot()["status"] == "ok"
+
+
+def start_health_server(health: HealthState, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Endpoint ``/health``: 200 se saudável, 503 caso contrário (JSON nos dois)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/health"):
+                self.send_error(404)
+                return
+            snapshot = health.snapshot()
+            body = json.dumps(snapshot).encode("utf-8")
+            self.send_response(200 if snapshot["status"] == "ok" else 503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"health http: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    thread = threading.Thread(target=server.serve_forever, name="takt-health-http", daemon=True)
+    thread.start()
+    logger.info(f"🩺 Health check em http://{host}:{port}/health")
+    return server
+
+
+async def watchdog(health: HealthState, interval: float):
+    """WATCHDOG=1 só enquanto saudável: o systemd reinicia o serviço travado"""
+    while True:
+        await asyncio.sleep(interval)
+        if health.healthy():
+            sd_notify("WATCHDOG=1")
+
+
+async def run(args, cfg: dict, device_id: str) -> int:
+    # Import aqui: o logging do serviço já está configurado (setup_logging é idempotente)
+    import main as tracker
+    from mqtt_manager import AsyncMQTTManager, MQTTManager
+    from stations import parse_stations
+
+    tech_config = cfg.get("tech", {})
+    mqtt_host = os.getenv("TAKT_MQTT_HOST") or tech_config.get("mqtt_host", "")
+    mqtt_port = int(os.getenv("TAKT_MQTT_PORT") or tech_config.get("mqtt_port", 1883))
+    mqtt_user = os.getenv("TAKT_MQTT_USER") or tech_config.get("mqtt_user", "")
+    mqtt_pass = os.getenv("TAKT_MQTT_PASS") or tech_config.get("mqtt_pass", "")
+    if not mqtt_host:
+        logger.error("mqtt_host não configurado (config.json ou TAKT_MQTT_HOST)")
+        return 2
+
+    mqtt_client = tech_config.get("mqtt_client", "thread")
+    manager_cls = AsyncMQTTManager if mqtt_client == "asyncio" else MQTTManager
+    mqtt_manager = manager_cls(
+        broker=mqtt_host,
+        port=mqtt_port,
+        username=mqtt_user,
+        password=mqtt_pass,
+        timeout_seconds=60,
+        wildcard_subscriptions=tech_config.get("mqtt_wildcard_subscriptions"),
+    )
+    # Com "stations" no config, o rastreador atende os ESP32 de cada estação
+    device_ids = [station.device_id for station in parse_stations(tracker.STATIONS)] or [device_id]
+    for station_device in device_ids:
+        mqtt_manager.add_device(station_device)
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: sem add_signal_handler no loop
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+
+    health = HealthState(
+        mqtt_manager,
+        device_id,
+        stale_after=max(30.0, 3 * tracker.METRICS_INTERVAL),
+        device_ids=device_ids,
+    )
+    health_server = None
+    if args.health_port:
+        try:
+            health_server = start_health_server(health, args.health_port, args.health_host)
+        except OSError as e:
+            logger.warning(f"Health check indisponível na porta {args.health_port}: {e}")
+
+    tasks = []
+    try:
+        connected = mqtt_manager.connect(timeout=10)
+        if inspect.isawaitable(connected):
+            connected = await connected
+        if not connected:
+            # Sai com erro: o supervisor (systemd Restart=, container) tenta de novo
+            logger.error(f"Falha ao conectar ao broker MQTT {mqtt_host}:{mqtt_port}")
+            return 1
+        logger.info(f"Conexão MQTT estabelecida: {mqtt_host}:{mqtt_port} ({mqtt_client})")
+
+        health.running = True
+        tracker_task = asyncio.create_task(
+            tracker.main(on_event=health.on_event, connection=mqtt_manager, device_id=device_id)
+        )
+        stop_task = asyncio.create_task(stop.wait())
+        tasks = [tracker_task, stop_task]
+
+        watchdog_usec = int(os.getenv("WATCHDOG_USEC", "0") or 0)
+        if watchdog_usec:
+            tasks.append(asyncio.create_task(watchdog(health, watchdog_usec / 2e6)))
+        sd_notify(f"READY=1\nSTATUS=Rastreando {', '.join(device_ids)}")
+
+        await asyncio.wait([tracker_task, stop_task], return_when=asyncio.FIRST_COMPLETED)
+        if stop.is_set():
+            logger.info("Sinal de parada recebido - encerrando rastreador")
+            sd_notify("STOPPING=1")
+            return 0
+        # main() só retorna sozinho em erro de inicialização (ex.: modelo ausente)
+        logger.error("Rastreador terminou inesperadamente")
+        return 1
+    finally:
+        health.running = False
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"Erro ao encerrar tarefa: {e}", exc_info=True)
+        mqtt_manager.disconnect()
+        if health_server is not None:
+            health_server.shutdown()
+            health_server.server_close()
+
+
+def main() -> int:
+    cfg = read_config(CONFIG_PATH)
+    parser = argparse.ArgumentParser(description="Rastreador de takt sem interface")
+    parser.add_argument(
+        "--device-id",
+        default=os.getenv("TAKT_DEVICE_ID") or device_id_from_config(cfg),
+        help="Id do ESP32 da célula (padrão: derivado de factory/cell_number)",
+    )
+    parser.add_argument(
+        "--health-port",
+        type=int,
+        default=int(os.getenv("TAKT_HEALTH_PORT") or cfg.get("tech", {}).get("health_port", 8080)),
+        help="Porta do endpoint /health (0 = desligado)",
+    )
+    parser.add_argument(
+        "--health-host",
+        default=os.getenv("TAKT_HEALTH_HOST") or cfg.get("tech", {}).get("health_host", "127.0.0.1"),
+        help="Interface do /health (padrão: só local; 0.0.0.0 expõe na rede, sem autenticação)",
+    )
+    args = parser.parse_args()
+
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    setup_logging(
+        os.path.join(LOGS_DIR, f"headless_{args.device_id}.log"),
+        **load_logging_options(CONFIG_PATH),
+    )
+    logger.info(f"Iniciando rastreador headless: {args.device_id} (config: {CONFIG_PATH})")
+
+    try:
+        return asyncio.run(run(args, cfg, args.device_id))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
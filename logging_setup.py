@@ -0,0 +1,123 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita registros repetidos até ``max_level``: no máximo um a cada
+    ``interval`` segundos por linha de código. O próximo registro liberado
+    informa quantos foram suprimidos.
+    """
+
+    def __init__(self, interval: float = 5.0, max_level: int = logging.DEBUG):
+        super().__init__()
+        self.interval = interval
+        self.max_level = max_level
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or self.interval <= 0:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            last_at, suppressed = self._last.get(key, (None, 0))
+            if last_at is not None and now - last_at < self.interval:
+                self._last[key] = (last_at, suppressed + 1)
+                return False
+            self._last[key] = (now, 0)
+
+        if suppressed:
+            record.msg = f"{record.msg} (+{suppressed} suprimidas)"
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enfileira o registro sem formatá-lo: data, formato e escrita em disco
+    rodam na thread do ``QueueListener``, fora do loop de detecção.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve os argumentos agora (objetos mutáveis podem mudar até a escrita)
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def logging_options(tech_config: dict) -> dict:
+    """Opções de log do ``config.json`` (seção ``tech``)"""
+    return {
+        "level": str(tech_config.get("log_level", "DEBUG")).upper(),
+        "debug_interval": float(tech_config.get("log_debug_interval", 5)),
+        "max_bytes": int(tech_config.get("log_max_bytes", 5 * 1024 * 1024)),
+        "backup_count": int(tech_config.get("log_backup_count", 3)),
+    }
+
+
+def load_logging_options(config_path: str) -> dict:
+    """Lê as opções de log direto do arquivo (o logging ainda não está configurado)"""
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            tech_config = json.load(f).get("tech", {})
+    except Exception:
+        tech_config = {}
+    return logging_options(tech_config)
+
+
+def setup_logging(
+    log_path: str,
+    level: str = "DEBUG",
+    debug_interval: float = 5.0,
+    max_bytes: int = 5 * 1024 * 1024,
+    backup_count: int = 3,
+) -> logging.handlers.QueueListener:
+    """
+    Configura o logging assíncrono do processo.
+
+    O root logger só enfileira (``DeferredQueueHandler`` com
+    ``RateLimitFilter``); um ``QueueListener`` escreve no arquivo rotativo e
+    no console. Chamadas seguintes reaproveitam a configuração existente.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        formatter = logging.Formatter(LOG_FORMAT)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        console_handler = logging.StreamHandler()
+        for handler in (file_handler, console_handler):
+            handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(debug_interval))
+
+        root = logging.getLogger()
+        root.setLevel(getattr(logging, level, logging.DEBUG))
+        root.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        _listener.start()
+        # Esvazia a fila antes de o processo terminar
+        atexit.register(_listener.stop)
+        return _listener
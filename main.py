@@ -16,39 +16,46 @@ if getattr(sys, 'frozen', False):
         version_module.__version__ = '9.3.0'
         sys.modules['aio_pika._version'] = version_module
 
-import aio_pika
 import asyncio
-from ultralytics import YOLO
-from PIL import ImageGrab
-import pytesseract
 import cv2
-import numpy as np
+import inspect
 import json
 import logging
+import random
+import sqlite3
 import time
-from typing import Callable, Any, Optional
+from typing import Callable, Any, List, Optional
 from dotenv import load_dotenv
 
+from capture import ScreenCapture, create_capture_backend
+from countdown import REJECTED, CaptureScheduler, CountdownTracker, parse_countdown
+from frame_gate import FrameChangeGate
+from logging_setup import load_logging_options, setup_logging
+from metrics import Metrics, span, start_metrics_server
+from model_registry import detector_options, get_detector
+from ocr import OCRPool, create_ocr_engine
+from pipeline import BatchInferencePipeline, InferencePipeline
+from preprocessing import create_roi_preprocessor
+from spool import TaktSpool
+from stations import Station, parse_stations
+
 load_dotenv()
 
 # Garantir que a pasta de logs existe
 LOGS_DIR = os.path.join(os.path.dirname(__file__), "logs")
 os.makedirs(LOGS_DIR, exist_ok=True)
 
-# Configuração de logging detalhado
-logging.basicConfig(
-    level=logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s",
-    handlers=[logging.FileHandler(os.path.join(LOGS_DIR, "main_debug.log")), logging.StreamHandler()],
-)
+# Carregar configuração do arquivo config.json
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), "config")
+# TAKT_CONFIG_PATH: um arquivo por célula no modo headless (várias instâncias por máquina)
+CONFIG_PATH = os.getenv("TAKT_CONFIG_PATH") or os.path.join(CONFIG_DIR, "config.json")
+
+# Logging assíncrono (fila + arquivo rotativo); nível e limites vêm do config.json
+setup_logging(os.path.join(LOGS_DIR, "main_debug.log"), **load_logging_options(CONFIG_PATH))
 logger = logging.getLogger(__name__)
 
 logging.getLogger("pytesseract").setLevel(logging.WARNING)
 
-# Carregar configuração do arquivo config.json
-CONFIG_DIR = os.path.join(os.path.dirname(__file__), "config")
-CONFIG_PATH = os.path.join(CONFIG_DIR, "config.json")
-
 
 def load_config():
     """Carrega configuração do arquivo JSON"""
@@ -98,19 +105,95 @@ FACTORY_NUMBER = device_config.get("factory")
 DEVICE_ID = f"{FACTORY_NUMBER}-{CELL_NUMBER}"
 ROUTING_KEY = f"takt.device.cost-{DEVICE_ID}"
 
-pytesseract.pytesseract.tesseract_cmd = r"/usr/bin/tesseract"
 MODEL_PATH = tech_config.get("model_path") or "./train_2025.pt"
 
+# Backend de inferência, threads e variante quantizada do detector.
+# Os backends exportados geram o modelo ao lado do .pt na primeira execução
+DETECTOR_OPTIONS = detector_options(tech_config)
+# Tamanho de entrada do YOLO na tela inteira
+INFERENCE_IMGSZ = int(tech_config.get("inference_imgsz", 640))
+
+# Modo de captura: "tracking" captura só a região do takt após a primeira detecção,
+# "full" captura a tela inteira em toda iteração
+CAPTURE_MODE = tech_config.get("capture_mode", "tracking")
+FULL_SCAN_INTERVAL = float(tech_config.get("full_scan_interval", 5))
+# Backend de captura: "auto" (mss com fallback), "mss" ou "pil"
+CAPTURE_BACKEND = tech_config.get("capture_backend", "auto")
+
+# Ritmo de captura guiado pelo countdown: prevê o instante de 00:00:00 e concentra
+# as capturas numa rajada em volta dele
+ADAPTIVE_SCHEDULE = bool(tech_config.get("adaptive_schedule", True))
+SCHEDULE_MAX_INTERVAL = float(tech_config.get("schedule_max_interval", 5))
+SCHEDULE_RAMP_SECONDS = float(tech_config.get("schedule_ramp_seconds", 2))
+# Confiança mínima do OCR para uma leitura entrar no modelo do countdown
+COUNTDOWN_MIN_CONFIDENCE = float(tech_config.get("countdown_min_confidence", 0.5))
+
+# Gate de mudança de frame: pula YOLO/OCR quando a ROI não mudou
+FRAME_GATE_ENABLED = bool(tech_config.get("frame_gate", True))
+FRAME_GATE_THRESHOLD = float(tech_config.get("frame_gate_threshold", 1.5))
 
-def extract_roi(frame, box, pad=5, scale=2):
-    """Extrai ROI da imagem com padding e escala para melhorar OCR."""
-    x1, y1, x2, y2 = map(int, box)
+# Backend de OCR: "auto" (tesserocr com fallback), "tesserocr" ou "pytesseract"
+OCR_BACKEND = tech_config.get("ocr_backend", "auto")
+# Caminho rápido por templates de dígitos antes do Tesseract (opcional)
+OCR_FAST_PATH = bool(tech_config.get("ocr_fast_path", False))
+OCR_FAST_PATH_CONFIDENCE = float(tech_config.get("ocr_fast_path_confidence", 0.75))
+OCR_TEMPLATES_DIR = tech_config.get("ocr_templates_dir") or None
+# Engines de OCR em paralelo quando o YOLO encontra várias caixas
+OCR_WORKERS = int(tech_config.get("ocr_workers", 2))
+# Pré-processamento da ROI: "classic" (2x cúbico + bilateral), "fast" (altura fixa +
+# blur gaussiano) ou "adaptive" (altura fixa + limiar adaptativo)
+OCR_PREPROCESS = tech_config.get("ocr_preprocess", "classic")
+OCR_TARGET_HEIGHT = int(tech_config.get("ocr_target_height", 64))
+ROI_PREPROCESSOR = create_roi_preprocessor(OCR_PREPROCESS, OCR_TARGET_HEIGHT)
+
+# Métricas por estágio: evento "metrics" para a UI a cada METRICS_INTERVAL segundos,
+# arquivo no formato do Prometheus (textfile collector) e endpoint HTTP local opcionais
+METRICS_INTERVAL = float(tech_config.get("metrics_interval", 10))
+METRICS_FILE = tech_config.get("metrics_file") or None
+METRICS_PORT = int(tech_config.get("metrics_port", 0))
+
+# Spool durável dos takts: todo takt é gravado em disco antes do envio e drenado em
+# ordem quando o broker e o ESP32 estão disponíveis, com limite de taxa
+SPOOL_ENABLED = bool(tech_config.get("spool_enabled", True))
+SPOOL_PATH = tech_config.get("spool_path") or os.path.join(
+    os.path.dirname(__file__), "spool", "takt_spool.db"
+)
+SPOOL_BATCH_SIZE = int(tech_config.get("spool_batch_size", 20))
+SPOOL_DRAIN_RATE = float(tech_config.get("spool_drain_rate", 5))
+SPOOL_DRAIN_JITTER = float(tech_config.get("spool_drain_jitter", 3))
+
+# Telemetria em lote (takts, métricas, estado da tela) para o coletor da planta,
+# num tópico separado dos comandos dos ESP32
+TELEMETRY_ENABLED = bool(tech_config.get("telemetry_enabled", False))
+TELEMETRY_TOPIC = tech_config.get("telemetry_topic") or None
+TELEMETRY_SERIALIZER = tech_config.get("telemetry_serializer", "auto")
+TELEMETRY_BATCH_SIZE = int(tech_config.get("telemetry_batch_size", 100))
+TELEMETRY_FLUSH_INTERVAL = float(tech_config.get("telemetry_flush_interval", 1.0))
+
+# Várias estações na mesma tela: [{"device_id", "region": [x1, y1, x2, y2]}, ...].
+# Estações com captura vencendo dentro da janela (s) entram no mesmo lote do YOLO
+STATIONS = config.get("stations") or []
+STATIONS_BATCH_WINDOW = float(tech_config.get("stations_batch_window", 0.1))
+
+
+def extract_roi(frame, box, pad=5, scale=None):
+    """
+    Extrai ROI da imagem com padding e escala para melhorar OCR.
+
+    Sem ``scale``, o redimensionamento é o do pré-processamento configurado;
+    ``scale=1`` devolve só o recorte.
+    """
+    x1, y1, x2, y2 = map(int, box[:4])
 
     # Adiciona padding, limitado aos bounds da imagem
     x1, y1 = max(x1 - pad, 0), max(y1 - pad, 0)
     x2, y2 = min(x2 + pad, frame.shape[1]), min(y2 + pad, frame.shape[0])
 
     roi = frame[y1:y2, x1:x2]
+    if roi.size == 0 or scale == 1:
+        return roi
+    if scale is None:
+        return ROI_PREPROCESSOR.scale(roi)
     # Escala para melhorar reconhecimento de texto pequeno
     h, w = roi.shape[:2]
     scaled_roi = cv2.resize(roi, (w * scale, h * scale), interpolation=cv2.INTER_CUBIC)
@@ -119,42 +202,75 @@ def extract_roi(frame, box, pad=5, scale=2):
 
 def preprocess_for_ocr(roi_bgr):
     """Pré-processa ROI para melhorar qualidade do OCR."""
-    gray = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2GRAY)
-    gray = cv2.bilateralFilter(gray, d=9, sigmaColor=75, sigmaSpace=75)
-    _, th = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    return th
+    return ROI_PREPROCESSOR.binarize(roi_bgr)
 
 
-def extract_takt_message(roi) -> Optional[dict]:
+def extract_takt_message(roi, ocr_engine) -> Optional[dict]:
     """
     Extrai e reconhece texto da ROI usando OCR.
     
     Returns:
-        dict: {'event': 'takt'/'takt_screen', 'message': str} com resultado do OCR
+        dict: {'event': 'takt'/'takt_screen', 'message': str, 'remaining': int/None,
+            'confidence': float} com resultado do OCR; 'remaining' são os segundos
+            do countdown lido e 'confidence' a confiança do OCR (0-1)
         None: se OCR falhar
     """
-    tess_config = (
-        r"--oem 3 "  # LSTM OCR engine
-        r"-c tessedit_char_whitelist=0123456789:ABCDEFGHIJKLMNOPQRSTUVWXYZ "
-    )
-    text = (
-        pytesseract.image_to_string(roi, config=tess_config)
-        .strip()
-        .replace("\n", " ")
-        .strip()
-    )
+    text, confidence = ocr_engine.recognize_with_confidence(roi)
+    text = text.strip().replace("\n", " ").strip()
 
-    logger.debug(f"Texto extraído por OCR: '{text}'")
+    logger.debug(f"Texto extraído por OCR: '{text}' (confiança {confidence:.2f})")
 
     if "00:00:00" in text:
         logger.info("Padrão '00:00:00' detectado - Takt concluído!")
-        return {"event": "takt", "message": "Takt detectado"}
+        return {
+            "event": "takt",
+            "message": "Takt detectado",
+            "remaining": 0,
+            "confidence": confidence,
+        }
     else:
-        return {"event": "takt_screen", "message": "Takt Aberto"}
+        return {
+            "event": "takt_screen",
+            "message": "Takt Aberto",
+            "remaining": parse_countdown(text),
+            "confidence": confidence,
+        }
+
+
+def _recognize_box(ocr_engine, frame, box, metrics=None) -> Optional[dict]:
+    with span(metrics, "roi"):
+        roi = extract_roi(frame, box)
+    if roi is None or roi.size == 0:
+        return None
+
+    with span(metrics, "preprocess"):
+        processed_roi = preprocess_for_ocr(roi)
+    with span(metrics, "ocr"):
+        return extract_takt_message(processed_roi, ocr_engine)
+
+
+def recognize_boxes(frame, boxes, ocr_pool, metrics=None) -> Optional[dict]:
+    """
+    Roda OCR em todas as caixas detectadas em paralelo.
+
+    As caixas chegam ordenadas pela confiança da detecção: a primeira que
+    mostrar '00:00:00' decide o takt; sem nenhuma, vale a de maior confiança.
+    """
+    results = ocr_pool.map(
+        lambda ocr_engine, box: _recognize_box(ocr_engine, frame, box, metrics), boxes
+    )
+    results = [result for result in results if result is not None]
+    if not results:
+        return None
+
+    for result in results:
+        if result.get("event") == "takt":
+            return result
+    return results[0]
 
 
 async def send_message(
-    channel: aio_pika.Channel,
+    channel: "aio_pika.Channel",
     routing_key: str,
     message_body: dict,
     on_event: Optional[Callable[[str, Any], None]] = None,
@@ -163,6 +279,9 @@ async def send_message(
     Publish a message to the RabbitMQ exchange.
     """
     try:
+        # Import tardio: aio_pika só é necessário no envio legado via RabbitMQ
+        import aio_pika
+
         message = aio_pika.Message(
             body=json.dumps(message_body).encode(),
             content_type="application/json",
@@ -183,6 +302,115 @@ async def send_message(
             on_event("message_error", {"error": str(e)})
 
 
+async def publish_takt(
+    connection,
+    device_id: str,
+    payload: dict,
+    on_event: Optional[Callable[[str, Any], None]] = None,
+    metrics: Optional[Metrics] = None,
+) -> bool:
+    """
+    Publica o takt via MQTTManager e notifica a UI; retorna True só depois
+    do PUBACK do broker (o spool apaga o takt com base nesse retorno)
+    """
+    try:
+        logger.info(f"📤 Enviando comando MQTT: {payload}")
+        with span(metrics, "publish"):
+            publish = (
+                getattr(connection, "publish_command_confirmed", None)
+                or connection.publish_command
+            )
+            if inspect.iscoroutinefunction(publish):
+                # AsyncMQTTManager: aguarda o PUBACK no próprio loop
+                success = await publish(device_id, payload, qos=1)
+            else:
+                # MQTTManager com thread: wait_for_publish bloqueia, fora do loop
+                success = await asyncio.to_thread(publish, device_id, payload, 1)
+    except Exception as e:
+        logger.error(f"❌ Exceção ao publicar MQTT: {e}", exc_info=True)
+        if on_event:
+            try:
+                on_event("message_error", {"error": str(e)})
+            except Exception as inner_e:
+                logger.error(f"Erro no callback de erro: {inner_e}", exc_info=True)
+        return False
+
+    if success:
+        logger.info(f"✅ Mensagem enviada via MQTT: {payload}")
+        if on_event:
+            try:
+                on_event("message_sent", payload)
+            except Exception as e:
+                logger.error(f"Erro no callback message_sent: {e}", exc_info=True)
+    else:
+        logger.error("❌ Falha ao enviar mensagem via MQTT (publish retornou False)")
+        if on_event:
+            try:
+                on_event("message_error", {"error": "Falha no publish MQTT"})
+            except Exception as e:
+                logger.error(f"Erro no callback message_error: {e}", exc_info=True)
+    return bool(success)
+
+
+def _device_online(connection, device_id: str) -> bool:
+    """Broker conectado e ESP32 online (pelo snapshot de status)"""
+    is_connected = getattr(connection, "is_connected", None)
+    if is_connected is not None and not is_connected():
+        return False
+    return connection.device_status.get(device_id, False)
+
+
+async def drain_spool(
+    spool: TaktSpool,
+    connection,
+    device_id: str,
+    wakeup: asyncio.Event,
+    on_event: Optional[Callable[[str, Any], None]] = None,
+    metrics: Optional[Metrics] = None,
+):
+    """
+    Envia os takts do spool em ordem enquanto o broker e o ESP32 estão disponíveis.
+
+    Backpressure: um publish por vez, aguardando a confirmação, e no máximo
+    SPOOL_DRAIN_RATE por segundo. Ao voltar a conexão, espera um atraso
+    aleatório de até SPOOL_DRAIN_JITTER segundos para que as estações não
+    drenem todas ao mesmo tempo.
+    """
+    was_online = _device_online(connection, device_id)
+    while True:
+        wakeup.clear()
+        if spool.needs_sync():
+            await asyncio.to_thread(spool.sync)
+
+        online = _device_online(connection, device_id)
+        pending = spool.pending_for(device_id)
+        if online and not was_online and pending:
+            delay = random.uniform(0, SPOOL_DRAIN_JITTER)
+            logger.info(
+                f"📦 Conexão restabelecida - enviando {pending} takt(s) do spool para {device_id} em {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+        was_online = online
+
+        batch = spool.peek(SPOOL_BATCH_SIZE, device_id) if online and pending else []
+        if not batch:
+            # Acorda com um novo takt ou a cada segundo para reavaliar a conexão
+            try:
+                await asyncio.wait_for(wakeup.wait(), 1.0)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        for row_id, event_device, payload in batch:
+            if not await publish_takt(connection, event_device, payload, on_event, metrics):
+                # Broker ou ESP32 caiu no meio do lote: tenta de novo mais tarde
+                await asyncio.sleep(2)
+                break
+            spool.remove([row_id])
+            if spool.pending_for(device_id):
+                await asyncio.sleep(1 / SPOOL_DRAIN_RATE)
+
+
 def update_takt_count(current_count: int) -> int:
     return current_count + 1
 
@@ -191,7 +419,21 @@ async def main(
     on_event: Optional[Callable[[str, Any], None]] = None,
     connection: Optional[Any] = None,
     device_id: Optional[str] = None,
+    screen_capture: Optional[ScreenCapture] = None,
+    stations: Optional[List[dict]] = None,
 ):
+    """
+    Loop de detecção de takt.
+
+    ``screen_capture`` permite injetar outra fonte de frames (ex.: o replay de
+    ``benchmarks/replay.py``); por padrão captura a tela.
+
+    ``stations`` (padrão: ``stations`` do config.json, se nenhuma captura for
+    injetada) lista várias estações ``{"device_id", "region"}`` na mesma tela:
+    cada uma com a sua captura, debounce e contador de takt, e os frames de
+    todas passam por um único predict do YOLO por ciclo. Sem estações,
+    rastreia só ``device_id`` na tela inteira.
+    """
     logger.info("=" * 60)
     logger.info(f"Iniciando Sistema de Detecção de Takt-Time")
     if device_id:
@@ -201,9 +443,15 @@ async def main(
         DEVICE_ID_ACTUAL = DEVICE_ID
         logger.info(f"Dispositivo (config): {DEVICE_ID_ACTUAL}")
 
-    logger.info("=" * 60)
+    if stations is None:
+        stations = STATIONS if screen_capture is None else []
+    station_configs = parse_stations(stations)
+    if station_configs:
+        logger.info(
+            f"Modo multi-estação: {', '.join(cfg.device_id for cfg in station_configs)}"
+        )
 
-    takt_tracker_count = 0
+    logger.info("=" * 60)
 
     is_mqtt_manager = connection and hasattr(connection, "publish_command")
 
@@ -218,280 +466,574 @@ async def main(
         return
 
     # Carregar modelo
-    logger.info(f"Carregando modelo YOLO de: {MODEL_PATH}")
+    logger.info(f"Modelo YOLO: {MODEL_PATH}")
     if not os.path.exists(MODEL_PATH):
         logger.error(f"Modelo não encontrado em {MODEL_PATH}")
         if on_event:
             on_event("model_missing", {"path": MODEL_PATH})
         return
 
-    model = YOLO(MODEL_PATH)
-    logger.info("Modelo YOLO carregado com sucesso!")
-    
-    # Aquecimento do modelo para melhor performance
-    logger.info("Aquecendo modelo YOLO...")
-    dummy_frame = np.zeros((640, 480, 3), dtype=np.uint8)
-    _ = model.predict(source=dummy_frame, conf=0.15, verbose=False)
-    logger.info("Modelo aquecido e pronto!")
-    
+    # Detector compartilhado: já vem carregado e aquecido pelo InitializationWorker
+    # ou por uma execução anterior; a carga (se houver) roda fora do event loop
+    detector = await asyncio.to_thread(get_detector, MODEL_PATH, **DETECTOR_OPTIONS)
+    logger.info("Modelo YOLO pronto!")
+
     if on_event:
         on_event("model_loaded", {"model_path": MODEL_PATH})
 
-    last_message_time = None
-    last_sent_message = None
-    last_takt_screen_check = None
-    last_device_warning_time = None  # Controle de aviso de dispositivo desconectado
+    # Engines de OCR criados uma vez e reaproveitados durante toda a análise
+    ocr_pool = await asyncio.to_thread(
+        OCRPool,
+        lambda: create_ocr_engine(
+            OCR_BACKEND,
+            OCR_FAST_PATH,
+            OCR_FAST_PATH_CONFIDENCE,
+            OCR_TEMPLATES_DIR,
+        ),
+        OCR_WORKERS,
+    )
 
-    logger.info("Iniciando loop principal de detecção...")
-    iteration = 0
+    def make_change_gate():
+        if not FRAME_GATE_ENABLED:
+            return None
+        return FrameChangeGate(
+            roi_fn=lambda image, box: extract_roi(image, box, scale=1),
+            threshold=FRAME_GATE_THRESHOLD,
+        )
 
-    while True:
-        try:
-            iteration += 1
-            if iteration % 100 == 0:
-                logger.debug(f"Loop de detecção - Iteração: {iteration}")
-
-            screen = ImageGrab.grab()
-            screen_np = np.array(screen)
-            frame = cv2.cvtColor(screen_np, cv2.COLOR_RGB2BGR)
-
-            # Fazer a predição no frame atual
-            results = model.predict(
-                source=frame, 
-                stream=False, 
-                conf=0.15, 
-                verbose=False,
-                imgsz=640  # Otimização: tamanho menor para processamento mais rápido
+    def make_scheduler():
+        if not ADAPTIVE_SCHEDULE:
+            return None
+        return CaptureScheduler(
+            max_interval=SCHEDULE_MAX_INTERVAL,
+            burst_lead=SCHEDULE_RAMP_SECONDS,
+            tracker=CountdownTracker(min_confidence=COUNTDOWN_MIN_CONFIDENCE),
+        )
+
+    if station_configs:
+        # Um backend de captura para todas as estações (a captura roda numa só thread)
+        capture_backend = create_capture_backend(CAPTURE_BACKEND)
+        station_list = [
+            Station(
+                cfg.device_id,
+                ScreenCapture(
+                    tracking=CAPTURE_MODE == "tracking",
+                    full_scan_interval=FULL_SCAN_INTERVAL,
+                    backend=capture_backend,
+                    bounds=cfg.region,
+                ),
+                make_change_gate(),
+                make_scheduler(),
+                cfg.imgsz or INFERENCE_IMGSZ,
+            )
+            for cfg in station_configs
+        ]
+        for station in station_list:
+            if station.device_id not in getattr(connection, "devices", {}):
+                connection.add_device(station.device_id)
+    else:
+        if screen_capture is None:
+            screen_capture = ScreenCapture(
+                tracking=CAPTURE_MODE == "tracking",
+                full_scan_interval=FULL_SCAN_INTERVAL,
+                backend=CAPTURE_BACKEND,
             )
+        station_list = [
+            Station(
+                DEVICE_ID_ACTUAL,
+                screen_capture,
+                make_change_gate(),
+                make_scheduler(),
+                INFERENCE_IMGSZ,
+            )
+        ]
+    logger.info(
+        f"Modo de captura: {CAPTURE_MODE} ({station_list[0].capture.backend_name})"
+    )
 
-            # Early exit: se não houver detecções, continua loop
-            if len(results[0].boxes) == 0:
-                await asyncio.sleep(0.1)
-                continue
-
-            extracted_text = None
-            for result in results:
-                for box in result.boxes.xyxy:
-                    roi = extract_roi(frame, box)
-                    if roi is None or roi.size == 0:
-                        continue
-
-                    processed_roi = preprocess_for_ocr(roi)
-                    extracted_text = extract_takt_message(processed_roi)
-
-                    if extracted_text is not None:
-                        break
-                if extracted_text:
-                    break
-
-            # Detecta o fim da etapa de um takt
-            if extracted_text:
-                now = time.time()
-                
-                # Validação adicional da estrutura
-                if not isinstance(extracted_text, dict) or "event" not in extracted_text:
-                    logger.error(
-                        f"Estrutura inválida de extracted_text: {extracted_text}"
+    metrics = Metrics()
+    metrics_labels = {"device": ",".join(station.device_id for station in station_list)}
+    metrics_server = None
+    if METRICS_PORT:
+        try:
+            metrics_server = start_metrics_server(metrics, METRICS_PORT, labels=metrics_labels)
+        except OSError as e:
+            logger.warning(f"Endpoint de métricas indisponível na porta {METRICS_PORT}: {e}")
+    last_metrics_emit = time.monotonic()
+
+    telemetry = TELEMETRY_ENABLED and hasattr(connection, "enable_telemetry")
+    if telemetry:
+        connection.enable_telemetry(
+            DEVICE_ID_ACTUAL,
+            topic=TELEMETRY_TOPIC,
+            serializer=TELEMETRY_SERIALIZER,
+            max_events=TELEMETRY_BATCH_SIZE,
+            max_interval=TELEMETRY_FLUSH_INTERVAL,
+        )
+
+    spool = None
+    spool_tasks = []
+    # Um Event por ESP32: a drenagem de uma estação não consome o aviso das outras
+    spool_wakeups = {station.device_id: asyncio.Event() for station in station_list}
+    if SPOOL_ENABLED:
+        try:
+            spool = TaktSpool(SPOOL_PATH)
+            # Uma drenagem por ESP32: um dispositivo offline não segura os outros
+            spool_tasks = [
+                asyncio.create_task(
+                    drain_spool(
+                        spool,
+                        connection,
+                        station.device_id,
+                        spool_wakeups[station.device_id],
+                        on_event,
+                        metrics,
                     )
-                    continue
+                )
+                for station in station_list
+            ]
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Spool indisponível ({e}) - takts com ESP32 offline serão descartados")
 
-                event_type = extracted_text.get("event")
-
-                # Trata reconhecimento de tela da takt aberto (sem reconhecer fim de takt) - Faz check a cada 5 segundos
-                if event_type == "takt_screen":
-                    if (
-                        last_takt_screen_check is None
-                        or (now - last_takt_screen_check) > 5
-                    ):
-                        if on_event:
-                            try:
-                                on_event(
-                                    "takt_screen_detected",
-                                    {"message": extracted_text.get("message")},
-                                )
-                            except Exception as e:
-                                logger.error(
-                                    f"Erro ao chamar on_event para takt_screen: {e}",
-                                    exc_info=True,
-                                )
-                        last_takt_screen_check = now
-                    await asyncio.sleep(0.5)
-                    continue
+    # Captura, YOLO e OCR rodam em threads dedicadas; o event loop só aguarda
+    if len(station_list) == 1:
+        station = station_list[0]
+
+        def capture():
+            with metrics.span("capture"):
+                return station.capture.grab()
+
+        def detect(captured):
+            with metrics.span("inference"):
+                boxes = detector.predict(
+                    captured.image,
+                    imgsz=station.capture.detection_imgsz(captured, base_imgsz=station.imgsz),
+                )
+            # Atualiza a região rastreada antes da captura do próximo frame
+            station.capture.update(captured, boxes)
+            return boxes
+
+        pipeline = InferencePipeline(
+            capture_fn=capture,
+            detect_fn=detect,
+            recognize_fn=lambda captured, boxes: recognize_boxes(
+                captured.image, boxes, ocr_pool, metrics
+            ),
+            change_gate=station.change_gate,
+        )
+    else:
 
-                # Trata detecção de conclusão de takt (00:00:00)
-                if event_type == "takt":
-                    logger.debug(f"===> Takt detectado em {now:.3f}")
-                    # Debounce mais robusto
-                    if last_sent_message is not None and (now - last_message_time) <= 20:
-                        logger.debug(
-                            f"Mensagem ignorada (debounce ativo - {now - last_message_time:.2f}s desde última)"
+        def make_capture(station):
+            def capture():
+                with metrics.span("capture"):
+                    return station.capture.grab()
+
+            return capture
+
+        def detect_batch(indices, frames):
+            # Um único predict com os frames de todas as estações do ciclo
+            with metrics.span("inference"):
+                batch = detector.predict_batch(
+                    [captured.image for captured in frames],
+                    [
+                        station_list[index].capture.detection_imgsz(
+                            captured, base_imgsz=station_list[index].imgsz
                         )
-                        await asyncio.sleep(0.5)
-                        continue
-                        
-                    logger.debug(f"✅ Passou pelo debounce em {now:.3f}")
-
-                    # ===== VERIFICAÇÃO DE CONEXÃO DO ESP32 =====
-                    # Verifica se o dispositivo ESP32 está conectado antes de enviar
-                    is_device_connected = False
-                    if is_mqtt_manager and hasattr(connection, 'device_status'):
-                        device_status_dict = connection.device_status
-                        is_device_connected = device_status_dict.get(DEVICE_ID_ACTUAL, False)
-                        logger.debug(f"📊 device_status completo: {device_status_dict}")
-                        logger.debug(f"✓ Status de conexão do dispositivo {DEVICE_ID_ACTUAL}: {is_device_connected}")
-                    else:
-                        logger.error("❌ connection.device_status não disponível!")
-                    
-                    # Só envia se o dispositivo estiver conectado
-                    if not is_device_connected:
+                        for index, captured in zip(indices, frames)
+                    ],
+                )
+            for index, captured, boxes in zip(indices, frames, batch):
+                station_list[index].capture.update(captured, boxes)
+            return batch
+
+        pipeline = BatchInferencePipeline(
+            capture_fns=[make_capture(station) for station in station_list],
+            detect_batch_fn=detect_batch,
+            recognize_fn=lambda index, captured, boxes: recognize_boxes(
+                captured.image, boxes, ocr_pool, metrics
+            ),
+            change_gates=[station.change_gate for station in station_list],
+        )
+
+    def log_loop_stats(iteration: int):
+        for station in station_list:
+            gate = station.change_gate
+            skip_info = f" - frames pulados: {gate.skip_ratio:.0%}" if gate else ""
+            capture_stats = station.capture.stats()
+            logger.debug(
+                f"Loop de detecção ({station.device_id}) - Iteração: {iteration}{skip_info} - "
+                f"captura: {capture_stats['fps']:.0f} FPS, "
+                f"{capture_stats['bytes_per_frame'] / 1024:.0f} KiB/frame"
+            )
+
+    def emit_metrics():
+        """Publica as métricas periodicamente para a UI e o arquivo de exportação"""
+        nonlocal last_metrics_emit
+        if time.monotonic() - last_metrics_emit < METRICS_INTERVAL:
+            return
+        last_metrics_emit = time.monotonic()
+        snapshot = metrics.snapshot()
+        if on_event:
+            on_event("metrics", snapshot)
+        if telemetry:
+            # Um evento por estação: o coletor agrupa pelo device_id de cada ESP32
+            for station in station_list:
+                connection.publish_telemetry(
+                    "metrics",
+                    {
+                        "device_id": station.device_id,
+                        "takt_count": station.takt_count,
+                        "capture": station.capture.stats(),
+                        "stages": snapshot,
+                    },
+                )
+        if METRICS_FILE:
+            try:
+                metrics.export(METRICS_FILE, labels=metrics_labels)
+            except OSError as e:
+                logger.warning(f"Falha ao exportar métricas: {e}")
+
+    async def handle_result(station: Station, result) -> float:
+        """
+        Aplica as regras de takt ao frame de uma estação (debounce, contador,
+        ESP32 conectado, envio) e retorna quanto esperar até a próxima captura.
+        """
+        # Early exit: se não houver detecções, continua loop
+        if len(result.boxes) == 0:
+            return 0.1
+
+        extracted_text = result.extracted
+
+        # Detecta o fim da etapa de um takt
+        if extracted_text:
+            now = time.time()
+            scheduler = station.scheduler
+
+            # Validação adicional da estrutura
+            if not isinstance(extracted_text, dict) or "event" not in extracted_text:
+                logger.error(
+                    f"Estrutura inválida de extracted_text: {extracted_text}"
+                )
+                return 0
+
+            event_type = extracted_text.get("event")
+
+            # Trata reconhecimento de tela da takt aberto (sem reconhecer fim de takt) - Faz check a cada 5 segundos
+            if event_type == "takt_screen":
+                if (
+                    station.last_takt_screen_check is None
+                    or (now - station.last_takt_screen_check) > 5
+                ):
+                    if on_event:
+                        try:
+                            on_event(
+                                "takt_screen_detected",
+                                {
+                                    "message": extracted_text.get("message"),
+                                    "device_id": station.device_id,
+                                },
+                            )
+                        except Exception as e:
+                            logger.error(
+                                f"Erro ao chamar on_event para takt_screen: {e}",
+                                exc_info=True,
+                            )
+                    if telemetry:
+                        connection.publish_telemetry(
+                            "screen_state",
+                            {
+                                "device_id": station.device_id,
+                                "state": "takt_screen",
+                                "remaining": extracted_text.get("remaining"),
+                            },
+                        )
+                    station.last_takt_screen_check = now
+
+                if scheduler is None:
+                    return 0.5
+                # Frames reaproveitados pelo gate não são leituras novas
+                if not result.skipped:
+                    scheduler.observe(
+                        extracted_text.get("remaining"),
+                        extracted_text.get("confidence"),
+                    )
+                return scheduler.next_delay()
+
+            # Trata detecção de conclusão de takt (00:00:00)
+            if event_type == "takt":
+                if result.skipped:
+                    # Takt só com leitura nova do OCR: o gate repete a decisão do
+                    # frame anterior, que pode ter sido vetada pelo countdown
+                    return scheduler.next_delay() if scheduler is not None else 0.5
+                logger.debug(f"===> Takt detectado em {now:.3f} ({station.device_id})")
+                if scheduler is not None:
+                    # 00:00:00 incompatível com a extrapolação do countdown é
+                    # tratado como erro de OCR até ser confirmado pelo próximo frame;
+                    # confiança baixa só não reancora o modelo, não veta o takt
+                    if scheduler.observe(0, extracted_text.get("confidence")) == REJECTED:
                         logger.warning(
-                            f"ESP32 desconectado em {now:.3f} - aguardando conexão.. "
-                            f"Mensagem de takt NÃO será enviada."
+                            "'00:00:00' incompatível com o countdown previsto - aguardando confirmação"
                         )
-                        
-                        # Notifica a UI sobre o dispositivo desconectado (com cooldown de 30s)
-                        should_notify = False
-                        if last_device_warning_time is None:
-                            should_notify = True
-                        elif (now - last_device_warning_time) >= 30:  # 30 segundos de cooldown
-                            should_notify = True
-                        
-                        if should_notify and on_event:
-                            last_device_warning_time = now
-                            on_event("device_disconnected", {
-                                "device_id": DEVICE_ID_ACTUAL,
-                                "message": "ESP32 desconectado - mensagem não enviada",
-                                "takt_detected": True
-                            })
-                            logger.info("Evento 'device_disconnected' enviado para UI")
-                        else:
-                            logger.debug(f"Aviso de dispositivo desconectado em cooldown (última notificação há {now - last_device_warning_time:.1f}s)")
-                        
-                        # Aguarda um tempo antes de verificar novamente
-                        last_message_time = now
-                        await asyncio.sleep(2)
-                        continue
-
-                    # ===== DISPOSITIVO CONECTADO - PROCESSAR TAKT =====
-                    logger.info("=" * 60)
-                    logger.info("EVENTO TAKT CONFIRMADO - Processando...")
-                    logger.info(f"ESP32 ({DEVICE_ID_ACTUAL}) conectado!")
-                    logger.info(f"Tempo desde última mensagem: {(now - last_message_time) if last_message_time else 'N/A'}")
-                    logger.info("=" * 60)
-
-                    last_sent_message = extracted_text
-                    last_message_time = now
-                    last_takt_screen_check = now  # Reset do check de tela
-
-                    # Atualiza o contador de detecções
-                    takt_tracker_count = update_takt_count(takt_tracker_count)
-                    logger.info(
-                        f"📊 Contador de takt atualizado: {takt_tracker_count}/3"
+                        if station.change_gate is not None:
+                            # Sem cache da decisão vetada: o próximo frame passa pelo OCR
+                            station.change_gate.invalidate()
+                        return scheduler.next_delay()
+                    # Countdown chegou a zero: o próximo ciclo ainda não foi lido
+                    scheduler.reset()
+                # Debounce mais robusto
+                if station.last_sent_message is not None and (now - station.last_message_time) <= 20:
+                    logger.debug(
+                        f"Mensagem ignorada (debounce ativo - {now - station.last_message_time:.2f}s desde última)"
                     )
+                    return 0.5
 
-                    # Notifica a UI baseado no contador
-                    try:
-                        if on_event:
-                            match takt_tracker_count:
-                                case 1:
-                                    logger.info(">>> 🟢 Primeira detecção de Takt (1/3)")
-                                    on_event("takt_detected", {
-                                        "takt": takt_tracker_count,
-                                        "device_connected": True
-                                    })
-
-                                case 2:
-                                    logger.info(">>> 🟡 Segunda detecção de Takt (2/3)")
-                                    on_event("takt_detected", {
-                                        "takt": takt_tracker_count,
-                                        "device_connected": True
-                                    })
-
-                                case 3:
-                                    logger.info(
-                                        ">>> 🔴 Terceira detecção de Takt (3/3) - Talão completo!"
-                                    )
-                                    on_event("takt_detected", {
-                                        "takt": takt_tracker_count,
-                                        "device_connected": True
-                                    })
-                        else:
-                            logger.warning("⚠️ on_event callback não está definido!")
-                    except Exception as e:
-                        logger.error(
-                            f"❌ Erro ao notificar UI via on_event: {e}", exc_info=True
+                logger.debug(f"✅ Passou pelo debounce em {now:.3f}")
+
+                # ===== VERIFICAÇÃO DE CONEXÃO DO ESP32 =====
+                # Verifica se o dispositivo ESP32 está conectado antes de enviar
+                is_device_connected = False
+                if is_mqtt_manager and hasattr(connection, 'device_status'):
+                    device_status_dict = connection.device_status
+                    is_device_connected = device_status_dict.get(station.device_id, False)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"📊 device_status completo: {device_status_dict}")
+                    logger.debug(f"✓ Status de conexão do dispositivo {station.device_id}: {is_device_connected}")
+                else:
+                    logger.error("❌ connection.device_status não disponível!")
+
+                # Sem spool, só envia se o dispositivo estiver conectado
+                if not is_device_connected:
+                    logger.warning(
+                        f"ESP32 {station.device_id} desconectado em {now:.3f} - aguardando conexão.. "
+                        + (
+                            "Takt guardado no spool para envio posterior."
+                            if spool is not None
+                            else "Mensagem de takt NÃO será enviada."
                         )
+                    )
 
-                    # Envia a mensagem via MQTT
-                    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-                    extracted_text.update({"id": DEVICE_ID_ACTUAL})
-                    extracted_text.update({"timestamp": timestamp})
-                    extracted_text.update({"takt_count": takt_tracker_count})
+                    # Notifica a UI sobre o dispositivo desconectado (com cooldown de 30s)
+                    should_notify = False
+                    if station.last_device_warning_time is None:
+                        should_notify = True
+                    elif (now - station.last_device_warning_time) >= 30:  # 30 segundos de cooldown
+                        should_notify = True
 
-                    if is_mqtt_manager:
-                        try:
-                            logger.info(f"📤 Enviando comando MQTT: {extracted_text}")
-                            success = connection.publish_command(
-                                DEVICE_ID_ACTUAL, extracted_text, qos=1
-                            )
-                            if success:
+                    if should_notify and on_event:
+                        station.last_device_warning_time = now
+                        on_event("device_disconnected", {
+                            "device_id": station.device_id,
+                            "message": (
+                                "ESP32 desconectado - takt guardado para envio"
+                                if spool is not None
+                                else "ESP32 desconectado - mensagem não enviada"
+                            ),
+                            "takt_detected": True,
+                            "spooled": spool is not None,
+                        })
+                        logger.info("Evento 'device_disconnected' enviado para UI")
+                    else:
+                        logger.debug(f"Aviso de dispositivo desconectado em cooldown (última notificação há {now - station.last_device_warning_time:.1f}s)")
+
+                    if spool is None:
+                        # Aguarda um tempo antes de verificar novamente
+                        station.last_message_time = now
+                        return 2
+
+                # ===== PROCESSAR TAKT =====
+                logger.info("=" * 60)
+                logger.info("EVENTO TAKT CONFIRMADO - Processando...")
+                logger.info(
+                    f"ESP32 ({station.device_id}) "
+                    f"{'conectado!' if is_device_connected else 'desconectado - envio pelo spool'}"
+                )
+                logger.info(f"Tempo desde última mensagem: {(now - station.last_message_time) if station.last_message_time else 'N/A'}")
+                logger.info("=" * 60)
+
+                station.last_sent_message = extracted_text
+                station.last_message_time = now
+                station.last_takt_screen_check = now  # Reset do check de tela
+
+                # Atualiza o contador de detecções
+                station.takt_count = update_takt_count(station.takt_count)
+                logger.info(
+                    f"📊 Contador de takt atualizado: {station.takt_count}/3"
+                )
+
+                # Notifica a UI baseado no contador
+                try:
+                    if on_event:
+                        match station.takt_count:
+                            case 1:
+                                logger.info(">>> 🟢 Primeira detecção de Takt (1/3)")
+                                on_event("takt_detected", {
+                                    "takt": station.takt_count,
+                                    "device_id": station.device_id,
+                                    "device_connected": is_device_connected,
+                                    "captured_at": result.captured_at,
+                                })
+
+                            case 2:
+                                logger.info(">>> 🟡 Segunda detecção de Takt (2/3)")
+                                on_event("takt_detected", {
+                                    "takt": station.takt_count,
+                                    "device_id": station.device_id,
+                                    "device_connected": is_device_connected,
+                                    "captured_at": result.captured_at,
+                                })
+
+                            case 3:
                                 logger.info(
-                                    f"✅ Mensagem enviada via MQTT: {extracted_text}"
+                                    ">>> 🔴 Terceira detecção de Takt (3/3) - Talão completo!"
                                 )
-                                if on_event:
-                                    try:
-                                        on_event("message_sent", extracted_text)
-                                    except Exception as e:
-                                        logger.error(
-                                            f"Erro no callback message_sent: {e}",
-                                            exc_info=True,
-                                        )
-                            else:
-                                logger.error("❌ Falha ao enviar mensagem via MQTT (publish retornou False)")
-                                if on_event:
-                                    try:
-                                        on_event(
-                                            "message_error",
-                                            {"error": "Falha no publish MQTT"},
-                                        )
-                                    except Exception as e:
-                                        logger.error(
-                                            f"Erro no callback message_error: {e}",
-                                            exc_info=True,
-                                        )
-                        except Exception as e:
+                                on_event("takt_detected", {
+                                    "takt": station.takt_count,
+                                    "device_id": station.device_id,
+                                    "device_connected": is_device_connected,
+                                    "captured_at": result.captured_at,
+                                })
+                    else:
+                        logger.warning("⚠️ on_event callback não está definido!")
+                except Exception as e:
+                    logger.error(
+                        f"❌ Erro ao notificar UI via on_event: {e}", exc_info=True
+                    )
+
+                # Envia a mensagem via MQTT
+                timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+                # Leitura do countdown é interna; não vai no payload MQTT
+                extracted_text.pop("remaining", None)
+                extracted_text.pop("confidence", None)
+                extracted_text.update({"id": station.device_id})
+                extracted_text.update({"timestamp": timestamp})
+                extracted_text.update({"takt_count": station.takt_count})
+                if telemetry:
+                    connection.publish_telemetry(
+                        "takt",
+                        {
+                            "device_id": station.device_id,
+                            "takt_count": station.takt_count,
+                            "device_connected": is_device_connected,
+                            "detected_at": now,
+                        },
+                    )
+
+                if is_mqtt_manager:
+                    queued = False
+                    if spool is not None:
+                        try:
+                            spool.append(station.device_id, extracted_text)
+                            spool_wakeups[station.device_id].set()
+                            queued = True
+                            logger.info(
+                                f"📦 Takt no spool ({spool.pending_for(station.device_id)} pendente(s)): {extracted_text}"
+                            )
+                        except sqlite3.Error as e:
                             logger.error(
-                                f"❌ Exceção ao publicar MQTT: {e}", exc_info=True
+                                f"❌ Falha ao gravar no spool - envio direto: {e}",
+                                exc_info=True,
                             )
-                            if on_event:
-                                try:
-                                    on_event("message_error", {"error": str(e)})
-                                except Exception as inner_e:
-                                    logger.error(
-                                        f"Erro no callback de erro: {inner_e}",
-                                        exc_info=True,
-                                    )
-                    else:
-                        logger.error("❌ MQTTManager não disponível!")
+                    if not queued:
+                        await publish_takt(
+                            connection, station.device_id, extracted_text, on_event, metrics
+                        )
+                else:
+                    logger.error("❌ MQTTManager não disponível!")
 
-                    # Reset do contador após takt 3
-                    if takt_tracker_count >= 3:
-                        logger.info("🔄 Resetando contador de takt para 0")
-                        takt_tracker_count = 0
+                # Reset do contador após takt 3
+                if station.takt_count >= 3:
+                    logger.info(f"🔄 Resetando contador de takt para 0 ({station.device_id})")
+                    station.takt_count = 0
 
-            # Sleep adaptativo: menor quando detecta algo, maior quando não
-            await asyncio.sleep(0.1 if extracted_text else 0.3)
+        # Sleep adaptativo: menor quando detecta algo, maior quando não
+        return 0.1 if extracted_text else 0.3
 
-        except Exception as e:
-            logger.error(
-                f"✗ Erro durante a execução do loop principal: {e}", exc_info=True
+    logger.info("Iniciando loop principal de detecção...")
+    iteration = 0
+
+    try:
+        while True:
+            try:
+                iteration += 1
+                if iteration % 100 == 0:
+                    log_loop_stats(iteration)
+
+                if len(station_list) == 1:
+                    # Captura + predição + OCR fora do event loop. Só adianta o próximo
+                    # frame se a espera prevista não for torná-lo velho demais
+                    scheduler = station.scheduler
+                    with metrics.span("frame"):
+                        result = await pipeline.next(
+                            prefetch=scheduler is None
+                            or scheduler.last_delay <= pipeline.max_frame_age
+                        )
+                    metrics.increment("frames")
+                    if result.skipped:
+                        metrics.increment("skipped_frames")
+                    emit_metrics()
+                    await asyncio.sleep(await handle_result(station, result))
+                    continue
+
+                # Multi-estação: processa juntas as estações cuja próxima captura vence
+                # dentro da janela, para o YOLO rodar uma vez por ciclo
+                now_mono = time.monotonic()
+                due = [
+                    index
+                    for index, station_state in enumerate(station_list)
+                    if station_state.next_due <= now_mono + STATIONS_BATCH_WINDOW
+                ]
+                if not due:
+                    await asyncio.sleep(
+                        min(station_state.next_due for station_state in station_list) - now_mono
+                    )
+                    continue
+
+                with metrics.span("frame"):
+                    results = await pipeline.next(due)
+                for index in due:
+                    result = results[index]
+                    metrics.increment("frames")
+                    if result.skipped:
+                        metrics.increment("skipped_frames")
+                    delay = await handle_result(station_list[index], result)
+                    station_list[index].next_due = time.monotonic() + delay
+                emit_metrics()
+
+            except Exception as e:
+                logger.error(
+                    f"✗ Erro durante a execução do loop principal: {e}", exc_info=True
+                )
+                if on_event:
+                    try:
+                        on_event("runtime_error", {"error": str(e)})
+                    except Exception as inner_e:
+                        logger.error(f"Erro no callback de erro: {inner_e}", exc_info=True)
+                await asyncio.sleep(2)
+    finally:
+        if telemetry:
+            connection.disable_telemetry()
+        for task in spool_tasks:
+            task.cancel()
+        for task in spool_tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if spool is not None:
+            # Takts ainda pendentes ficam no disco para a próxima execução
+            spool.close()
+        pipeline.close()
+        ocr_pool.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+        for station_state in station_list:
+            capture_stats = station_state.capture.stats()
+            logger.info(
+                f"📷 Captura {station_state.device_id} ({station_state.capture.backend_name}): "
+                f"{capture_stats['frames']} frames, {capture_stats['fps']:.0f} FPS, "
+                f"{capture_stats['bytes_per_frame'] / 1024:.0f} KiB/frame"
             )
-            if on_event:
-                try:
-                    on_event("runtime_error", {"error": str(e)})
-                except Exception as inner_e:
-                    logger.error(f"Erro no callback de erro: {inner_e}", exc_info=True)
-            await asyncio.sleep(2)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Limites dos buckets (segundos) do histograma exportado
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class RollingHistogram:
+    """
+    Histograma de latências de um estágio.
+
+    Os percentis saem das últimas ``window`` amostras; os buckets, a soma e a
+    contagem são cumulativos desde o início (formato do Prometheus).
+    """
+
+    def __init__(self, window: int = 500, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._samples = deque(maxlen=window)
+        self._bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        for index, limit in enumerate(self.buckets):
+            if seconds <= limit:
+                self._bucket_counts[index] += 1
+                break
+
+    def summary(self) -> dict:
+        if not self._samples:
+            return {"count": self.count}
+        ordered = sorted(self._samples)
+        last = len(ordered) - 1
+        return {
+            "count": self.count,
+            "p50_ms": ordered[last // 2] * 1000,
+            "p95_ms": ordered[int(last * 0.95)] * 1000,
+            "max_ms": ordered[-1] * 1000,
+            "mean_ms": sum(ordered) / len(ordered) * 1000,
+        }
+
+    def cumulative_buckets(self):
+        running = 0
+        for limit, count in zip(self.buckets, self._bucket_counts):
+            running += count
+            yield limit, running
+
+
+class Metrics:
+    """
+    Métricas por estágio do loop de detecção (thread-safe).
+
+    ``span(stage)`` mede um trecho; ``snapshot()`` vira o evento periódico
+    ``metrics`` para a UI e ``to_prometheus()`` o texto exportado em arquivo
+    ou no endpoint HTTP local.
+    """
+
+    def __init__(self, window: int = 500, buckets=DEFAULT_BUCKETS):
+        self.window = window
+        self.buckets = buckets
+        self._histograms: Dict[str, RollingHistogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = RollingHistogram(self.window, self.buckets)
+                self._histograms[stage] = histogram
+            histogram.observe(seconds)
+
+    def increment(self, counter: str, value: int = 1):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + value
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        """Resumo atual: percentis por estágio, contadores e FPS médio"""
+        with self._lock:
+            stages = {name: h.summary() for name, h in self._histograms.items()}
+            counters = dict(self._counters)
+        elapsed = time.monotonic() - self._started_at
+        frames = stages.get("frame", {}).get("count", 0)
+        return {
+            "stages": stages,
+            "counters": counters,
+            "fps": frames / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def to_prometheus(self, prefix: str = "takt", labels: Optional[dict] = None) -> str:
+        """Texto no formato de exposição do Prometheus"""
+        base = "".join(f',{key}="{value}"' for key, value in (labels or {}).items())
+        lines = [
+            f"# HELP {prefix}_stage_seconds Duração de cada estágio do loop de detecção",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                tags = f'stage="{stage}"{base}'
+                for limit, count in histogram.cumulative_buckets():
+                    lines.append(f'{prefix}_stage_seconds_bucket{{{tags},le="{limit}"}} {count}')
+                lines.append(f'{prefix}_stage_seconds_bucket{{{tags},le="+Inf"}} {histogram.count}')
+                lines.append(f"{prefix}_stage_seconds_sum{{{tags}}} {histogram.total:.6f}")
+                lines.append(f"{prefix}_stage_seconds_count{{{tags}}} {histogram.count}")
+            counter_tags = f"{{{base.lstrip(',')}}}" if base else ""
+            for counter, value in sorted(self._counters.items()):
+                lines.append(f"# TYPE {prefix}_{counter}_total counter")
+                lines.append(f"{prefix}_{counter}_total{counter_tags} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str, labels: Optional[dict] = None):
+        """Grava o texto do Prometheus de forma atômica (textfile collector)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus(labels=labels))
+        os.replace(tmp_path, path)
+
+
+def span(metrics: Optional[Metrics], stage: str):
+    """``metrics.span(stage)`` ou um contexto vazio sem métricas"""
+    return metrics.span(stage) if metrics is not None else nullcontext()
+
+
+def start_metrics_server(
+    metrics: Metrics, port: int, host: str = "127.0.0.1", labels: Optional[dict] = None
+) -> ThreadingHTTPServer:
+    """Endpoint HTTP local (``/metrics``) em thread daemon"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/metrics"):
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus(labels=labels).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"metrics http: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    thread = threading.Thread(
+        target=server.serve_forever, name="takt-metrics-http", daemon=True
+    )
+    thread.start()
+    logger.info(f"📈 Métricas disponíveis em http://{host}:{port}/metrics")
+    return server
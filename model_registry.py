@@ -0,0 +1,102 @@
+import logging
+import os
+import threading
+from typing import Optional
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+def detector_options(tech_config: dict) -> dict:
+    """Opções do detector a partir da seção ``tech`` do config.json"""
+    return {
+        # "torch" (ultralytics), "onnx" (ONNX Runtime) ou "openvino"
+        "backend": tech_config.get("inference_backend", "torch"),
+        "threads": int(tech_config.get("inference_threads", 0)) or None,
+        # Variante quantizada gerada por scripts/model_variants.py
+        "variant_path": tech_config.get("model_variant") or None,
+    }
+
+
+class ModelRegistry:
+    """
+    Registro do detector compartilhado pelo processo.
+
+    O modelo é carregado e aquecido uma única vez (normalmente pelo
+    ``InitializationWorker`` ao abrir o app) e a mesma instância é entregue
+    a cada execução de ``main.main()``, inclusive após Parar/Iniciar. Se a
+    configuração mudar, o detector anterior é descartado e um novo é
+    carregado.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._detector = None
+
+    @staticmethod
+    def _make_key(model_path, backend, threads, variant_path):
+        variant = os.path.abspath(variant_path) if variant_path else None
+        return (os.path.abspath(model_path), backend, threads, variant)
+
+    def get(
+        self,
+        model_path: str,
+        backend: str = "torch",
+        threads: Optional[int] = None,
+        variant_path: Optional[str] = None,
+    ):
+        """
+        Retorna o detector aquecido, carregando-o se necessário.
+
+        Chamadas concorrentes esperam a carga em andamento em vez de carregar
+        o modelo de novo.
+        """
+        key = self._make_key(model_path, backend, threads, variant_path)
+        with self._lock:
+            if self._detector is not None and self._key == key:
+                logger.debug("Reutilizando detector já carregado")
+                return self._detector
+
+            if self._detector is not None:
+                logger.info("Configuração do modelo mudou - recarregando detector")
+            # Libera o anterior antes de carregar para não manter dois na memória
+            self._detector = None
+            self._key = None
+
+            from detector import create_detector
+
+            logger.info(f"Carregando modelo YOLO de: {model_path}")
+            detector = create_detector(
+                model_path, backend, threads, variant_path=variant_path
+            )
+            logger.info("Aquecendo modelo YOLO...")
+            detector.warmup()
+            logger.info("Modelo carregado e aquecido!")
+
+            self._detector = detector
+            self._key = key
+            return detector
+
+    def clear(self):
+        """Descarta o detector carregado"""
+        with self._lock:
+            self._detector = None
+            self._key = None
+
+
+_registry = ModelRegistry()
+
+
+def get_detector(
+    model_path: str,
+    backend: str = "torch",
+    threads: Optional[int] = None,
+    variant_path: Optional[str] = None,
+):
+    """Detector compartilhado do processo (ver ``ModelRegistry.get``)"""
+    return _registry.get(model_path, backend, threads, variant_path)
+
+
+def clear_detector():
+    _registry.clear()
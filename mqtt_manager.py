@@ -1,28 +1,66 @@
 import paho.mqtt.client as mqtt
-from datetime import datetime, timedelta
+import asyncio
+import concurrent.futures
+from datetime import datetime
+import heapq
 import json
 import threading
 import time
 import logging
-from typing import Optional, Callable, Dict
+from types import MappingProxyType
+from typing import AsyncIterator, Optional, Callable, Dict, List, Mapping, Tuple
+
+from telemetry import TELEMETRY_TOPIC, TelemetryBatcher, TelemetryFlusher, create_serializer
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
+# Assinaturas curinga: dois tópicos no broker independentemente do número de células
+STATUS_WILDCARD_TOPIC = "takt/device/+/status"
+HEARTBEAT_WILDCARD_TOPIC = "takt/device/+/heartbeat"
+
 
 class DeviceStatus:
     """Classe para armazenar status do dispositivo"""
 
+    __slots__ = (
+        "device_id",
+        "connected",
+        "last_seen",
+        "last_seen_at",
+        "last_heartbeat",
+        "status_topic",
+        "heartbeat_topic",
+        "command_topic",
+    )
+
     def __init__(self, device_id: str):
         self.device_id = device_id
         self.connected = False
         self.last_seen: Optional[datetime] = None
+        # Relógio monotônico da última mensagem (base do prazo de timeout)
+        self.last_seen_at: Optional[float] = None
         self.last_heartbeat: Optional[dict] = None
         self.status_topic = f"takt/device/{device_id}/status"
         self.heartbeat_topic = f"takt/device/{device_id}/heartbeat"
         self.command_topic = f"takt/device/{device_id}"
 
 
+class StatusSnapshot:
+    """
+    Visão imutável do status de conexão dos dispositivos.
+
+    Recriada a cada mudança e trocada por atribuição simples: quem lê pega a
+    referência atual e tem uma visão consistente, sem lock nem cópia.
+    """
+
+    __slots__ = ("version", "status")
+
+    def __init__(self, version: int, status: Mapping[str, bool]):
+        self.version = version
+        self.status = status
+
+
 class MQTTManager:
     """Gerenciador MQTT para comunicação com ESP32"""
 
@@ -33,19 +71,40 @@ class MQTTManager:
         username: str = None,
         password: str = None,
         timeout_seconds: int = 60,
+        wildcard_subscriptions: Optional[bool] = None,
+        publish_timeout: float = 5.0,
     ):
         self.broker = broker
         self.port = port
         self.username = username
         self.password = password
         self.timeout_seconds = timeout_seconds
+        # None = curinga só com mais de um dispositivo (uma estação não recebe a planta toda)
+        self.wildcard_subscriptions = wildcard_subscriptions
+        # Espera máxima pelo PUBACK nos publishes confirmados
+        self.publish_timeout = publish_timeout
 
         self.client = mqtt.Client()
         self.devices: Dict[str, DeviceStatus] = {}
+        # Tópico -> (dispositivo, "status"/"heartbeat"), mantido por add_device
+        self._topic_index: Dict[str, Tuple[DeviceStatus, str]] = {}
+        self._wildcard_subscribed = False
         self.monitoring = False
+        self._monitor_thread: Optional[threading.Thread] = None
+        # Heap de prazos (instante monotônico, device_id): no máximo uma entrada por dispositivo
+        self._deadlines: List[Tuple[float, str]] = []
+        self._scheduled = set()
+        self._deadline_cond = threading.Condition()
+        # Status publicado para leitores de outras threads (ex.: loop de detecção)
+        self._snapshot = StatusSnapshot(0, MappingProxyType({}))
+        self._snapshot_lock = threading.Lock()
         self.on_status_change_callback: Optional[Callable] = None
         self._connected = False
         self._connect_event = threading.Event()
+        # Telemetria em lote (opcional, ver enable_telemetry)
+        self.telemetry_topic: Optional[str] = None
+        self._telemetry: Optional[TelemetryBatcher] = None
+        self._telemetry_flusher: Optional[TelemetryFlusher] = None
 
         # Configurar callbacks
         self.client.on_connect = self._on_connect
@@ -60,10 +119,32 @@ class MQTTManager:
         if device_id not in self.devices:
             new_device = DeviceStatus(device_id)
             self.devices[device_id] = new_device
+            self._topic_index[new_device.status_topic] = (new_device, "status")
+            self._topic_index[new_device.heartbeat_topic] = (new_device, "heartbeat")
+            with self._snapshot_lock:
+                self._publish_status(new_device.device_id, False)
             logger.info(f"📱 Dispositivo adicionado: {device_id}")
             logger.debug(f"   Status Topic: {new_device.status_topic}")
             logger.debug(f"   Heartbeat Topic: {new_device.heartbeat_topic}")
             logger.debug(f"   Command Topic: {new_device.command_topic}")
+
+            # Já conectado sem curinga: assina os tópicos do novo dispositivo agora
+            if self._connected and not self._wildcard_subscribed:
+                if self._use_wildcards():
+                    # Passou a vários dispositivos (ex.: estações adicionadas depois
+                    # do connect): troca os tópicos exatos pelos curingas
+                    exact = [
+                        topic
+                        for topic in self._topic_index
+                        if topic not in (new_device.status_topic, new_device.heartbeat_topic)
+                    ]
+                    self._subscribe(self.client)
+                    if exact:
+                        self.client.unsubscribe(exact)
+                else:
+                    self.client.subscribe(
+                        [(new_device.status_topic, 0), (new_device.heartbeat_topic, 0)]
+                    )
         else:
             logger.warning(f"Dispositivo {device_id} já está adicionado.")
 
@@ -80,11 +161,7 @@ class MQTTManager:
             if self._connect_event.wait(timeout):
                 if self._connected:
                     # Iniciar thread de monitoramento
-                    self.monitoring = True
-                    monitor_thread = threading.Thread(target=self._monitor_devices)
-                    monitor_thread.daemon = True
-                    monitor_thread.start()
-                    logger.info("Thread de monitoramento iniciada")
+                    self._start_monitor()
 
                     logger.info(f"Conectado ao broker MQTT: {self.broker}:{self.port}")
                     return True
@@ -107,12 +184,7 @@ class MQTTManager:
             self._connect_event.set()
             logger.info("Conectado ao broker MQTT")
 
-            # Inscrever nos tópicos de todos os dispositivos
-            for device_id, device in self.devices.items():
-                client.subscribe(device.status_topic)
-                client.subscribe(device.heartbeat_topic)
-                print(f"Inscrito em: {device.status_topic}")
-                print(f"Inscrito em: {device.heartbeat_topic}")
+            self._subscribe(client)
         else:
             self._connected = False
             self._connect_event.set()
@@ -126,6 +198,28 @@ class MQTTManager:
             error_msg = error_messages.get(rc, f"Código desconhecido: {rc}")
             logger.error(f"Falha na conexão MQTT: {error_msg}")
 
+    def _use_wildcards(self) -> bool:
+        if self.wildcard_subscriptions is not None:
+            return self.wildcard_subscriptions
+        return len(self.devices) > 1
+
+    def _subscribe(self, client):
+        """Assina status e heartbeat: curingas ou os tópicos de cada dispositivo"""
+        if self._use_wildcards():
+            client.subscribe([(STATUS_WILDCARD_TOPIC, 0), (HEARTBEAT_WILDCARD_TOPIC, 0)])
+            self._wildcard_subscribed = True
+            logger.info(
+                f"Inscrito em: {STATUS_WILDCARD_TOPIC}, {HEARTBEAT_WILDCARD_TOPIC} "
+                f"({len(self.devices)} dispositivos)"
+            )
+            return
+
+        self._wildcard_subscribed = False
+        topics = [(topic, 0) for topic in list(self._topic_index)]
+        if topics:
+            client.subscribe(topics)
+            logger.info(f"Inscrito em: {', '.join(topic for topic, _ in topics)}")
+
     def _on_disconnect(self, client, userdata, rc):
         """Callback de desconexão"""
         self._connected = False
@@ -136,45 +230,32 @@ class MQTTManager:
 
     def _on_message(self, client, userdata, msg):
         """Callback para processar mensagens"""
-        topic = msg.topic
-        payload = msg.payload.decode()
-
-        # Encontrar dispositivo pelo tópico
-        device = None
-        for dev in self.devices.values():
-            if topic == dev.status_topic or topic == dev.heartbeat_topic:
-                device = dev
-                break
-
-        if not device:
+        # Encontrar dispositivo pelo tópico (curingas também trazem células não monitoradas)
+        entry = self._topic_index.get(msg.topic)
+        if entry is None:
             return
+        device, kind = entry
+        payload = msg.payload.decode()
 
         # Processar mensagem de status
-        if topic == device.status_topic:
-            old_status = device.connected
-            device.connected = payload == "online"
-            device.last_seen = datetime.now()
+        if kind == "status":
+            self._touch(device)
+            changed = self._set_connected(device, payload == "online")
 
             status_emoji = "🟢" if device.connected else "🔴"
             logger.info(f"{status_emoji} {device.device_id}: {payload}")
 
             # Notificar mudança de status
-            if old_status != device.connected and self.on_status_change_callback:
-                try:
-                    self.on_status_change_callback(device.device_id, device.connected)
-                except Exception as e:
-                    logger.error(
-                        f"Erro no callback de mudança de status: {e}", exc_info=True
-                    )
+            if changed:
+                self._emit_status_change(device.device_id, device.connected)
 
         # Processar heartbeat
-        elif topic == device.heartbeat_topic:
+        else:
             try:
                 heartbeat_data = json.loads(payload)
-                old_status = device.connected
                 device.last_heartbeat = heartbeat_data
-                device.last_seen = datetime.now()
-                device.connected = True
+                self._touch(device)
+                changed = self._set_connected(device, True)
 
                 logger.debug(
                     f"Heartbeat de {device.device_id}: "
@@ -184,51 +265,136 @@ class MQTTManager:
                 )
                 
                 # Notificar mudança de status se passou de offline para online
-                if not old_status and device.connected and self.on_status_change_callback:
-                    try:
-                        logger.info(f"🟢 {device.device_id}: online (via heartbeat)")
-                        self.on_status_change_callback(device.device_id, device.connected)
-                    except Exception as e:
-                        logger.error(
-                            f"Erro no callback de mudança de status (heartbeat): {e}", exc_info=True
-                        )
+                if changed:
+                    logger.info(f"🟢 {device.device_id}: online (via heartbeat)")
+                    self._emit_status_change(device.device_id, True, "heartbeat")
             except json.JSONDecodeError as e:
                 logger.error(f"⚠️  Erro ao decodificar heartbeat de {device.device_id}: {e}")
 
+    def _emit_status_change(self, device_id: str, connected: bool, source: str = "status"):
+        """Notifica o callback de mudança de status"""
+        if not self.on_status_change_callback:
+            return
+        try:
+            self.on_status_change_callback(device_id, connected)
+        except Exception as e:
+            logger.error(f"Erro no callback de mudança de status ({source}): {e}", exc_info=True)
+
+    def _publish_status(self, device_id: str, connected: bool):
+        """Gera um novo snapshot com o status do dispositivo e o troca (com _snapshot_lock)"""
+        current = self._snapshot
+        status = dict(current.status)
+        status[device_id] = connected
+        self._snapshot = StatusSnapshot(current.version + 1, MappingProxyType(status))
+
+    def _set_connected(self, device: DeviceStatus, connected: bool) -> bool:
+        """Atualiza o status do dispositivo; retorna True se mudou"""
+        with self._snapshot_lock:
+            if device.connected == connected:
+                return False
+            device.connected = connected
+            self._publish_status(device.device_id, connected)
+            return True
+
+    def _expire(self, device: DeviceStatus) -> bool:
+        """Marca offline se o prazo ainda está vencido; retorna True se mudou"""
+        with self._snapshot_lock:
+            # Uma mensagem pode ter chegado entre o vencimento e aqui
+            if time.monotonic() - device.last_seen_at < self.timeout_seconds:
+                return False
+            if not device.connected:
+                return False
+            device.connected = False
+            self._publish_status(device.device_id, False)
+            return True
+
+    def _touch(self, device: DeviceStatus):
+        """Registra atividade do dispositivo e agenda o prazo de timeout"""
+        device.last_seen = datetime.now()
+        with self._deadline_cond:
+            device.last_seen_at = time.monotonic()
+            if device.device_id in self._scheduled:
+                # O prazo antigo é reagendado quando vencer (last_seen_at avançou)
+                return
+            heapq.heappush(
+                self._deadlines, (device.last_seen_at + self.timeout_seconds, device.device_id)
+            )
+            self._scheduled.add(device.device_id)
+            if self._deadlines[0][1] == device.device_id:
+                self._deadline_cond.notify()
+
+    def _start_monitor(self):
+        self._stop_monitor()
+        self.monitoring = True
+        self._monitor_thread = threading.Thread(
+            target=self._monitor_devices, name="mqtt-device-timeouts", daemon=True
+        )
+        self._monitor_thread.start()
+        logger.info("Thread de monitoramento iniciada")
+
+    def _stop_monitor(self):
+        self.monitoring = False
+        with self._deadline_cond:
+            self._deadline_cond.notify_all()
+        thread = self._monitor_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        self._monitor_thread = None
+
+    def _next_expired(self) -> Optional[DeviceStatus]:
+        """Espera o próximo prazo vencer; retorna o dispositivo expirado ou None ao parar"""
+        with self._deadline_cond:
+            while self.monitoring:
+                if not self._deadlines:
+                    self._deadline_cond.wait()
+                    continue
+
+                deadline, device_id = self._deadlines[0]
+                now = time.monotonic()
+                if deadline > now:
+                    self._deadline_cond.wait(deadline - now)
+                    continue
+
+                heapq.heappop(self._deadlines)
+                device = self.devices.get(device_id)
+                if device is None:
+                    self._scheduled.discard(device_id)
+                    continue
+                current_deadline = device.last_seen_at + self.timeout_seconds
+                if current_deadline > now:
+                    # Houve mensagem depois do agendamento: reagenda no prazo atual
+                    heapq.heappush(self._deadlines, (current_deadline, device_id))
+                    continue
+                self._scheduled.discard(device_id)
+                return device
+        return None
+
     def _monitor_devices(self):
-        """Thread para monitorar timeout de dispositivos"""
-        while self.monitoring:
-            for device in self.devices.values():
-                if device.last_seen:
-                    timeout = datetime.now() - timedelta(seconds=self.timeout_seconds)
-
-                    if device.connected and device.last_seen < timeout:
-                        old_status = device.connected
-                        device.connected = False
-                        logger.warning(
-                            f"{device.device_id} timeout - marcado como offline"
-                        )
-
-                        if self.on_status_change_callback:
-                            try:
-                                self.on_status_change_callback(device.device_id, False)
-                            except Exception as e:
-                                logger.error(
-                                    f"Erro no callback de timeout: {e}", exc_info=True
-                                )
-
-            time.sleep(10)  # Verificar a cada 10 segundos
+        """Thread que marca offline cada dispositivo no instante em que o prazo vence"""
+        while True:
+            device = self._next_expired()
+            if device is None:
+                break
+            if not self._expire(device):
+                continue
+
+            logger.warning(f"{device.device_id} timeout - marcado como offline")
+            self._emit_status_change(device.device_id, False, "timeout")
         logger.debug("Thread de monitoramento finalizada")
 
     def is_device_connected(self, device_id: str) -> bool:
         """Verifica se um dispositivo está conectado"""
-        device = self.devices.get(device_id)
-        return device.connected if device else False
+        return self._snapshot.status.get(device_id, False)
+
+    @property
+    def device_status(self) -> Mapping[str, bool]:
+        """Status de conexão de todos os dispositivos (snapshot imutável, sem cópia)"""
+        return self._snapshot.status
 
     @property
-    def device_status(self) -> Dict[str, bool]:
-        """Retorna dicionário com status de conexão de todos os dispositivos"""
-        return {device_id: device.connected for device_id, device in self.devices.items()}
+    def status_version(self) -> int:
+        """Versão do snapshot de status; muda a cada alteração de conexão"""
+        return self._snapshot.version
 
     def get_device_info(self, device_id: str) -> Optional[dict]:
         """Retorna informações do dispositivo"""
@@ -247,16 +413,51 @@ class MQTTManager:
         }
 
     def publish_command(self, device_id: str, command: dict, qos: int = 1) -> bool:
-        """Publica comando para um dispositivo"""
+        """
+        Publica comando para um dispositivo. True indica só que o paho aceitou
+        a mensagem na fila local; para aguardar o broker use
+        ``publish_command_confirmed``.
+        """
+        return self._publish_command(device_id, command, qos) is not None
+
+    def publish_command_threadsafe(self, device_id: str, command: dict, qos: int = 1) -> bool:
+        """Publica de outra thread (ex.: a UI); o paho com thread própria já é thread-safe"""
+        return self.publish_command(device_id, command, qos)
+
+    def publish_command_confirmed(self, device_id: str, command: dict, qos: int = 1) -> bool:
+        """
+        Publica e bloqueia até o PUBACK do broker (QoS 1), no máximo
+        ``publish_timeout`` segundos. Bloqueante: fora do event loop.
+        """
+        result = self._publish_command(device_id, command, qos)
+        if result is None:
+            return False
+        if qos == 0:
+            return True
+        try:
+            result.wait_for_publish(self.publish_timeout)
+        except (RuntimeError, ValueError) as e:
+            logger.error(f"Publish para {device_id} não saiu: {e}")
+            return False
+        if not result.is_published():
+            logger.error(f"Sem PUBACK do broker em {self.publish_timeout:.0f}s para {device_id}")
+            return False
+        logger.info(f"Comando confirmado pelo broker para {device_id}")
+        return True
+
+    def _publish_command(
+        self, device_id: str, command: dict, qos: int
+    ) -> Optional[mqtt.MQTTMessageInfo]:
+        """Entrega o comando ao paho; retorna o MQTTMessageInfo ou None em erro"""
         if not self._connected:
             logger.error("Não conectado ao broker MQTT")
-            return False
+            return None
 
         print(f"Publicando comando para {device_id}: {command}")
         device = self.devices.get(device_id)
         if not device:
             logger.error(f"Dispositivo {device_id} não encontrado")
-            return False
+            return None
 
         if not device.connected:
             logger.warning(f"{device_id} está offline!")
@@ -267,21 +468,88 @@ class MQTTManager:
 
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
                 logger.info(f"Comando enviado para {device_id}: {payload}")
-                return True
+                return result
             else:
                 logger.error(f"Falha ao enviar comando: {result.rc}")
-                return False
+                return None
         except Exception as e:
             logger.error(f"Erro ao publicar: {e}")
-            return False
+            return None
 
     def on_status_change(self, callback: Callable):
         """Define callback para mudanças de status"""
         self.on_status_change_callback = callback
 
+    # ----- Telemetria em lote -----
+
+    def enable_telemetry(
+        self,
+        source: str,
+        topic: Optional[str] = None,
+        serializer: str = "auto",
+        max_events: int = 100,
+        max_interval: float = 1.0,
+    ):
+        """
+        Liga a telemetria em lote: eventos de ``publish_telemetry`` são agrupados
+        e publicados com QoS 0 em ``topic`` (padrão ``takt/telemetry/<source>``),
+        separados dos comandos dos ESP32.
+        """
+        self.disable_telemetry()
+        self.telemetry_topic = topic or TELEMETRY_TOPIC.format(source=source)
+        self._telemetry = TelemetryBatcher(
+            self._publish_telemetry_batch,
+            source,
+            create_serializer(serializer),
+            max_events=max_events,
+            max_interval=max_interval,
+        )
+        self._start_telemetry_flush()
+        logger.info(
+            f"📊 Telemetria em lote: {self.telemetry_topic} "
+            f"({self._telemetry.serializer.name}, até {max_events} eventos ou {max_interval:g}s)"
+        )
+
+    def disable_telemetry(self):
+        """Envia o lote pendente e desliga a telemetria"""
+        if self._telemetry is None:
+            return
+        self._stop_telemetry_flush()
+        self._telemetry.flush()
+        logger.info(
+            f"📊 Telemetria encerrada: {self._telemetry.sent_batches} lote(s) enviados, "
+            f"{self._telemetry.dropped_batches} descartado(s)"
+        )
+        self._telemetry = None
+
+    def publish_telemetry(self, kind: str, data) -> bool:
+        """Enfileira um evento de telemetria (takt, métricas, estado da tela)"""
+        telemetry = self._telemetry
+        if telemetry is None:
+            return False
+        telemetry.add(kind, data)
+        return True
+
+    def _publish_telemetry_batch(self, payload: bytes) -> bool:
+        if not self._connected:
+            return False
+        result = self.client.publish(self.telemetry_topic, payload, qos=0)
+        return result.rc == mqtt.MQTT_ERR_SUCCESS
+
+    def _start_telemetry_flush(self):
+        self._telemetry_flusher = TelemetryFlusher(self._telemetry)
+        self._telemetry_flusher.start()
+
+    def _stop_telemetry_flush(self):
+        if self._telemetry_flusher is not None:
+            self._telemetry_flusher.stop()
+            self._telemetry_flusher = None
+
     def disconnect(self):
         """Desconecta do broker"""
-        self.monitoring = False
+        if self._telemetry is not None:
+            self._telemetry.flush()
+        self._stop_monitor()
         self.client.loop_stop()
         self.client.disconnect()
         self._connected = False
@@ -312,3 +580,299 @@ class MQTTManager:
         
         # Tenta conectar novamente
         return self.connect(timeout=timeout)
+
+
+class AsyncMQTTManager(MQTTManager):
+    """
+    Variante do MQTTManager integrada ao event loop do asyncio.
+
+    O socket do paho é servido pelo próprio loop (``add_reader``/``add_writer``
+    e ``loop_misc`` periódico), sem a thread do ``loop_start()``. Os callbacks
+    do paho, os timeouts dos dispositivos (``call_later``) e os publishes
+    rodam todos no mesmo loop que o rastreador. ``publish_command`` é uma
+    corrotina que termina no PUBACK (QoS 1) e ``status_changes()`` entrega as
+    mudanças de conexão como fluxo assíncrono.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._connected_event: Optional[asyncio.Event] = None
+        self._misc_task: Optional[asyncio.Task] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._pending_acks: Dict[int, asyncio.Future] = {}
+        self._timeout_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._status_queues: List[asyncio.Queue] = []
+        self._telemetry_task: Optional[asyncio.Task] = None
+
+        self.client.on_publish = self._on_publish
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_socket_register_write
+        self.client.on_socket_unregister_write = self._on_socket_unregister_write
+
+    # ----- Integração do socket com o event loop -----
+
+    def _in_loop(self, fn, *args):
+        """Executa no loop (o connect TCP roda num executor)"""
+        if threading.get_ident() == self._loop_thread:
+            fn(*args)
+        elif self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _on_socket_open(self, client, userdata, sock):
+        self._in_loop(self._loop.add_reader, sock, client.loop_read)
+
+    def _on_socket_close(self, client, userdata, sock):
+        self._in_loop(self._loop.remove_reader, sock)
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._in_loop(self._loop.add_writer, sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._in_loop(self._loop.remove_writer, sock)
+
+    async def _misc_loop(self):
+        """Keepalive e retransmissões do paho (equivalente ao loop da thread)"""
+        while True:
+            self.client.loop_misc()
+            await asyncio.sleep(1)
+
+    # ----- Conexão -----
+
+    async def connect(self, timeout: int = 10) -> bool:
+        """Conecta ao broker no loop atual"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._connected_event = asyncio.Event()
+        self._stopping = False
+        self._connected = False
+
+        try:
+            # Resolução de nome e connect TCP bloqueiam: ficam fora do loop
+            await self._loop.run_in_executor(
+                None, self.client.connect, self.broker, self.port, 60
+            )
+        except Exception as e:
+            logger.error(f"Erro ao conectar ao broker: {e}", exc_info=True)
+            return False
+
+        if self._misc_task is None or self._misc_task.done():
+            self._misc_task = self._loop.create_task(self._misc_loop())
+
+        try:
+            await asyncio.wait_for(self._connected_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout ao conectar ao broker ({timeout}s)")
+            self.disconnect()
+            return False
+
+        if not self._connected:
+            logger.error("Conexão recusada pelo broker")
+            self.disconnect()
+            return False
+
+        logger.info(f"Conectado ao broker MQTT (asyncio): {self.broker}:{self.port}")
+        return True
+
+    def _on_connect(self, client, userdata, flags, rc):
+        super()._on_connect(client, userdata, flags, rc)
+        if self._connected_event is not None:
+            self._connected_event.set()
+
+    def _on_disconnect(self, client, userdata, rc):
+        super()._on_disconnect(client, userdata, rc)
+        if self._connected_event is not None:
+            self._connected_event.clear()
+        if not self._stopping and (self._reconnect_task is None or self._reconnect_task.done()):
+            self._reconnect_task = self._loop.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self, max_delay: float = 30.0):
+        """Reconecta com backoff exponencial (o loop_start() fazia isso na thread)"""
+        delay = 1.0
+        while not self._stopping and not self._connected:
+            await asyncio.sleep(delay)
+            logger.info("Tentando reconectar ao broker MQTT...")
+            try:
+                await self._loop.run_in_executor(None, self.client.reconnect)
+                await asyncio.wait_for(self._connected_event.wait(), 10)
+            except Exception as e:
+                logger.warning(f"Reconexão MQTT falhou: {e}")
+                delay = min(delay * 2, max_delay)
+
+    async def reconnect(self, timeout: int = 10) -> bool:
+        """Tenta reconectar ao broker MQTT"""
+        if self._connected:
+            logger.info("Já está conectado ao broker MQTT")
+            return True
+        self.disconnect()
+        await asyncio.sleep(1)
+        return await self.connect(timeout=timeout)
+
+    def disconnect(self):
+        """Desconecta do broker e libera tarefas, timers e publishes pendentes"""
+        self._stopping = True
+        for task in (self._misc_task, self._reconnect_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._misc_task = self._reconnect_task = None
+        self._stop_monitor()
+
+        for future in self._pending_acks.values():
+            if not future.done():
+                future.set_result(False)
+        self._pending_acks.clear()
+
+        try:
+            if self._telemetry is not None:
+                self._telemetry.flush()
+            self.client.disconnect()
+            if threading.get_ident() == self._loop_thread:
+                # Envia o DISCONNECT agora: o loop pode parar logo em seguida
+                self.client.loop_write()
+        except Exception as e:
+            logger.debug(f"Erro ao desconectar (pode ser normal): {e}")
+        # O log de desconexão vem do _on_disconnect quando o DISCONNECT é enviado
+        self._connected = False
+
+    # ----- Telemetria -----
+
+    def _start_telemetry_flush(self):
+        """Sem thread: o envio periódico é uma tarefa do loop (chamar dentro dele)"""
+        self._telemetry_task = asyncio.ensure_future(self._telemetry_flush_loop(self._telemetry))
+
+    def _stop_telemetry_flush(self):
+        if self._telemetry_task is not None and not self._telemetry_task.done():
+            self._telemetry_task.cancel()
+        self._telemetry_task = None
+
+    async def _telemetry_flush_loop(self, batcher: TelemetryBatcher):
+        while True:
+            await asyncio.sleep(batcher.max_interval)
+            batcher.flush()
+
+    # ----- Timeout dos dispositivos -----
+
+    def _start_monitor(self):
+        """Sem thread: os prazos são timers do próprio loop"""
+
+    def _stop_monitor(self):
+        for handle in self._timeout_handles.values():
+            handle.cancel()
+        self._timeout_handles.clear()
+
+    def _touch(self, device: DeviceStatus):
+        device.last_seen = datetime.now()
+        device.last_seen_at = time.monotonic()
+        # Um timer por dispositivo; se a mensagem adiou o prazo, ele se reagenda ao vencer
+        if device.device_id not in self._timeout_handles and self._loop is not None:
+            self._schedule_timeout(device, self.timeout_seconds)
+
+    def _schedule_timeout(self, device: DeviceStatus, delay: float):
+        self._timeout_handles[device.device_id] = self._loop.call_later(
+            delay, self._check_timeout, device
+        )
+
+    def _check_timeout(self, device: DeviceStatus):
+        remaining = device.last_seen_at + self.timeout_seconds - time.monotonic()
+        if remaining > 0:
+            self._schedule_timeout(device, remaining)
+            return
+        self._timeout_handles.pop(device.device_id, None)
+        if self._expire(device):
+            logger.warning(f"{device.device_id} timeout - marcado como offline")
+            self._emit_status_change(device.device_id, False, "timeout")
+
+    # ----- Status como fluxo assíncrono -----
+
+    def _emit_status_change(self, device_id: str, connected: bool, source: str = "status"):
+        super()._emit_status_change(device_id, connected, source)
+        for queue in self._status_queues:
+            queue.put_nowait((device_id, connected))
+
+    async def status_changes(self) -> AsyncIterator[Tuple[str, bool]]:
+        """Fluxo de mudanças de conexão: ``async for device_id, connected in ...``"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._status_queues.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._status_queues.remove(queue)
+
+    # ----- Publicação -----
+
+    def _on_publish(self, client, userdata, mid):
+        future = self._pending_acks.get(mid)
+        if future is not None and not future.done():
+            future.set_result(True)
+
+    async def publish_command(self, device_id: str, command: dict, qos: int = 1) -> bool:
+        """Publica comando; com QoS 1 só retorna True após o PUBACK do broker"""
+        if not self._connected:
+            logger.error("Não conectado ao broker MQTT")
+            return False
+
+        device = self.devices.get(device_id)
+        if not device:
+            logger.error(f"Dispositivo {device_id} não encontrado")
+            return False
+
+        if not device.connected:
+            logger.warning(f"{device_id} está offline!")
+
+        try:
+            payload = json.dumps(command)
+            result = self.client.publish(device.command_topic, payload, qos=qos)
+        except Exception as e:
+            logger.error(f"Erro ao publicar: {e}")
+            return False
+
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            logger.error(f"Falha ao enviar comando: {result.rc}")
+            return False
+        if qos == 0:
+            logger.info(f"Comando enviado para {device_id}: {payload}")
+            return True
+
+        # O PUBACK só é lido depois deste await, no mesmo loop: sem corrida com o registro
+        future = self._loop.create_future()
+        self._pending_acks[result.mid] = future
+        try:
+            acked = await asyncio.wait_for(future, self.publish_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Sem PUBACK do broker em {self.publish_timeout:.0f}s para {device_id}")
+            return False
+        finally:
+            self._pending_acks.pop(result.mid, None)
+
+        if acked:
+            logger.info(f"Comando confirmado pelo broker para {device_id}: {payload}")
+        return acked
+
+    async def publish_command_confirmed(self, device_id: str, command: dict, qos: int = 1) -> bool:
+        """``publish_command`` já aguarda o PUBACK no loop"""
+        return await self.publish_command(device_id, command, qos)
+
+    def publish_command_threadsafe(self, device_id: str, command: dict, qos: int = 1) -> bool:
+        """
+        Versão síncrona para outras threads (ex.: a UI): agenda
+        ``publish_command`` no loop do cliente e espera o PUBACK
+        """
+        if self._loop is None or self._loop.is_closed():
+            logger.error("Loop do cliente MQTT não está rodando")
+            return False
+        if threading.get_ident() == self._loop_thread:
+            raise RuntimeError("No loop do cliente use 'await publish_command(...)'")
+
+        future = asyncio.run_coroutine_threadsafe(
+            self.publish_command(device_id, command, qos), self._loop
+        )
+        try:
+            return future.result(self.publish_timeout + 1)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            logger.error(f"Publish para {device_id} não concluído em {self.publish_timeout + 1:.0f}s")
+            return False
@@ -0,0 +1,191 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Caracteres aceitos pelo OCR (mesma whitelist usada desde o início do projeto)
+TESS_WHITELIST = "0123456789:ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+TESSERACT_CMD = r"/usr/bin/tesseract"
+
+
+class PytesseractEngine:
+    """OCR via pytesseract: um processo tesseract por chamada (fallback)"""
+
+    name = "pytesseract"
+
+    def __init__(self, tesseract_cmd: str = TESSERACT_CMD):
+        import pytesseract
+
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self._pytesseract = pytesseract
+        self._config = (
+            r"--oem 3 "  # LSTM OCR engine
+            rf"-c tessedit_char_whitelist={TESS_WHITELIST} "
+        )
+
+    def recognize(self, image) -> str:
+        """Reconhece o texto de uma imagem (numpy, 8 bits)"""
+        return self._pytesseract.image_to_string(image, config=self._config)
+
+    def recognize_with_confidence(self, image) -> Tuple[str, float]:
+        """Reconhece o texto e retorna (texto, confiança média 0-1) numa só chamada"""
+        data = self._pytesseract.image_to_data(
+            image, config=self._config, output_type=self._pytesseract.Output.DICT
+        )
+        words = [
+            (word, float(conf))
+            for word, conf in zip(data["text"], data["conf"])
+            if word.strip()
+        ]
+        confidences = [conf for _, conf in words if conf >= 0]
+        text = " ".join(word for word, _ in words)
+        confidence = sum(confidences) / len(confidences) / 100 if confidences else 0.0
+        return text, confidence
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine:
+    """
+    OCR em processo via tesserocr (API C do Tesseract).
+
+    O modelo LSTM é carregado uma única vez e reaproveitado entre chamadas,
+    sem fork de processo nem arquivo temporário por ROI.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = "eng"):
+        import tesserocr
+
+        self._api = tesserocr.PyTessBaseAPI(lang=lang, oem=tesserocr.OEM.DEFAULT)
+        self._api.SetVariable("tessedit_char_whitelist", TESS_WHITELIST)
+        # A API do Tesseract não é reentrante
+        self._lock = threading.Lock()
+
+    def recognize(self, image) -> str:
+        """Reconhece o texto de uma imagem (numpy, 8 bits)"""
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        with self._lock:
+            self._api.SetImageBytes(
+                image.tobytes(), width, height, channels, width * channels
+            )
+            return self._api.GetUTF8Text()
+
+    def recognize_with_confidence(self, image) -> Tuple[str, float]:
+        """Reconhece o texto e retorna (texto, confiança média 0-1)"""
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        with self._lock:
+            self._api.SetImageBytes(
+                image.tobytes(), width, height, channels, width * channels
+            )
+            text = self._api.GetUTF8Text()
+            return text, self._api.MeanTextConf() / 100
+
+    def close(self):
+        with self._lock:
+            self._api.End()
+
+
+OCR_BACKENDS = {
+    "tesserocr": TesserocrEngine,
+    "pytesseract": PytesseractEngine,
+}
+
+
+def _create_tesseract_engine(backend: str):
+    candidates = ["tesserocr", "pytesseract"] if backend == "auto" else [backend]
+    if candidates[-1] != "pytesseract":
+        candidates.append("pytesseract")
+
+    for name in candidates:
+        engine_cls = OCR_BACKENDS.get(name)
+        if engine_cls is None:
+            logger.warning(f"Backend de OCR desconhecido: {name}")
+            continue
+        try:
+            return engine_cls()
+        except Exception as e:
+            logger.warning(f"Backend de OCR '{name}' indisponível: {e}")
+
+    raise RuntimeError("Nenhum backend de OCR disponível")
+
+
+def create_ocr_engine(
+    backend: str = "auto",
+    fast_path: bool = False,
+    fast_path_confidence: float = 0.75,
+    templates_dir: Optional[str] = None,
+):
+    """
+    Cria o backend de OCR configurado.
+
+    "auto" tenta o engine persistente (tesserocr) e cai para pytesseract se a
+    biblioteca não estiver instalada ou falhar ao inicializar. Com
+    ``fast_path``, o reconhecedor de dígitos por templates é tentado antes do
+    Tesseract.
+    """
+    engine = _create_tesseract_engine(backend)
+
+    if fast_path:
+        from digit_ocr import TemplateFastPathEngine
+
+        engine = TemplateFastPathEngine(
+            engine, min_confidence=fast_path_confidence, templates_dir=templates_dir
+        )
+
+    logger.info(f"Backend de OCR: {engine.name}")
+    return engine
+
+
+class OCRPool:
+    """
+    Pool de engines de OCR para reconhecer várias ROIs em paralelo.
+
+    Cada worker pega um engine livre da fila, então cada engine é usado por
+    uma thread de cada vez. Com uma única ROI o custo é o mesmo de chamar o
+    engine diretamente.
+    """
+
+    def __init__(self, engine_factory: Callable, workers: int = 2):
+        self.workers = max(1, workers)
+        self._engines = [engine_factory() for _ in range(self.workers)]
+        self._free: queue.Queue = queue.Queue()
+        for engine in self._engines:
+            self._free.put(engine)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="takt-ocr-pool"
+        )
+        self.name = self._engines[0].name
+
+    def _run(self, fn: Callable, item):
+        engine = self._free.get()
+        try:
+            return fn(engine, item)
+        finally:
+            self._free.put(engine)
+
+    def map(self, fn: Callable, items: List) -> List:
+        """Aplica ``fn(engine, item)`` a todos os itens, preservando a ordem"""
+        if len(items) == 1:
+            return [self._run(fn, items[0])]
+        futures = [self._executor.submit(self._run, fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    def close(self, timeout: float = 5.0):
+        """Encerra o pool, esperando cada engine ser devolvido antes de fechá-lo"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for _ in self._engines:
+            try:
+                engine = self._free.get(timeout=timeout)
+            except queue.Empty:
+                logger.warning("Engine de OCR ainda em uso ao encerrar o pool")
+                continue
+            engine.close()
@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class FrameResult:
+    """Resultado do processamento de um frame pelo pipeline"""
+
+    def __init__(
+        self,
+        frame,
+        boxes: List,
+        extracted: Optional[dict],
+        captured_at: float,
+        skipped: bool = False,
+    ):
+        self.frame = frame
+        self.boxes = boxes
+        self.extracted = extracted
+        self.captured_at = captured_at
+        self.skipped = skipped
+
+
+class InferencePipeline:
+    """
+    Executa captura → detecção (YOLO) → OCR fora do event loop.
+
+    Cada estágio roda no seu próprio executor de uma única thread, então o
+    event loop continua livre para cancelamento, callbacks MQTT e eventos da UI
+    enquanto o frame é processado. Quando um frame tem detecções, a captura e a
+    detecção do frame seguinte são adiantadas enquanto o OCR do frame atual
+    roda. O frame adiantado é descartado se ficar mais velho que
+    ``max_frame_age`` segundos até ser consumido.
+
+    Com um ``change_gate``, frames que não mudaram desde a última decisão
+    pulam YOLO e OCR e reutilizam o último resultado.
+    """
+
+    def __init__(
+        self,
+        capture_fn: Callable[[], Any],
+        detect_fn: Callable[[Any], List],
+        recognize_fn: Callable[[Any, List], Optional[dict]],
+        max_frame_age: float = 1.0,
+        change_gate: Optional[Any] = None,
+    ):
+        self._capture_fn = capture_fn
+        self._detect_fn = detect_fn
+        self._recognize_fn = recognize_fn
+        self.max_frame_age = max_frame_age
+        self._gate = change_gate
+
+        self._capture_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="takt-capture"
+        )
+        self._detect_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="takt-detect"
+        )
+        self._ocr_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="takt-ocr"
+        )
+        self._prefetch: Optional[asyncio.Task] = None
+
+        # Contadores simples para diagnóstico
+        self.frames = 0
+        self.prefetch_hits = 0
+        self.stale_drops = 0
+
+    def _capture(self):
+        frame = self._capture_fn()
+        cached = self._gate.check(frame) if self._gate is not None else None
+        return frame, cached
+
+    def _detect(self, frame):
+        boxes = self._detect_fn(frame)
+        if len(boxes) == 0 and self._gate is not None:
+            self._gate.update(frame, boxes, None)
+        return boxes
+
+    def _recognize(self, frame, boxes):
+        extracted = self._recognize_fn(frame, boxes)
+        if self._gate is not None:
+            self._gate.update(frame, boxes, extracted)
+        return extracted
+
+    async def _acquire(self):
+        """Captura e detecta um frame, cada estágio no seu executor"""
+        loop = asyncio.get_running_loop()
+        captured_at = time.monotonic()
+        frame, cached = await loop.run_in_executor(self._capture_executor, self._capture)
+        if cached is not None:
+            # Frame igual ao anterior: não há o que detectar
+            return frame, None, captured_at, cached
+        boxes = await loop.run_in_executor(self._detect_executor, self._detect, frame)
+        return frame, boxes, captured_at, None
+
+    async def _take_prefetched(self):
+        """Retorna o frame adiantado se ainda estiver fresco"""
+        if self._prefetch is None:
+            return None
+
+        prefetch, self._prefetch = self._prefetch, None
+        acquired = await prefetch
+        age = time.monotonic() - acquired[2]
+        if age > self.max_frame_age:
+            self.stale_drops += 1
+            logger.debug(f"Frame adiantado descartado (idade {age:.2f}s)")
+            return None
+
+        self.prefetch_hits += 1
+        return acquired
+
+    async def next(self, prefetch: bool = True) -> FrameResult:
+        """
+        Processa o próximo frame e retorna o resultado.
+
+        ``prefetch=False`` não adianta o frame seguinte; útil quando o chamador
+        vai esperar mais que ``max_frame_age`` antes da próxima chamada.
+        """
+        acquired = await self._take_prefetched()
+        if acquired is None:
+            acquired = await self._acquire()
+
+        frame, boxes, captured_at, cached = acquired
+        self.frames += 1
+
+        if cached is not None:
+            extracted = dict(cached.extracted) if cached.extracted else None
+            return FrameResult(frame, cached.boxes, extracted, captured_at, skipped=True)
+
+        if len(boxes) == 0:
+            return FrameResult(frame, boxes, None, captured_at)
+
+        if prefetch:
+            # Adianta captura + detecção do frame k+1 enquanto o OCR do frame k roda
+            self._prefetch = asyncio.ensure_future(self._acquire())
+
+        loop = asyncio.get_running_loop()
+        extracted = await loop.run_in_executor(
+            self._ocr_executor, self._recognize, frame, boxes
+        )
+        return FrameResult(frame, boxes, extracted, captured_at)
+
+    def close(self):
+        """Cancela trabalho pendente e libera os executores"""
+        if self._prefetch is not None and not self._prefetch.done():
+            self._prefetch.cancel()
+        self._prefetch = None
+
+        for executor in (
+            self._capture_executor,
+            self._detect_executor,
+            self._ocr_executor,
+        ):
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.debug(
+            f"Pipeline finalizado - frames: {self.frames}, "
+            f"adiantados usados: {self.prefetch_hits}, descartados: {self.stale_drops}"
+        )
+
+
+class BatchInferencePipeline:
+    """
+    Várias fontes de frames (estações) processadas no mesmo ciclo.
+
+    A cada ``next(indices)`` captura um frame de cada fonte pedida, roda um
+    único predict do YOLO com todos os frames que mudaram e faz o OCR das
+    caixas de cada fonte. Os estágios usam os mesmos executores de uma
+    thread do ``InferencePipeline``; não há frame adiantado, já que cada
+    fonte tem o seu próprio ritmo.
+    """
+
+    def __init__(
+        self,
+        capture_fns: List[Callable[[], Any]],
+        detect_batch_fn: Callable[[List[int], List[Any]], List[List]],
+        recognize_fn: Callable[[int, Any, List], Optional[dict]],
+        change_gates: Optional[List[Optional[Any]]] = None,
+    ):
+        self._capture_fns = capture_fns
+        self._detect_batch_fn = detect_batch_fn
+        self._recognize_fn = recognize_fn
+        self._gates = change_gates or [None] * len(capture_fns)
+
+        self._capture_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="takt-capture"
+        )
+        self._detect_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="takt-detect"
+        )
+        self._ocr_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="takt-ocr"
+        )
+
+        # Contadores simples para diagnóstico
+        self.batches = 0
+        self.frames = 0
+
+    def _capture(self, indices: List[int]):
+        captured = []
+        for index in indices:
+            captured_at = time.monotonic()
+            frame = self._capture_fns[index]()
+            gate = self._gates[index]
+            cached = gate.check(frame) if gate is not None else None
+            captured.append((index, frame, captured_at, cached))
+        return captured
+
+    def _detect(self, indices: List[int], frames: List[Any]) -> List[List]:
+        batch = self._detect_batch_fn(indices, frames)
+        for index, frame, boxes in zip(indices, frames, batch):
+            gate = self._gates[index]
+            if len(boxes) == 0 and gate is not None:
+                gate.update(frame, boxes, None)
+        return batch
+
+    def _recognize(self, pending):
+        extracted = []
+        for index, frame, boxes in pending:
+            result = self._recognize_fn(index, frame, boxes)
+            gate = self._gates[index]
+            if gate is not None:
+                gate.update(frame, boxes, result)
+            extracted.append(result)
+        return extracted
+
+    async def next(self, indices: List[int]) -> Dict[int, FrameResult]:
+        """Processa um frame de cada fonte em ``indices``; resultado por índice"""
+        loop = asyncio.get_running_loop()
+        captured = await loop.run_in_executor(self._capture_executor, self._capture, indices)
+
+        results: Dict[int, FrameResult] = {}
+        to_detect = []
+        for index, frame, captured_at, cached in captured:
+            if cached is not None:
+                # Frame igual ao anterior: reaproveita a última decisão da fonte
+                extracted = dict(cached.extracted) if cached.extracted else None
+                results[index] = FrameResult(
+                    frame, cached.boxes, extracted, captured_at, skipped=True
+                )
+            else:
+                to_detect.append((index, frame, captured_at))
+
+        pending = []
+        if to_detect:
+            batch = await loop.run_in_executor(
+                self._detect_executor,
+                self._detect,
+                [index for index, _, _ in to_detect],
+                [frame for _, frame, _ in to_detect],
+            )
+            self.batches += 1
+            for (index, frame, captured_at), boxes in zip(to_detect, batch):
+                if len(boxes) == 0:
+                    results[index] = FrameResult(frame, boxes, None, captured_at)
+                else:
+                    pending.append((index, frame, captured_at, boxes))
+
+        if pending:
+            extracted = await loop.run_in_executor(
+                self._ocr_executor,
+                self._recognize,
+                [(index, frame, boxes) for index, frame, _, boxes in pending],
+            )
+            for (index, frame, captured_at, boxes), result in zip(pending, extracted):
+                results[index] = FrameResult(frame, boxes, result, captured_at)
+
+        self.frames += len(indices)
+        return results
+
+    def close(self):
+        """Cancela trabalho pendente e libera os executores"""
+        for executor in (
+            self._capture_executor,
+            self._detect_executor,
+            self._ocr_executor,
+        ):
+            executor.shutdown(wait=False, cancel_futures=True)
+        logger.debug(
+            f"Pipeline multi-estação finalizado - frames: {self.frames}, "
+            f"lotes do YOLO: {self.batches}"
+        )
@@ -0,0 +1,115 @@
+import logging
+import threading
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class RoiPreprocessor:
+    """
+    Pipeline clássico: ROI ampliada 2x (INTER_CUBIC), filtro bilateral e Otsu.
+
+    ``scale`` amplia o recorte da caixa do timer e ``binarize`` gera a imagem
+    binária entregue ao OCR. As subclasses trocam esses passos por versões
+    mais baratas.
+    """
+
+    name = "classic"
+
+    def __init__(self, target_height: int = 64, max_cached_sizes: int = 32):
+        self.target_height = target_height
+        self.max_cached_sizes = max_cached_sizes
+        # Parâmetros calculados por tamanho de ROI (a caixa do timer quase não muda)
+        self._params: Dict[Tuple[int, int], tuple] = {}
+        self._lock = threading.Lock()
+
+    def _compute_params(self, h: int, w: int) -> tuple:
+        return (w * 2, h * 2), cv2.INTER_CUBIC
+
+    def _params_for(self, h: int, w: int) -> tuple:
+        params = self._params.get((h, w))
+        if params is None:
+            params = self._compute_params(h, w)
+            with self._lock:
+                if len(self._params) >= self.max_cached_sizes:
+                    self._params.clear()
+                self._params[(h, w)] = params
+        return params
+
+    def scale(self, roi: np.ndarray) -> np.ndarray:
+        h, w = roi.shape[:2]
+        size, interpolation = self._params_for(h, w)
+        if size == (w, h):
+            return roi
+        return cv2.resize(roi, size, interpolation=interpolation)
+
+    def binarize(self, roi_bgr: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2GRAY)
+        gray = cv2.bilateralFilter(gray, d=9, sigmaColor=75, sigmaSpace=75)
+        _, th = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return th
+
+
+class FastRoiPreprocessor(RoiPreprocessor):
+    """
+    ROI redimensionada para altura fixa (INTER_LINEAR/INTER_AREA), blur
+    gaussiano 3x3 e Otsu.
+
+    O tamanho de saída não depende da resolução da tela: em 4K a ROI é
+    reduzida em vez de ampliada, e o custo do OCR fica constante.
+    """
+
+    name = "fast"
+
+    def _compute_params(self, h: int, w: int) -> tuple:
+        factor = self.target_height / h
+        size = (max(1, round(w * factor)), self.target_height)
+        interpolation = cv2.INTER_LINEAR if factor > 1 else cv2.INTER_AREA
+        return size, interpolation
+
+    def binarize(self, roi_bgr: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (3, 3), 0)
+        _, th = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return th
+
+
+class AdaptiveRoiPreprocessor(FastRoiPreprocessor):
+    """
+    Altura fixa + limiar adaptativo gaussiano, para fundos com gradiente ou
+    reflexo onde o Otsu global falha. O texto sai sempre escuro em fundo
+    claro (a polaridade é decidida pela borda da ROI).
+    """
+
+    name = "adaptive"
+
+    def binarize(self, roi_bgr: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2GRAY)
+        # Janela do limiar ~ metade da altura da ROI, sempre ímpar
+        block_size = max(3, (gray.shape[0] // 2) | 1)
+        border = np.concatenate([gray[0], gray[-1], gray[:, 0], gray[:, -1]])
+        if border.mean() < 128:
+            gray = cv2.bitwise_not(gray)
+        return cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, 10
+        )
+
+
+ROI_PREPROCESSORS = {
+    "classic": RoiPreprocessor,
+    "fast": FastRoiPreprocessor,
+    "adaptive": AdaptiveRoiPreprocessor,
+}
+
+
+def create_roi_preprocessor(name: str = "classic", target_height: int = 64) -> RoiPreprocessor:
+    """Cria o pipeline de pré-processamento da ROI; nome desconhecido usa o clássico"""
+    preprocessor_cls = ROI_PREPROCESSORS.get(name)
+    if preprocessor_cls is None:
+        logger.warning(f"Pré-processamento desconhecido: {name} - usando 'classic'")
+        preprocessor_cls = RoiPreprocessor
+    return preprocessor_cls(target_height=target_height)
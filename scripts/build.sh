@@ -46,6 +46,14 @@ then
     echo "   Instale com: sudo apt install tesseract-ocr"
 fi
 
+# Perfil de tempo de importação (início a frio do app x módulo de análise)
+echo ""
+echo "⏱️  Gerando perfil de importação..."
+mkdir -p build
+python scripts/import_profile.py --modules app main --output build/import_profile.txt > /dev/null \
+    && echo "📄 Perfil salvo em: build/import_profile.txt" \
+    || echo "⚠️  Aviso: não foi possível gerar o perfil de importação"
+
 # Executa PyInstaller
 echo ""
 echo "🔨 Compilando aplicativo..."
@@ -0,0 +1,86 @@
+"""
+Relatório de tempo de importação dos módulos do app (python -X importtime).
+
+Uso:
+    python scripts/import_profile.py [--modules app main] [--top 25] [--output relatorio.txt]
+
+Cada módulo é importado num processo novo, então o tempo medido é o de um
+início a frio. ``app`` deve ficar bem abaixo de 1 s: a pilha de ML (cv2,
+ultralytics/torch, OCR) só pode aparecer no perfil de ``main``.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_module(module):
+    """Importa ``module`` com -X importtime e retorna [(cumulativo_us, self_us, nome)]"""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        errors = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        raise RuntimeError(f"Falha ao importar {module}:\n" + "\n".join(errors[-10:]))
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+            # O nome vem após "| "; a indentação extra indica o nível de aninhamento
+            entries.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+        except ValueError:
+            continue
+    return entries
+
+
+def format_report(module, entries, top):
+    total_us = next((e[0] for e in entries if e[2] == module), 0)
+    lines = [f"== import {module}: {total_us / 1e6:.3f} s ({len(entries)} módulos) =="]
+    lines.append(f"{'cumulativo ms':>14}{'próprio ms':>12}  módulo")
+    for cumulative_us, self_us, name in sorted(entries, reverse=True)[:top]:
+        lines.append(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>12.1f}  {name}")
+    return "\n".join(lines), total_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de tempo de importação")
+    parser.add_argument("--modules", nargs="+", default=["app", "main"])
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--output", help="Salva o relatório em arquivo texto")
+    args = parser.parse_args()
+
+    sections = []
+    for module in args.modules:
+        try:
+            entries = profile_module(module)
+        except RuntimeError as e:
+            sections.append(str(e))
+            continue
+        text, total_us = format_report(module, entries, args.top)
+        sections.append(text)
+        if module == "app" and total_us > 1e6:
+            sections.append("⚠️  app leva mais de 1 s para importar - verifique imports pesados")
+
+    output = "\n\n".join(sections)
+    print(output)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
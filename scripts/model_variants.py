@@ -0,0 +1,225 @@
+"""
+Gera variantes do detector de takt (FP32/FP16/INT8 x tamanhos de entrada) e
+mede recall da caixa do timer contra latência em screenshots gravados.
+
+Uso:
+    python scripts/model_variants.py --model train_2025.pt --screenshots gravacoes/telas
+
+Ground truth: se existir um ``<imagem>.txt`` no formato YOLO ao lado do
+screenshot, ele é usado; senão as detecções do .pt original em imgsz=640
+(configuração de produção) servem de referência.
+
+A variante escolhida é configurada em ``config.json``:
+    "tech": {"model_variant": "<caminho>.onnx", "inference_imgsz": 416}
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import cv2  # noqa: E402
+
+from detector import OnnxDetector, TorchDetector, export_model, letterbox  # noqa: E402
+
+IMAGE_EXTENSIONS = ("*.png", "*.jpg", "*.jpeg")
+
+
+def load_screenshots(screenshots_dir):
+    paths = []
+    for pattern in IMAGE_EXTENSIONS:
+        paths += glob.glob(os.path.join(screenshots_dir, pattern))
+    images = []
+    for path in sorted(paths):
+        image = cv2.imread(path)
+        if image is not None:
+            images.append((path, image))
+    return images
+
+
+def load_yolo_labels(image_path, image):
+    """Lê labels YOLO (classe cx cy w h normalizados) e retorna caixas xyxy em pixels"""
+    label_path = os.path.splitext(image_path)[0] + ".txt"
+    if not os.path.exists(label_path):
+        return None
+    h, w = image.shape[:2]
+    boxes = []
+    with open(label_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            cx, cy, bw, bh = (float(v) for v in parts[1:5])
+            boxes.append(
+                [(cx - bw / 2) * w, (cy - bh / 2) * h, (cx + bw / 2) * w, (cy + bh / 2) * h]
+            )
+    return boxes
+
+
+def iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, ix2 - ix1) * max(0.0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def count_matches(ground_truth, predictions, iou_threshold):
+    matched = 0
+    used = set()
+    for gt in ground_truth:
+        for index, pred in enumerate(predictions):
+            if index not in used and iou(gt, pred) >= iou_threshold:
+                used.add(index)
+                matched += 1
+                break
+    return matched
+
+
+def build_fp16(fp32_path, fp16_path):
+    import onnx
+    from onnxruntime.transformers import float16
+
+    model = onnx.load(fp32_path)
+    onnx.save(float16.convert_float_to_float16(model, keep_io_types=True), fp16_path)
+
+
+def build_int8(fp32_path, int8_path, images, imgsz):
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+    import onnxruntime as ort
+
+    input_name = ort.InferenceSession(
+        fp32_path, providers=["CPUExecutionProvider"]
+    ).get_inputs()[0].name
+
+    class ScreenshotReader(CalibrationDataReader):
+        """Alimenta a calibração INT8 com os screenshots gravados"""
+
+        def __init__(self):
+            self._tensors = iter(letterbox(image, imgsz)[0] for _, image in images)
+
+        def get_next(self):
+            tensor = next(self._tensors, None)
+            return None if tensor is None else {input_name: tensor}
+
+    quantize_static(
+        fp32_path,
+        int8_path,
+        ScreenshotReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+
+
+def evaluate(detector, images, ground_truth, imgsz, iou_threshold):
+    detector.warmup()
+    timings = []
+    matched = 0
+    total = 0
+    for (path, image), gt in zip(images, ground_truth):
+        start = time.perf_counter()
+        predictions = detector.predict(image, imgsz=imgsz)
+        timings.append((time.perf_counter() - start) * 1000)
+        matched += count_matches(gt, predictions, iou_threshold)
+        total += len(gt)
+
+    ordered = sorted(timings)
+    return {
+        "recall": matched / total if total else 1.0,
+        "mean_ms": statistics.mean(timings),
+        "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * (len(ordered) - 1)))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Variantes quantizadas do detector de takt")
+    parser.add_argument("--model", required=True, help="Modelo .pt original")
+    parser.add_argument("--screenshots", required=True, help="Pasta com screenshots gravados")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[320, 416, 640])
+    parser.add_argument(
+        "--precisions", nargs="+", default=["fp32", "fp16", "int8"], choices=["fp32", "fp16", "int8"]
+    )
+    parser.add_argument("--output-dir", help="Destino das variantes (padrão: ao lado do modelo)")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU mínimo para contar acerto")
+    parser.add_argument("--min-recall", type=float, default=0.99)
+    parser.add_argument("--threads", type=int, default=0, help="Threads intra-op (0 = padrão)")
+    parser.add_argument("--report", help="Salva o relatório em JSON")
+    args = parser.parse_args()
+
+    images = load_screenshots(args.screenshots)
+    if not images:
+        print(f"Nenhum screenshot encontrado em {args.screenshots}")
+        return 1
+
+    ground_truth = [load_yolo_labels(path, image) for path, image in images]
+    if any(gt is None for gt in ground_truth):
+        print("Labels ausentes: usando o modelo .pt em imgsz=640 como referência")
+        reference = TorchDetector(args.model)
+        ground_truth = [
+            gt if gt is not None else [box[:4] for box in reference.predict(image, imgsz=640)]
+            for gt, (_, image) in zip(ground_truth, images)
+        ]
+
+    output_dir = args.output_dir or os.path.dirname(os.path.abspath(args.model))
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, os.path.splitext(os.path.basename(args.model))[0])
+
+    fp32_path = f"{base}_fp32.onnx"
+    shutil.copyfile(export_model(args.model, "onnx"), fp32_path)
+    variants = {"fp32": fp32_path}
+    if "fp16" in args.precisions:
+        variants["fp16"] = f"{base}_fp16.onnx"
+        build_fp16(fp32_path, variants["fp16"])
+    if "int8" in args.precisions:
+        variants["int8"] = f"{base}_int8.onnx"
+        build_int8(fp32_path, variants["int8"], images, max(args.sizes))
+
+    report = []
+    for precision in args.precisions:
+        detector = OnnxDetector(variants[precision], threads=args.threads or None)
+        for imgsz in args.sizes:
+            result = evaluate(detector, images, ground_truth, imgsz, args.iou)
+            result.update(
+                {"precision": precision, "imgsz": imgsz, "path": variants[precision]}
+            )
+            report.append(result)
+            print(
+                f"{precision:>5} @ {imgsz:<4} recall={result['recall']:.1%} "
+                f"média={result['mean_ms']:.1f}ms p95={result['p95_ms']:.1f}ms"
+            )
+
+    eligible = [r for r in report if r["recall"] >= args.min_recall]
+    if eligible:
+        best = min(eligible, key=lambda r: r["mean_ms"])
+        print("")
+        print(f"Variante mais barata com recall >= {args.min_recall:.0%}:")
+        print(
+            json.dumps(
+                {"model_variant": best["path"], "inference_imgsz": best["imgsz"]}, indent=2
+            )
+        )
+    else:
+        print(f"Nenhuma variante atingiu recall >= {args.min_recall:.0%}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
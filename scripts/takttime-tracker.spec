@@ -35,11 +35,31 @@ a = Analysis(
         'cv2',
         'PIL',
         'pytesseract',
+        'tesserocr',
         'numpy',
         'torch',
         'torchvision',
         'mqtt_manager',
         'main',
+        'pipeline',
+        'capture',
+        'frame_gate',
+        'ocr',
+        'digit_ocr',
+        'detector',
+        'model_registry',
+        'countdown',
+        'mss',
+        'metrics',
+        'logging_setup',
+        'preprocessing',
+        'spool',
+        'stations',
+        'telemetry',
+        'onnxruntime',
+        'openvino',
+        'orjson',
+        'msgpack',
         'PyQt5.QtCore',
         'PyQt5.QtGui',
         'PyQt5.QtWidgets',
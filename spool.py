@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class TaktSpool:
+    """
+    Fila de saída durável dos eventos de takt (SQLite em modo WAL).
+
+    Todo takt é gravado aqui antes do envio e só é apagado depois do PUBACK
+    do broker (``publish_command_confirmed``, QoS 1, nos dois clientes MQTT),
+    então nenhuma contagem se perde com o broker ou o ESP32 fora do ar, nem
+    com o processo encerrado no meio do caminho.
+
+    Os commits não fazem fsync (``synchronous=NORMAL``: sobrevivem à queda
+    do processo); ``sync()`` faz o checkpoint do WAL com fsync em lote, no
+    máximo a cada ``sync_interval`` segundos, limitando a janela de perda
+    numa queda de energia sem um fsync por evento no eMMC.
+    """
+
+    def __init__(self, path: str, sync_interval: float = 2.0):
+        self.path = path
+        self.sync_interval = sync_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " device_id TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        # Pendentes por ESP32: cada drenagem só olha a fila do seu dispositivo
+        self._pending_by_device: Dict[str, int] = dict(
+            self._db.execute("SELECT device_id, COUNT(*) FROM events GROUP BY device_id")
+        )
+        self.pending = sum(self._pending_by_device.values())
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+        if self.pending:
+            logger.info(f"📦 Spool com {self.pending} takt(s) pendente(s) de execuções anteriores")
+
+    def append(self, device_id: str, payload: dict) -> int:
+        """Grava um evento no fim da fila; retorna o id"""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO events (device_id, payload, created_at) VALUES (?, ?, ?)",
+                (device_id, json.dumps(payload), time.time()),
+            )
+            self.pending += 1
+            self._pending_by_device[device_id] = self._pending_by_device.get(device_id, 0) + 1
+            self._dirty = True
+            return cursor.lastrowid
+
+    def pending_for(self, device_id: str) -> int:
+        """Eventos pendentes de um dispositivo"""
+        return self._pending_by_device.get(device_id, 0)
+
+    def peek(self, limit: int, device_id: Optional[str] = None) -> List[Tuple[int, str, dict]]:
+        """Eventos mais antigos, sem removê-los: [(id, device_id, payload)]"""
+        query = "SELECT id, device_id, payload FROM events"
+        params: tuple = ()
+        if device_id is not None:
+            query += " WHERE device_id = ?"
+            params = (device_id,)
+        query += " ORDER BY id LIMIT ?"
+        with self._lock:
+            rows = self._db.execute(query, params + (limit,)).fetchall()
+        return [(row_id, device, json.loads(payload)) for row_id, device, payload in rows]
+
+    def remove(self, ids: List[int]):
+        """Remove os eventos enviados numa única transação"""
+        if not ids:
+            return
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                removed = self._db.execute(
+                    f"SELECT device_id, COUNT(*) FROM events WHERE id IN ({placeholders})"
+                    " GROUP BY device_id",
+                    ids,
+                ).fetchall()
+                self._db.executemany("DELETE FROM events WHERE id = ?", [(i,) for i in ids])
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            for device_id, count in removed:
+                left = self._pending_by_device.get(device_id, 0) - count
+                if left > 0:
+                    self._pending_by_device[device_id] = left
+                else:
+                    self._pending_by_device.pop(device_id, None)
+            self.pending = sum(self._pending_by_device.values())
+            self._dirty = True
+
+    def needs_sync(self) -> bool:
+        return self._dirty and time.monotonic() - self._last_sync >= self.sync_interval
+
+    def sync(self):
+        """Checkpoint do WAL (fsync) das alterações acumuladas"""
+        with self._lock:
+            self._db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            self._dirty = False
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._dirty:
+                self._db.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            self._db.close()
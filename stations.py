@@ -0,0 +1,90 @@
+import logging
+from typing import Any, List, Optional, Tuple
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+
+class StationConfig:
+    """Estação do config.json: área da tela → ESP32 da célula"""
+
+    __slots__ = ("device_id", "region", "imgsz")
+
+    def __init__(
+        self,
+        device_id: str,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        imgsz: Optional[int] = None,
+    ):
+        self.device_id = device_id
+        self.region = region
+        self.imgsz = imgsz
+
+
+def parse_stations(entries) -> List[StationConfig]:
+    """
+    Lê a lista ``stations`` do config.json:
+    ``[{"device_id": "cost-1-7", "region": [x1, y1, x2, y2], "imgsz": 640}, ...]``.
+
+    Entradas inválidas ou com ``device_id`` repetido são ignoradas com aviso.
+    """
+    stations: List[StationConfig] = []
+    seen = set()
+    for index, entry in enumerate(entries or []):
+        if not isinstance(entry, dict) or not str(entry.get("device_id", "")).strip():
+            logger.warning(f"Estação {index} ignorada: device_id ausente ({entry})")
+            continue
+
+        device_id = str(entry["device_id"]).strip()
+        if device_id in seen:
+            logger.warning(f"Estação {index} ignorada: device_id {device_id} repetido")
+            continue
+
+        region = entry.get("region")
+        if region is not None:
+            try:
+                x1, y1, x2, y2 = (int(value) for value in region)
+            except (TypeError, ValueError):
+                logger.warning(f"Estação {device_id} ignorada: region inválida ({region})")
+                continue
+            if x2 <= x1 or y2 <= y1 or x1 < 0 or y1 < 0:
+                logger.warning(f"Estação {device_id} ignorada: region vazia ({region})")
+                continue
+            region = (x1, y1, x2, y2)
+
+        imgsz = entry.get("imgsz")
+        seen.add(device_id)
+        stations.append(StationConfig(device_id, region, int(imgsz) if imgsz else None))
+    return stations
+
+
+class Station:
+    """
+    Estado de rastreamento de uma estação.
+
+    Cada estação tem a sua captura, gate de mudança e agenda do countdown, e
+    o seu próprio debounce, contador de takt e cooldown de aviso de ESP32
+    desconectado; só o detector e os engines de OCR são compartilhados.
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        capture: Any,
+        change_gate: Optional[Any] = None,
+        scheduler: Optional[Any] = None,
+        imgsz: int = 640,
+    ):
+        self.device_id = device_id
+        self.capture = capture
+        self.change_gate = change_gate
+        self.scheduler = scheduler
+        self.imgsz = imgsz
+
+        self.takt_count = 0
+        self.last_message_time: Optional[float] = None
+        self.last_sent_message: Optional[dict] = None
+        self.last_takt_screen_check: Optional[float] = None
+        self.last_device_warning_time: Optional[float] = None
+        # Instante monotônico da próxima captura (modo multi-estação)
+        self.next_due = 0.0
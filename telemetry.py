@@ -0,0 +1,195 @@
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Configurar logger
+logger = logging.getLogger(__name__)
+
+# Versão do formato do lote; incrementar a cada mudança incompatível no envelope
+TELEMETRY_SCHEMA_VERSION = 1
+
+# Tópico padrão por estação, separado dos comandos dos ESP32
+TELEMETRY_TOPIC = "takt/telemetry/{source}"
+
+# Tipos de estado: só o valor mais recente de cada um (por device_id) vai no lote
+COALESCED_KINDS = frozenset({"metrics", "screen_state"})
+
+
+class JsonSerializer:
+    """JSON da biblioteca padrão, sem espaços"""
+
+    name = "json"
+    content_type = "application/json"
+
+    def dumps(self, obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class OrjsonSerializer:
+    """JSON via orjson (extensão em Rust, várias vezes mais rápido que o json)"""
+
+    name = "orjson"
+    content_type = "application/json"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj) -> bytes:
+        return self._orjson.dumps(obj, default=str)
+
+
+class MsgpackSerializer:
+    """MessagePack binário: lotes menores que JSON para o coletor da planta"""
+
+    name = "msgpack"
+    content_type = "application/msgpack"
+
+    def __init__(self):
+        import msgpack
+
+        self._packer = msgpack.Packer(default=str)
+
+    def dumps(self, obj) -> bytes:
+        return self._packer.pack(obj)
+
+
+TELEMETRY_SERIALIZERS = {
+    "json": JsonSerializer,
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+
+def create_serializer(name: str = "auto"):
+    """
+    Cria o serializador de telemetria. ``"auto"`` usa orjson se instalado;
+    orjson/msgpack ausentes caem para o JSON da biblioteca padrão.
+    """
+    if name == "auto":
+        try:
+            return OrjsonSerializer()
+        except ImportError:
+            return JsonSerializer()
+
+    serializer_cls = TELEMETRY_SERIALIZERS.get(name)
+    if serializer_cls is None:
+        logger.warning(f"Serializador de telemetria desconhecido '{name}' - usando json")
+        return JsonSerializer()
+    try:
+        return serializer_cls()
+    except ImportError:
+        logger.warning(
+            f"Serializador '{name}' indisponível (pip install {name}) - usando json"
+        )
+        return JsonSerializer()
+
+
+class TelemetryBatcher:
+    """
+    Agrupa eventos de telemetria em lotes compactos.
+
+    Eventos ``takt`` entram todos no lote, em ordem; tipos de estado
+    (``COALESCED_KINDS``) mantêm só o último valor até o próximo envio. O
+    lote é enviado ao atingir ``max_events`` ou, pelo dono do batcher, a
+    cada ``max_interval`` segundos.
+
+    Envelope: ``{"schema", "source", "seq", "sent_at", "events"}``, com cada
+    evento como ``{"kind", "ts", "data"}``. ``seq`` reinicia com o processo e
+    permite ao coletor detectar lotes perdidos (telemetria usa QoS 0).
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[bytes], bool],
+        source: str,
+        serializer=None,
+        max_events: int = 100,
+        max_interval: float = 1.0,
+    ):
+        self.publish = publish
+        self.source = source
+        self.serializer = serializer or JsonSerializer()
+        self.max_events = max_events
+        self.max_interval = max_interval
+
+        self._lock = threading.Lock()
+        self._events: List[dict] = []
+        # (tipo coalescido, device_id) -> índice em _events
+        self._latest: Dict[Tuple[str, Optional[str]], int] = {}
+        self._seq = 0
+        self.sent_batches = 0
+        self.dropped_batches = 0
+
+    def add(self, kind: str, data) -> bool:
+        """Enfileira um evento; envia o lote na hora se ficou cheio"""
+        event = {"kind": kind, "ts": time.time(), "data": data}
+        key = (kind, data.get("device_id") if isinstance(data, dict) else None)
+        with self._lock:
+            index = self._latest.get(key)
+            if index is not None:
+                self._events[index] = event
+                return False
+            if kind in COALESCED_KINDS:
+                self._latest[key] = len(self._events)
+            self._events.append(event)
+            full = len(self._events) >= self.max_events
+        if full:
+            self.flush()
+        return full
+
+    def flush(self) -> bool:
+        """Serializa e publica o lote pendente; lote vazio não gera mensagem"""
+        with self._lock:
+            if not self._events:
+                return True
+            events, self._events, self._latest = self._events, [], {}
+            self._seq += 1
+            seq = self._seq
+
+        batch = {
+            "schema": TELEMETRY_SCHEMA_VERSION,
+            "source": self.source,
+            "seq": seq,
+            "sent_at": time.time(),
+            "events": events,
+        }
+        try:
+            sent = self.publish(self.serializer.dumps(batch))
+        except Exception as e:
+            logger.debug(f"Erro ao publicar lote de telemetria: {e}")
+            sent = False
+
+        # Telemetria é descartável: lote não enviado não volta para a fila
+        if sent:
+            self.sent_batches += 1
+        else:
+            self.dropped_batches += 1
+            logger.debug(f"Lote de telemetria {seq} descartado ({len(events)} eventos)")
+        return sent
+
+
+class TelemetryFlusher:
+    """Thread que envia o lote pendente a cada ``max_interval`` segundos"""
+
+    def __init__(self, batcher: TelemetryBatcher):
+        self.batcher = batcher
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="telemetry-flush", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.batcher.max_interval):
+            self.batcher.flush()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.batcher.max_interval + 1)
+        self._thread = None
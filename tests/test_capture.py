@@ -0,0 +1,88 @@
+from capture import FrameBufferPool, ScreenCapture
+
+FULL = (1080, 1920, 3)
+REGION_A = (200, 300, 3)
+REGION_B = (240, 360, 3)
+
+
+def test_full_screen_ring_survives_region_changes():
+    pool = FrameBufferPool(slots=3, max_shapes=2)
+    full = [pool.get(FULL) for _ in range(3)]
+    pool.get(REGION_A)
+    pool.get(REGION_B)
+    allocated = pool.allocated_bytes
+
+    # Volta à tela inteira: mesmo anel, sem nova alocação
+    assert all(pool.get(FULL) is buffer for buffer in full)
+    assert pool.allocated_bytes == allocated
+    assert set(pool._rings) == {FULL, REGION_B}
+
+
+def test_region_rings_evicted_least_recently_used():
+    pool = FrameBufferPool(slots=1, max_shapes=3)
+    pool.get(FULL)
+    region_a = pool.get(REGION_A)
+    pool.get(REGION_B)
+    pool.get(REGION_A)
+
+    # A foi usada depois de B: B sai, A e a tela inteira ficam
+    pool.get((100, 100, 3))
+    assert set(pool._rings) == {FULL, REGION_A, (100, 100, 3)}
+    assert pool.get(REGION_A) is region_a
+
+
+class FakeBackend:
+    name = "fake"
+
+    def __init__(self, width=1920, height=1080):
+        self.size = (width, height)
+
+    def grab(self, bbox, pool):
+        x1, y1, x2, y2 = bbox or (0, 0) + self.size
+        image = pool.get((y2 - y1, x2 - x1, 3))
+        image[:] = 0
+        return image, 0
+
+
+def test_tracking_region_ignores_box_jitter():
+    capture = ScreenCapture(backend=FakeBackend())
+    frame = capture.grab()
+    capture.update(frame, [(900, 500, 1000, 540)])
+    region = capture._region
+
+    for dx, dy in [(1, 0), (-1, 1), (0, -1), (1, 1)]:
+        frame = capture.grab()
+        assert not frame.full
+        ox, oy = frame.offset
+        capture.update(frame, [(900 + dx - ox, 500 + dy - oy, 1000 + dx - ox, 540 + dy - oy)])
+        assert capture._region == region
+
+
+def test_tracking_region_follows_box_near_edge():
+    capture = ScreenCapture(backend=FakeBackend())
+    capture.update(capture.grab(), [(900, 500, 1000, 540)])
+    x1, y1, x2, y2 = capture._region
+
+    frame = capture.grab()
+    ox, oy = frame.offset
+    # Caixa a 2 px da borda direita da região: recalcula em volta dela
+    capture.update(frame, [(x2 - 102 - ox, 500 - oy, x2 - 2 - ox, 540 - oy)])
+    assert capture._region[2] > x2
+
+
+def test_ring_slots_allocated_on_first_use():
+    pool = FrameBufferPool(slots=3)
+    frame_bytes = 200 * 300 * 3
+    pool.get(REGION_A)
+    assert pool.allocated_bytes == frame_bytes
+    pool.get(REGION_A)
+    pool.get(REGION_A)
+    pool.get(REGION_A)
+    assert pool.allocated_bytes == 3 * frame_bytes
+
+
+def test_tracking_region_size_snapped_to_grid():
+    capture = ScreenCapture(backend=FakeBackend(), size_step=64)
+    capture.update(capture.grab(), [(901, 503, 1003, 541)])
+    x1, y1, x2, y2 = capture._region
+    assert (x2 - x1) % 64 == 0 and (y2 - y1) % 64 == 0
@@ -0,0 +1,81 @@
+from countdown import (
+    ACCEPTED,
+    LOW_CONFIDENCE,
+    REJECTED,
+    CaptureScheduler,
+    CountdownTracker,
+    parse_countdown,
+)
+
+
+def test_parse_countdown():
+    assert parse_countdown("TAKT 00:01:40") == 100
+    assert parse_countdown("1:02:03") == 3723
+    assert parse_countdown("00:61:00") is None
+    assert parse_countdown("") is None
+
+
+def test_first_reading_anchors_model():
+    tracker = CountdownTracker(tolerance=1.0)
+    assert tracker.observe(100, 0.9, now=0.0) == ACCEPTED
+    assert tracker.predicted(now=10.0) == (89.0, 91.0)
+
+
+def test_consistent_readings_narrow_prediction():
+    tracker = CountdownTracker(tolerance=1.0)
+    tracker.observe(100, now=0.0)
+    assert tracker.observe(90, now=10.5) == ACCEPTED
+    lo, hi = tracker.predicted(now=10.5)
+    assert (lo, hi) == (89.0, 90.5)
+
+
+def test_zero_misread_is_rejected_until_confirmed():
+    tracker = CountdownTracker(tolerance=1.0, confirmations=2)
+    tracker.observe(100, now=0.0)
+
+    assert tracker.observe(0, 0.9, now=0.1) == REJECTED
+    assert tracker.confirming
+    # Segunda leitura concordando com a primeira: countdown reiniciado
+    assert tracker.observe(0, 0.9, now=0.2) == ACCEPTED
+    assert tracker.rejected == 1
+
+
+def test_low_confidence_does_not_move_model_or_veto():
+    tracker = CountdownTracker(tolerance=1.0, min_confidence=0.5)
+    assert tracker.observe(0, 0.3, now=0.0) == LOW_CONFIDENCE
+    assert not tracker.locked
+
+    tracker.observe(100, 0.9, now=1.0)
+    assert tracker.observe(0, 0.3, now=1.1) == LOW_CONFIDENCE
+    assert tracker.predicted(now=1.0) == (99.0, 101.0)
+    assert tracker.rejected == 0
+    assert tracker.low_confidence == 2
+
+
+def test_missing_reading_is_low_confidence():
+    assert CountdownTracker().observe(None) == LOW_CONFIDENCE
+
+
+def test_stale_model_reanchors():
+    tracker = CountdownTracker(tolerance=1.0, stale_after=3.0)
+    tracker.observe(5, now=0.0)
+    # Conclusão prevista em ~5s; 20s depois o modelo está velho
+    assert tracker.observe(80, now=20.0) == ACCEPTED
+    assert tracker.predicted(now=20.0) == (79.0, 81.0)
+
+
+def test_scheduler_bursts_around_predicted_completion():
+    scheduler = CaptureScheduler(min_interval=0.1, max_interval=5.0, burst_lead=2.0)
+    assert scheduler.next_delay(now=0.0) == scheduler.default_interval
+
+    scheduler.observe(60, now=0.0)
+    assert scheduler.next_delay(now=0.0) == 5.0
+    # Dentro da rajada (2s antes da conclusão, mais a incerteza)
+    assert scheduler.next_delay(now=58.0) == 0.1
+
+
+def test_scheduler_confirms_rejected_reading_quickly():
+    scheduler = CaptureScheduler(min_interval=0.1)
+    scheduler.observe(60, now=0.0)
+    assert scheduler.observe(0, now=0.5) == REJECTED
+    assert scheduler.next_delay(now=0.5) == 0.1
@@ -0,0 +1,29 @@
+import numpy as np
+
+from capture import CapturedFrame
+from frame_gate import FrameChangeGate
+
+
+def crop(image, box):
+    x1, y1, x2, y2 = (int(v) for v in box)
+    return image[y1:y2, x1:x2]
+
+
+def make_frame():
+    image = np.full((120, 200, 3), 60, dtype=np.uint8)
+    image[40:80, 50:150] = 220
+    return CapturedFrame(image)
+
+
+def test_unchanged_frame_reuses_decision():
+    gate = FrameChangeGate(crop)
+    gate.update(make_frame(), [(50, 40, 150, 80)], {"event_type": "takt"})
+    entry = gate.check(make_frame())
+    assert entry is not None and entry.extracted == {"event_type": "takt"}
+
+
+def test_invalidate_forces_full_pipeline():
+    gate = FrameChangeGate(crop)
+    gate.update(make_frame(), [(50, 40, 150, 80)], {"event_type": "takt"})
+    gate.invalidate()
+    assert gate.check(make_frame()) is None